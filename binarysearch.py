@@ -2,17 +2,40 @@
 Алгоритм двоичного поиска.
 """
 
-from typing import Sequence, TypeVar, List
+import bisect
+import math
+import mmap
+import struct
+from array import array
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple, \
+    TypeVar, Union
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 Element = TypeVar("Element")
 
+# Виды dtype, для которых numpy.searchsorted сравнивает так же, как Python
+_NUMERIC_KINDS = 'biuf'
 
-def search(lst: Sequence[Element], el: Element) -> int:
+# Сколько ключей файла записей хранится в памяти для первого шага поиска
+RECORD_SAMPLE_SIZE = 4096
+
+
+def search(lst: Sequence[Element], el: Element,
+           hint: Optional[int] = None) -> int:
     """
     Ищет индекс вхождения элемента в упорядоченном массиве. Если элемента нет,
     то возвращает -1. Сложность O(log n).
+
+    :param hint: предполагаемая позиция элемента. Если задана, то границы
+        равных el элементов ищутся экспоненциальным поиском от hint (см.
+        _gallop), а результат совпадает с результатом поиска без hint
     """
+    if hint is not None or isinstance(lst, RecordFile):
+        return _search_bounds(lst, el, False, hint)
     left, right = 0, len(lst) - 1
     while left <= right:
         m = (left + right) // 2
@@ -25,12 +48,17 @@ def search(lst: Sequence[Element], el: Element) -> int:
     return -1
 
 
-def index(lst: List[Element], el: Element) -> int:
+def index(lst: List[Element], el: Element,
+          hint: Optional[int] = None) -> int:
     """
     Возвращает такой индекс i в массиве A, что A[i-1] <= el <= A[i+1]. То есть
     с помощью бинарного поиска находит позицию, в которую элемент мог бы быть
     помещен, при этом не нарушив сортировки. Сложность O(log n).
+
+    :param hint: предполагаемая позиция, см. search
     """
+    if hint is not None or isinstance(lst, RecordFile):
+        return _search_bounds(lst, el, True, hint)
     if not lst:
         return 0
     left, right, m = 0, len(lst) - 1, 0
@@ -45,6 +73,384 @@ def index(lst: List[Element], el: Element) -> int:
     return m if lst[m] > el else m + 1
 
 
+def lower_bound(lst: Sequence[Element], el: Element,
+                hint: Optional[int] = None) -> int:
+    """
+    Индекс первого элемента, не меньшего el (или len). Сложность O(log n),
+    а с подсказкой hint - O(log d), где d - расстояние от hint до ответа.
+    """
+    if hint is not None and len(lst):
+        return bisect.bisect_left(lst, el, *_gallop(lst, el, hint, False))
+    if isinstance(lst, RecordFile):
+        return lst.lower_bound(el)
+    return bisect.bisect_left(lst, el)
+
+
+def upper_bound(lst: Sequence[Element], el: Element,
+                hint: Optional[int] = None) -> int:
+    """
+    Индекс первого элемента, большего el (или len). Сложность как
+    у lower_bound.
+    """
+    if hint is not None and len(lst):
+        return bisect.bisect_right(lst, el, *_gallop(lst, el, hint, True))
+    if isinstance(lst, RecordFile):
+        return lst.upper_bound(el)
+    return bisect.bisect_right(lst, el)
+
+
+def equal_range(lst: Sequence[Element], el: Element,
+                hint: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Границы [lower_bound, upper_bound) отрезка элементов, равных el.
+    """
+    first = lower_bound(lst, el, hint)
+    if first == len(lst) or el < lst[first]:
+        return first, first
+    return first, upper_bound(lst, el, first)
+
+
+def _search_bounds(lst: Sequence[Element], el: Element, insertion: bool,
+                   hint: Optional[int] = None) -> int:
+    """
+    search (или index, если insertion) через границы lower_bound и
+    upper_bound. Результат тот же, что и у двоичного поиска по всему массиву:
+    среди равных элементов выбирается первый, на который попала бы середина
+    отрезка (см. _first_probe). Конец серии равных элементов ищется
+    экспоненциальным поиском от ее начала.
+    """
+    n = len(lst)
+    a = lower_bound(lst, el, hint)
+    if a == n or not lst[a] == el:
+        return a if insertion else -1
+    if a + 1 < n and lst[a + 1] == el:
+        return _first_probe(a, upper_bound(lst, el, a), n)
+    return a
+
+
+def _gallop(lst: Sequence[Element], el: Element, hint: int,
+            right: bool) -> Tuple[int, int]:
+    """
+    Экспоненциальный (галопирующий) поиск от позиции hint. Шаг от hint
+    удваивается (1, 2, 4, ...), пока не будет пройдена граница, поэтому
+    для границы на расстоянии d от hint нужно O(log d) сравнений. Это выгодно,
+    когда ключи ищутся по очереди в порядке возрастания (курсор, слияние
+    упорядоченных массивов): поиск следующего ключа начинается с позиции
+    предыдущего.
+
+    :param right: искать границу upper_bound, а не lower_bound
+    :return: отрезок [lo, hi], в котором лежит граница: элементы левее lo
+        меньше el (не больше для right), а элемент hi (если hi < len) - нет
+    """
+    n = len(lst)
+    h = min(max(hint, 0), n - 1)
+
+    def before(x):
+        return not el < x if right else x < el
+
+    step = 1
+    if before(lst[h]):
+        lo = h + 1
+        while h + step < n:
+            if not before(lst[h + step]):
+                return lo, h + step
+            lo = h + step + 1
+            step *= 2
+        return lo, n
+    hi = h
+    while h - step >= 0:
+        if before(lst[h - step]):
+            return h - step + 1, hi
+        hi = h - step
+        step *= 2
+    return 0, hi
+
+
+def interpolation_search(lst: Sequence[Element], el: Element) -> int:
+    """
+    Интерполяционный поиск в упорядоченном массиве чисел. Вместо середины
+    интервала (a, b) проверяется позиция, в которой el находился бы при
+    равномерном распределении значений между lst[a] и lst[b]. На
+    равномерно распределенных ключах это O(log log n) шагов. На
+    неравномерных интерполяция может отсекать по одному элементу, поэтому
+    если шаг интерполяции не сократил интервал хотя бы вдвое, то следующий
+    шаг делается по середине, как в двоичном поиске. Так количество шагов не
+    больше 2*log2(n). Если интерполяция невозможна (на конце интервала
+    бесконечность), то шаг тоже делается по середине.
+
+    :return: индекс вхождения элемента или -1, если его нет
+    """
+    n = len(lst)
+    if not n:
+        return -1
+    # Значения на концах интервала (a, b) известны, поэтому на каждом шаге
+    # читается только один элемент
+    a, b = 0, n - 1
+    va, vb = lst[a], lst[b]
+    if va == el:
+        return a
+    if vb == el:
+        return b
+    if not va < el < vb:
+        return -1
+    halve = False
+    while b - a > 1:
+        size = b - a
+        offset = None
+        if not halve:
+            offset = (el - va) * size // (vb - va)
+            # С бесконечными значениями на концах смещение не определено
+            if offset != offset or abs(offset) == math.inf:
+                offset = None
+        if offset is None:
+            m = (a + b) // 2
+        else:
+            m = min(max(a + int(offset), a + 1), b - 1)
+        v = lst[m]
+        if v == el:
+            return m
+        if v < el:
+            a, va = m, v
+        else:
+            b, vb = m, v
+        halve = not halve and b - a > size // 2
+    return -1
+
+
+class RecordFile(Sequence):
+    """
+    Последовательность ключей упорядоченного по ключу файла записей
+    фиксированной длины. Файл отображается в память (mmap) и не читается
+    целиком: i-й элемент - это ключ, распакованный struct из записи i по
+    смещению key_offset. Поэтому search, index, search_many, index_many,
+    lower_bound, upper_bound и equal_range этого модуля работают с файлами
+    больше оперативной памяти.
+
+    Первые шаги двоичного поиска по файлу обращаются к далеким друг от друга
+    страницам, и каждый из них - это промах страницы. Поэтому ключи каждой
+    step-й записи (не больше RECORD_SAMPLE_SIZE ключей) хранятся в памяти:
+    lower_bound и upper_bound сначала ищут по ним отрезок из step записей,
+    а в файле читают только log2(step) ключей этого отрезка. Функции модуля
+    без подсказки hint ищут в файле записей через них, а с подсказкой -
+    экспоненциальным поиском от hint, который тоже читает ключи только рядом
+    с ответом.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO], record_size: int,
+                 key_format: str, key_offset: int = 0,
+                 sample_size: int = RECORD_SAMPLE_SIZE) -> None:
+        """
+        :param file: путь к файлу или файл, открытый на чтение в двоичном
+            режиме
+        :param record_size: длина записи в байтах
+        :param key_format: формат ключа в нотации struct, например '>Q' или
+            '<16s'. Ключ из одного поля возвращается как значение, из
+            нескольких - как кортеж
+        :param key_offset: смещение ключа от начала записи
+        :param sample_size: наибольшее количество ключей в памяти
+        """
+        self._key = struct.Struct(key_format)
+        if key_offset < 0 or key_offset + self._key.size > record_size:
+            raise ValueError('Key does not fit into the record')
+        self._file = open(file, 'rb') if isinstance(file, str) else None
+        fileno = (self._file or file).fileno()
+        self._record_size = record_size
+        self._key_offset = key_offset
+        size = (self._file or file).seek(0, 2)
+        self._len = size // record_size
+        self._mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) \
+            if size else None
+        self._step = max(1, math.ceil(self._len / sample_size))
+        self._sample = [self[i] for i in range(0, self._len, self._step)]
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('Record index out of range')
+        key = self._key.unpack_from(
+            self._mm, i * self._record_size + self._key_offset)
+        return key[0] if len(key) == 1 else key
+
+    def record(self, i: int) -> bytes:
+        """ Запись целиком. """
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('Record index out of range')
+        start = i * self._record_size
+        return self._mm[start:start + self._record_size]
+
+    def lower_bound(self, key) -> int:
+        """ Индекс первой записи с ключом, не меньшим key (или len). """
+        j = bisect.bisect_left(self._sample, key)
+        lo, hi = self._window(j)
+        return bisect.bisect_left(self, key, lo, hi)
+
+    def upper_bound(self, key) -> int:
+        """ Индекс первой записи с ключом, большим key (или len). """
+        j = bisect.bisect_right(self._sample, key)
+        lo, hi = self._window(j)
+        return bisect.bisect_right(self, key, lo, hi)
+
+    def _window(self, j: int) -> Tuple[int, int]:
+        """
+        Отрезок записей между j-1-м и j-м ключами выборки. Граница лежит
+        правее j-1-го ключа выборки и не правее j-го.
+        """
+        lo = (j - 1) * self._step + 1 if j else 0
+        return lo, min(j * self._step, self._len)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def search_many(lst: Sequence[Element], keys: Iterable[Element]):
+    """
+    Пакетный search: для каждого ключа возвращает тот же индекс, что и
+    search(lst, key), или -1, если ключа нет. См. _search_many.
+
+    :return: numpy.ndarray при векторном поиске, иначе array('q')
+    """
+    return _search_many(lst, keys, False)
+
+
+def index_many(lst: Sequence[Element], keys: Iterable[Element]):
+    """
+    Пакетный index: для каждого ключа возвращает тот же индекс, что и
+    index(lst, key). См. _search_many.
+
+    :return: numpy.ndarray при векторном поиске, иначе array('q')
+    """
+    return _search_many(lst, keys, True)
+
+
+def _search_many(lst, keys, insertion: bool):
+    """
+    Ищет все ключи в упорядоченном массиве:
+        1. Если установлен NumPy, а массив и ключи числовые, то ключи
+           упорядочиваются (если они еще не упорядочены) и ищутся векторно
+           numpy.searchsorted. На упорядоченных ключах соседние поиски
+           проходят по одним и тем же участкам массива, поэтому это
+           в несколько раз быстрее, чем искать ключи в исходном порядке.
+        2. Иначе упорядоченные ключи проходятся слиянием: поиск каждого
+           следующего ключа начинается с позиции предыдущего.
+        3. Иначе каждый ключ ищется встроенным bisect.
+    При повторах search и index возвращают не первый из равных элементов,
+    а тот, на который первым попадет середина отрезка двоичного поиска. До
+    этого момента каждое сравнение определяется только положением середины
+    относительно отрезка [a, b) равных ключу элементов, поэтому этот индекс
+    восстанавливается целочисленным повтором пути поиска без сравнения
+    элементов (см. _first_probe).
+
+    :param insertion: для отсутствующих ключей вернуть позицию вставки, как
+        index, а не -1, как search
+    """
+    n = len(lst)
+    if not isinstance(keys, Sequence) and \
+            not (np is not None and isinstance(keys, np.ndarray)):
+        keys = list(keys)
+    # Файл записей не загружается в память целиком, каждый ключ ищется
+    # сначала по выборке
+    if isinstance(lst, RecordFile):
+        return array('q', [_search_bounds(lst, key, insertion)
+                           for key in keys])
+    if np is not None and n:
+        arr, keys_arr = np.asarray(lst), np.asarray(keys)
+        # Векторно ищутся только числа: строки numpy сравнивает иначе (без
+        # завершающих '\0'), а для несравнимых типов не бросает TypeError.
+        # Массивы записей (кортежей) тоже ищутся поэлементно
+        if arr.ndim == keys_arr.ndim == 1 and \
+                arr.dtype.kind in _NUMERIC_KINDS and \
+                keys_arr.dtype.kind in _NUMERIC_KINDS:
+            return _search_many_numpy(arr, keys_arr, insertion)
+
+    res = array('q')
+    lo = 0
+    keys_sorted = _is_sorted(keys)
+    for key in keys:
+        a = bisect.bisect_left(lst, key, lo)
+        if keys_sorted:
+            lo = a
+        if a == n or not lst[a] == key:
+            res.append(a if insertion else -1)
+        elif a + 1 < n and lst[a + 1] == key:
+            res.append(_first_probe(a, bisect.bisect_right(lst, key, a), n))
+        else:
+            res.append(a)
+    return res
+
+
+def _search_many_numpy(arr, keys, insertion: bool):
+    n = len(arr)
+    order = None
+    if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+    first = np.searchsorted(arr, keys, side='left')
+    last = np.searchsorted(arr, keys, side='right')
+    res = _first_probe_numpy(first, last, n)
+    if not insertion:
+        res[last == first] = -1
+    if order is not None:
+        res[order] = res.copy()
+    return res
+
+
+def _is_sorted(keys: Sequence) -> bool:
+    return all(keys[i] <= keys[i + 1] for i in range(len(keys) - 1))
+
+
+def _first_probe(a: int, b: int, n: int) -> int:
+    """
+    Первая середина двоичного поиска в массиве длины n, попавшая в [a, b).
+    """
+    left, right = 0, n - 1
+    while True:
+        m = (left + right) // 2
+        if m >= b:
+            right = m - 1
+        elif m < a:
+            left = m + 1
+        else:
+            return m
+
+
+def _first_probe_numpy(first, last, n: int):
+    """
+    Векторный _first_probe. Для отсутствующих ключей возвращает a. Пути
+    поиска повторяются только для ключей, у которых больше одного равного
+    элемента, не больше log2(n) + 1 шагов.
+    """
+    res = first.copy()
+    active = np.flatnonzero(last - first > 1)
+    a, b = first[active], last[active]
+    left = np.zeros(len(active), dtype=first.dtype)
+    right = np.full(len(active), n - 1, dtype=first.dtype)
+    while len(active):
+        m = (left + right) // 2
+        hit = (a <= m) & (m < b)
+        res[active[hit]] = m[hit]
+        keep = ~hit
+        active, a, b, m = active[keep], a[keep], b[keep], m[keep]
+        left, right = left[keep], right[keep]
+        right = np.where(m >= b, m - 1, right)
+        left = np.where(m < a, m + 1, left)
+    return res
+
+
 if __name__ == '__main__':
 
     assert search([], 1) == -1
@@ -73,3 +479,147 @@ if __name__ == '__main__':
     assert index([0, 1, 2, 3], 1) == 1
     assert index([0, 1, 2, 3], 4) == 4
     assert index([0, 1, 2, 3], 0) == 0
+
+    assert list(search_many(['a\0'], ['a'])) == [search(['a\0'], 'a')] == [-1]
+    try:
+        search_many([1, 2, 3], ['a'])
+    except TypeError:
+        pass
+    else:
+        assert False, 'search_many must not compare ints with strings'
+
+    inf = float('inf')
+    assert interpolation_search([-inf, 0.0, 1.0], 0.0) == 1
+    assert interpolation_search([-inf, 0.0, 1.0, inf], 1.0) == 2
+    assert interpolation_search([-inf, inf], 0.0) == -1
+    assert interpolation_search([-inf, -1.0, inf], inf) == 2
+    assert interpolation_search([-inf, -1.0, inf], -inf) == 0
+
+    import random
+    from unittest import mock
+
+    for _ in range(200):
+        lst = sorted(random.randint(0, 20) for _ in
+                     range(random.randint(0, 50)))
+        keys = [random.randint(-1, 21) for _ in range(30)]
+        for q in (keys, sorted(keys)):
+            for np_module in (np, None):
+                with mock.patch(f'{__name__}.np', np_module):
+                    assert list(search_many(lst, q)) == \
+                        [search(lst, k) for k in q]
+                    assert list(index_many(lst, q)) == \
+                        [index(lst, k) for k in q]
+                    assert list(index_many(lst, iter(q))) == \
+                        [index(lst, k) for k in q]
+        for k in keys:
+            for hint in (-3, 0, len(lst) // 2, len(lst) - 1, len(lst) + 3):
+                assert search(lst, k, hint) == search(lst, k)
+                assert index(lst, k, hint) == index(lst, k)
+                assert lower_bound(lst, k, hint) == \
+                    bisect.bisect_left(lst, k)
+                assert upper_bound(lst, k, hint) == \
+                    bisect.bisect_right(lst, k)
+                assert equal_range(lst, k, hint) == equal_range(lst, k)
+            found = interpolation_search(lst, k)
+            assert found == -1 if k not in lst else lst[found] == k
+            inf = float('inf')
+            for floats in ([-inf] + [el / 7 for el in lst] + [inf],
+                           [-inf, -inf] + [el / 7 for el in lst],
+                           [el / 7 for el in lst] + [inf, inf]):
+                for x in (k / 7, -inf, inf):
+                    found = interpolation_search(floats, x)
+                    assert found == -1 if x not in floats else \
+                        floats[found] == x
+            floats = [el / 7 for el in lst]
+            found = interpolation_search(floats, k / 7)
+            assert found == -1 if k / 7 not in floats else \
+                floats[found] == k / 7
+        words = [chr(ord('a') + el) + '\0' * (el % 2) for el in lst]
+        queries = [chr(ord('a') + k) for k in keys if k >= 0]
+        for np_module in (np, None):
+            with mock.patch(f'{__name__}.np', np_module):
+                assert list(search_many(words, queries)) == \
+                    [search(words, q) for q in queries]
+                assert list(index_many(words, queries)) == \
+                    [index(words, q) for q in queries]
+        pairs = [(el, 0) for el in lst]
+        assert list(search_many(pairs, [(k, 0) for k in keys])) == \
+            [search(pairs, (k, 0)) for k in keys]
+
+    import os
+    import tempfile
+
+    values = sorted(random.randint(0, 50) for _ in range(1000))
+    record = struct.Struct('>4sI8s')
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        for i, v in enumerate(values):
+            f.write(record.pack(b'head', v, i.to_bytes(8, 'big')))
+    try:
+        for sample_size in (1, 7, RECORD_SAMPLE_SIZE):
+            with RecordFile(f.name, record.size, '>I', 4, sample_size) as rf:
+                assert len(rf) == len(values)
+                assert list(rf) == values
+                assert rf[-1] == values[-1]
+                assert rf.record(3)[8:] == (3).to_bytes(8, 'big')
+                for k in range(-1, 53):
+                    assert lower_bound(rf, k) == bisect.bisect_left(values, k)
+                    assert upper_bound(rf, k) == \
+                        bisect.bisect_right(values, k)
+                    assert equal_range(rf, k) == equal_range(values, k)
+                    assert search(rf, k) == search(values, k)
+                    assert index(rf, k) == index(values, k)
+                assert list(search_many(rf, range(-1, 53))) == \
+                    [search(values, k) for k in range(-1, 53)]
+        with RecordFile(f.name, record.size, '>4sI') as rf:
+            assert rf[0] == (b'head', values[0])
+            assert equal_range(rf, (b'head', 7)) == equal_range(values, 7)
+    finally:
+        os.remove(f.name)
+
+    with tempfile.TemporaryFile() as f:
+        with RecordFile(f, 16, '<q') as rf:
+            assert len(rf) == 0
+            assert equal_range(rf, 1) == (0, 0)
+            assert search(rf, 1) == -1
+
+    import sys
+    import time
+
+    from sorts.instrument import CountingSequence
+
+    # Бенчмарк запускается, только если задан размер массива
+    if len(sys.argv) > 1:
+        n = int(sys.argv[1])
+        rng = random.Random(0)
+        distributions = {
+            'uniform': sorted(rng.randrange(10 ** 9) for _ in range(n)),
+            'skewed': sorted(int(rng.paretovariate(1.2) * 1000)
+                             for _ in range(n)),
+        }
+        for dist, data in distributions.items():
+            queries = [rng.choice(data) for _ in range(10 ** 4)]
+            cursor = sorted(queries)
+
+            def with_hint(seq, qs):
+                pos = 0
+                for q in qs:
+                    pos = lower_bound(seq, q, pos)
+
+            runs = [
+                ('search',
+                 lambda seq, qs: [search(seq, q) for q in qs], queries),
+                ('interpolation_search',
+                 lambda seq, qs: [interpolation_search(seq, q) for q in qs],
+                 queries),
+                ('lower_bound, sorted keys',
+                 lambda seq, qs: [lower_bound(seq, q) for q in qs], cursor),
+                ('lower_bound with hint, sorted keys', with_hint, cursor)]
+            print(f'{dist}:')
+            for name, func, qs in runs:
+                start = time.perf_counter()
+                func(data, qs)
+                elapsed = (time.perf_counter() - start) / len(qs)
+                counted = CountingSequence(data, wrap=False)
+                func(counted, qs)
+                print(f'    {name:>34}: {elapsed * 1e6:.2f} us/query, '
+                      f'{counted.report.reads / len(qs):.1f} reads/query')
@@ -3,14 +3,22 @@
 массиве. Время поиска в среднем линейное.
 """
 
+import random
 import unittest
 
 from sorts.partitions import three_way_partition
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def find(lst, k):
-    if not lst or k < 1 or k > len(lst):
+    if not len(lst) or k < 1 or k > len(lst):
         raise IndexError
+    if np is not None and isinstance(lst, np.ndarray):
+        return find_numpy(lst, k)
 
     def _find(lst, l, r, k):
         if l >= r:
@@ -26,6 +34,42 @@ def find(lst, k):
     return _find(lst, 0, len(lst) - 1, k - 1)
 
 
+def find_numpy(arr, k):
+    """
+    Векторный быстрый поиск k-ой порядковой статистики одномерного
+    numpy.ndarray. Массив не изменяется: на каждом шаге булевыми масками
+    выбирается только та часть ("меньше" или "больше" случайного
+    разделителя), в которой лежит искомый элемент, а если он попал в блок
+    равных разделителю, то поиск заканчивается. Поэтому на данных с большим
+    количеством повторов поиск завершается за несколько проходов.
+
+    NaN не равен и не упорядочен ни с одним числом, поэтому, как и в
+    numpy.sort, NaN считаются большими всех чисел: если k больше количества
+    чисел, то возвращается NaN, иначе поиск идет среди чисел.
+    """
+    if not len(arr) or k < 1 or k > len(arr):
+        raise IndexError
+    if arr.dtype.kind == 'f':
+        nan = np.isnan(arr)
+        if nan.any():
+            if k > len(arr) - int(np.count_nonzero(nan)):
+                return arr[nan][0]
+            arr = arr[~nan]
+    k -= 1
+    while True:
+        pivot = arr[random.randrange(len(arr))]
+        less = arr[arr < pivot]
+        if k < len(less):
+            arr = less
+            continue
+        k -= len(less)
+        equal = int(np.count_nonzero(arr == pivot))
+        if k < equal:
+            return pivot
+        k -= equal
+        arr = arr[arr > pivot]
+
+
 class Tests(unittest.TestCase):
 
     def test_empty_list(self):
@@ -67,5 +111,32 @@ class Tests(unittest.TestCase):
                 self.assertEqual(find(lst[:], i), s_lst[i - 1])
 
 
+@unittest.skipIf(np is None, 'numpy is not installed')
+class NumpyTests(unittest.TestCase):
+
+    def test_find_numpy(self):
+        for _ in range(50):
+            arr = np.random.randint(0, 20, random.randrange(1, 2000))
+            s_arr = np.sort(arr)
+            for k in [1, len(arr), random.randint(1, len(arr))]:
+                self.assertEqual(find(arr, k), s_arr[k - 1])
+                self.assertEqual(find_numpy(arr, k), s_arr[k - 1])
+
+    def test_find_numpy_index(self):
+        with self.assertRaises(IndexError):
+            find_numpy(np.array([]), 1)
+        with self.assertRaises(IndexError):
+            find_numpy(np.array([1]), 2)
+
+    def test_find_numpy_nan(self):
+        arr = np.array([3.0, np.nan, 1.0, np.nan, 2.0])
+        s_arr = np.sort(arr)
+        for k in range(1, 4):
+            self.assertEqual(find_numpy(arr, k), s_arr[k - 1])
+        for k in range(4, 6):
+            self.assertTrue(np.isnan(find_numpy(arr, k)))
+        self.assertTrue(np.isnan(find_numpy(np.array([np.nan] * 3), 2)))
+
+
 if __name__ == '__main__':
     unittest.main()
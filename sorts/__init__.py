@@ -1,3 +1,12 @@
 """
 Алгоритмы сортировок.
 """
+
+
+def __getattr__(name):
+    # auto_sort импортирует все сортировки пакета, поэтому загружается только
+    # при первом обращении, а не при импорте любого модуля sorts
+    if name == 'auto_sort':
+        from sorts.autosort import auto_sort
+        return auto_sort
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,278 @@
+"""
+Автоматический выбор сортировки по свойствам входных данных. Перед
+сортировкой по случайной выборке оцениваются упорядоченность (количество
+серий и доля инверсий), доля повторов, а по всему массиву - тип элементов и
+диапазон ключей. По ним выбирается реализация из пакета sorts. Решение и
+причины выбора возвращаются вместе с результатом, чтобы их можно было
+записать в лог.
+"""
+
+import random
+from array import array
+from collections import namedtuple
+from typing import List
+
+from inversions import count_inversions_with_merge
+from sorts.buffers import assign
+from sorts.countsorts import countsort, radix_sort
+from sorts.insertionsort import insertion_sort
+from sorts.introsort import optimized_introsort
+from sorts.mergesort import merge_sort_adaptive
+from sorts.networks import MAX_NETWORK_SIZE, network_sort
+from sorts.quicksort import pdqsort
+from sorts.stringsorts import msd_radix_sort
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Сколько соседних пар и элементов проверяется в выборке
+AUTO_SAMPLE_SIZE = 128
+# Массивы не длиннее этой длины сортируются вставками
+AUTO_INSERTION_THRESHOLD = 32
+# Массив считается почти упорядоченным, если в нем не больше
+# n / AUTO_RUNS_DIVISOR серий
+AUTO_RUNS_DIVISOR = 32
+# Целые сортируются подсчетом, если диапазон ключей не больше
+# AUTO_COUNTSORT_RANGE_FACTOR * n
+AUTO_COUNTSORT_RANGE_FACTOR = 1
+# Доля повторов в выборке, начиная с которой нужно тройное разделение
+AUTO_DUPLICATES_RATIO = 0.5
+# Массивы строк короче этой длины сортируются сравнениями
+AUTO_STRING_RADIX_MIN_SIZE = 200000
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+# Форматы struct и коды array.array числовых элементов. Остальные ('u',
+# 'w', 'c', 's', 'e', с порядком байтов, составные) - элементы 'other'
+_INT_FORMATS = frozenset('bBhHiIlLqQnN?')
+_FLOAT_FORMATS = frozenset('fd')
+
+
+class InputStats(namedtuple('InputStats', [
+        'size', 'kind', 'runs', 'inversion_ratio', 'duplicate_ratio',
+        'key_range'])):
+    """
+    Оценка свойств массива.
+
+    size - длина массива
+    kind - тип элементов: 'int', 'float', 'str', 'bytes' или 'other'
+    runs - оценка количества монотонных серий по выборке соседних троек
+    inversion_ratio - доля инверсий среди пар выборки: 0 для упорядоченного,
+        1 для упорядоченного по убыванию, около 0.5 для случайного массива
+    duplicate_ratio - доля повторяющихся элементов в выборке (None для
+        нехешируемых элементов)
+    key_range - max - min + 1 для целых, иначе None
+    """
+
+
+class Decision(namedtuple('Decision', ['algorithm', 'reasons', 'stats'])):
+    """
+    Выбранная сортировка: ее имя, причины выбора и оценка свойств массива.
+    """
+
+    def __str__(self):
+        return f"{self.algorithm}: {'; '.join(self.reasons)}"
+
+
+def profile_input(lst) -> InputStats:
+    """
+    Оценивает свойства массива. Упорядоченность и повторы оцениваются по
+    выборке из AUTO_SAMPLE_SIZE элементов и троек соседних элементов
+    за O(s*log s). Тип элементов и диапазон ключей определяются по всему
+    массиву, но это быстрые встроенные проходы без сравнений в Python.
+    """
+    n = len(lst)
+    kind = _element_kind(lst)
+    if n < 2:
+        return InputStats(n, kind, 1, 0.0, 0.0, None)
+    rng = random.Random(n)
+    s = min(AUTO_SAMPLE_SIZE, n)
+
+    # Граница серий - это смена направления между соседними парами
+    changes = 0
+    starts = rng.sample(range(n - 2), min(s, n - 2)) if n > 2 else []
+    for i in starts:
+        first = _direction(lst[i], lst[i + 1])
+        second = _direction(lst[i + 1], lst[i + 2])
+        if first and second and first != second:
+            changes += 1
+    runs = 1 + round(changes / len(starts) * (n - 2)) if starts else 1
+
+    sample = [lst[i] for i in sorted(rng.sample(range(n), s))]
+    pairs = len(sample) * (len(sample) - 1) // 2
+    inversion_ratio = count_inversions_with_merge(sample) / pairs
+
+    try:
+        duplicate_ratio = 1 - len(set(sample)) / len(sample)
+    except TypeError:
+        duplicate_ratio = None
+
+    key_range = None
+    if kind == 'int':
+        key_range = int(max(lst)) - int(min(lst)) + 1
+    return InputStats(n, kind, runs, inversion_ratio, duplicate_ratio,
+                      key_range)
+
+
+def _direction(a, b) -> int:
+    return 1 if a < b else -1 if b < a else 0
+
+
+def _element_kind(lst) -> str:
+    if np is not None and isinstance(lst, np.ndarray):
+        return {'i': 'int', 'u': 'int', 'b': 'int',
+                'f': 'float'}.get(lst.dtype.kind, 'other')
+    if isinstance(lst, (array, memoryview)):
+        fmt = lst.typecode if isinstance(lst, array) else lst.format
+        # memoryview читает и записывает элементы только в собственном
+        # порядке байтов, который может быть указан явно
+        if fmt.startswith('@'):
+            fmt = fmt[1:]
+        if fmt in _FLOAT_FORMATS:
+            return 'float'
+        if fmt in _INT_FORMATS:
+            return 'int'
+        return 'other'
+    if isinstance(lst, (bytes, bytearray)):
+        return 'int'
+    types = set(map(type, lst))
+    if types <= {int, bool}:
+        return 'int'
+    for t, kind in [(float, 'float'), (str, 'str'), (bytes, 'bytes')]:
+        if types == {t}:
+            return kind
+    return 'other'
+
+
+def choose_sort(lst) -> Decision:
+    """
+    Выбирает сортировку для массива. Правила подобраны по бенчмарку
+    sorts.bench (см. __main__):
+        1. Короткие массивы сортируются сетью или вставками.
+        2. Числа, помещающиеся в 64 бита, при наличии NumPy сортируются
+           поразрядно - это быстрее любой сортировки сравнениями, даже на
+           упорядоченных данных.
+        3. Почти упорядоченные (в том числе по убыванию) массивы из немногих
+           серий сортируются адаптивным слиянием за время, близкое к O(n).
+        4. Целые из небольшого диапазона сортируются подсчетом.
+        5. Много строк сортируются поразрядно начиная со старшего разряда.
+        6. Массивы с большим количеством повторов сортируются introsort
+           с тройным разделением.
+        7. Остальные - pdqsort.
+    """
+    stats = profile_input(lst)
+    n = stats.size
+    if n <= MAX_NETWORK_SIZE:
+        return Decision('network_sort', [f'n={n} <= {MAX_NETWORK_SIZE}'],
+                        stats)
+    if n <= AUTO_INSERTION_THRESHOLD:
+        return Decision('insertion_sort',
+                        [f'n={n} <= {AUTO_INSERTION_THRESHOLD}'], stats)
+
+    reasons = [f'n={n}', f'{stats.kind} elements']
+    if np is not None and _fits_radix(lst, stats):
+        return Decision('radix_sort', reasons + ['NumPy is available'], stats)
+
+    if stats.runs <= n // AUTO_RUNS_DIVISOR:
+        reasons.append(f'~{stats.runs} runs <= n/{AUTO_RUNS_DIVISOR}, '
+                       f'inversion ratio {stats.inversion_ratio:.2f}')
+        return Decision('merge_sort_adaptive', reasons, stats)
+    reasons.append(f'~{stats.runs} runs, '
+                   f'inversion ratio {stats.inversion_ratio:.2f}')
+
+    if stats.key_range is not None and \
+            stats.key_range <= AUTO_COUNTSORT_RANGE_FACTOR * n:
+        reasons.append(f'key range {stats.key_range} <= '
+                       f'{AUTO_COUNTSORT_RANGE_FACTOR}*n')
+        return Decision('countsort', reasons, stats)
+
+    if stats.kind in ('str', 'bytes') and n >= AUTO_STRING_RADIX_MIN_SIZE:
+        return Decision('msd_radix_sort', reasons, stats)
+
+    if stats.duplicate_ratio is not None and \
+            stats.duplicate_ratio >= AUTO_DUPLICATES_RATIO:
+        reasons.append(f'duplicate ratio {stats.duplicate_ratio:.2f}')
+        return Decision('optimized_introsort', reasons, stats)
+    return Decision('pdqsort', reasons, stats)
+
+
+def _fits_radix(lst, stats: InputStats) -> bool:
+    if stats.kind == 'float':
+        return True
+    if stats.kind != 'int':
+        return False
+    if not isinstance(lst, list):
+        return True
+    return _INT64_MIN <= min(lst) and max(lst) <= _INT64_MAX
+
+
+def _countsort(lst):
+    lo = min(lst)
+    return countsort(lst, max(lst) - lo + 1, func=lambda x: x - lo)
+
+
+SORTS = {
+    'network_sort': network_sort,
+    'insertion_sort': insertion_sort,
+    'radix_sort': radix_sort,
+    'merge_sort_adaptive': merge_sort_adaptive,
+    'countsort': _countsort,
+    'msd_radix_sort': msd_radix_sort,
+    'optimized_introsort': optimized_introsort,
+    'pdqsort': pdqsort,
+}
+
+
+def auto_sort(lst, explain: bool = False):
+    """
+    Сортирует массив на месте сортировкой, выбранной choose_sort. Если
+    выбранная сортировка возвращает новый массив, то он записывается на место
+    исходного. Поддерживаются списки и буферы, как и у сортировок на месте.
+
+    :param lst: список или изменяемый буфер
+    :param explain: вернуть вместе с массивом решение (Decision)
+    :return: отсортированный массив или пара массив, решение
+    """
+    decision = choose_sort(lst)
+    res = SORTS[decision.algorithm](lst)
+    if res is not None and res is not lst:
+        assign(lst, res)
+    return (lst, decision) if explain else lst
+
+
+def _workloads(n: int, rng: random.Random) -> List:
+    """ Смешанная нагрузка: распределения бенчмарка, числа и строки. """
+    from sorts.bench import DISTRIBUTIONS
+
+    data = [(name, gen(n, rng)) for name, gen in DISTRIBUTIONS.items()]
+    data.append(('floats', [rng.random() for _ in range(n)]))
+    data.append(('wide_ints', [rng.randrange(2 ** 40) for _ in range(n)]))
+    data.append(('urls', [f'https://example.com/{rng.randrange(100)}/'
+                          f'{rng.randrange(n)}' for _ in range(n)]))
+    data.append(('tuples', [(rng.randrange(10), rng.random())
+                            for _ in range(n)]))
+    return data
+
+
+if __name__ == '__main__':
+    import time
+
+    size = 10 ** 5
+    workloads = _workloads(size, random.Random(0))
+    candidates = [auto_sort, pdqsort, optimized_introsort,
+                  merge_sort_adaptive]
+    totals = dict.fromkeys([c.__name__ for c in candidates], 0.0)
+    for name, data in workloads:
+        print(f'{name}: {choose_sort(data)}')
+        for func in candidates:
+            copy = data[:]
+            start = time.perf_counter()
+            func(copy)
+            elapsed = time.perf_counter() - start
+            totals[func.__name__] += elapsed
+            print(f'    {func.__name__:>20}: {elapsed:.3f} s')
+    print('total:')
+    for name, total in totals.items():
+        print(f'    {name:>20}: {total:.3f} s')
@@ -0,0 +1,269 @@
+"""
+Бенчмарк сортировок на разных распределениях входных данных. Для каждой
+пары сортировка-распределение измеряет время работы, количество сравнений и
+пиковый объем выделенной памяти (через tracemalloc). Результаты сохраняются
+в JSON и могут сравниваться с сохраненным ранее эталоном.
+
+Запуск:
+    python -m sorts.bench --sizes 1000 100000 --output results.json
+    python -m sorts.bench --baseline results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from sorts.autosort import auto_sort
+from sorts.countsorts import countsort, radix_sort
+from sorts.heapsort import heapsort, heapsort_dary
+from sorts.introsort import introsort, optimized_introsort
+from sorts.mergesort import merge_sort_recursive, merge_sort_iterative, \
+    merge_sort_adaptive, merge_sort_in_place
+from sorts.quicksort import quick_sort_3_way_partition, pdqsort
+
+
+class Algorithm(namedtuple('Algorithm', ['func', 'count_comparisons',
+                                         'max_size'])):
+    """
+    Сортировка в бенчмарке. Сравнения подсчитываются обертками над
+    элементами, поэтому для сортировок, не основанных на сравнениях,
+    count_comparisons выключен. На массивах длиннее max_size сортировка не
+    запускается (например, из-за квадратичного худшего случая).
+    """
+
+
+ALGORITHMS = {
+    'introsort': Algorithm(introsort, True, None),
+    'optimized_introsort': Algorithm(optimized_introsort, True, None),
+    'quick_sort_3_way_partition': Algorithm(quick_sort_3_way_partition, True,
+                                            None),
+    'pdqsort': Algorithm(pdqsort, True, None),
+    'heapsort': Algorithm(heapsort, True, None),
+    'heapsort_dary': Algorithm(heapsort_dary, True, None),
+    'merge_sort_recursive': Algorithm(merge_sort_recursive, True, None),
+    'merge_sort_iterative': Algorithm(merge_sort_iterative, True, 10 ** 5),
+    'merge_sort_adaptive': Algorithm(merge_sort_adaptive, True, None),
+    'merge_sort_in_place': Algorithm(merge_sort_in_place, True, None),
+    'countsort': Algorithm(lambda lst: countsort(lst, max(lst, default=0) + 1),
+                           False, None),
+    'radix_sort': Algorithm(radix_sort, False, None),
+    'auto_sort': Algorithm(auto_sort, True, None),
+}
+
+
+def _random(n, rng):
+    return [rng.randrange(n) for _ in range(n)]
+
+
+def _sorted(n, rng):
+    return list(range(n))
+
+
+def _reversed(n, rng):
+    return list(range(n - 1, -1, -1))
+
+
+def _organ_pipe(n, rng):
+    return list(range(n // 2)) + list(range(n - n // 2 - 1, -1, -1))
+
+
+def _few_unique(n, rng):
+    return [rng.randrange(8) for _ in range(n)]
+
+
+def _sawtooth(n, rng):
+    tooth = max(1, n // 16)
+    return [i % tooth for i in range(n)]
+
+
+def _nearly_sorted(n, rng):
+    lst = list(range(n))
+    for _ in range(n // 100):
+        i, j = rng.randrange(n), rng.randrange(n)
+        lst[i], lst[j] = lst[j], lst[i]
+    return lst
+
+
+DISTRIBUTIONS = {
+    'random': _random,
+    'sorted': _sorted,
+    'reversed': _reversed,
+    'organ_pipe': _organ_pipe,
+    'few_unique': _few_unique,
+    'sawtooth': _sawtooth,
+    'nearly_sorted': _nearly_sorted,
+}
+
+# Метрики результата, которые сравниваются с эталоном
+METRICS = ['time', 'comparisons', 'peak_memory']
+# Время меньше этого значения слишком шумное для поиска регрессий
+MIN_REGRESSION_TIME = 1e-3
+
+
+class _Counted:
+    """
+    Обертка над элементом, подсчитывающая все сравнения элементов.
+    """
+
+    __slots__ = ['value']
+    comparisons = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        _Counted.comparisons += 1
+        return self.value < other.value
+
+    def __le__(self, other):
+        _Counted.comparisons += 1
+        return self.value <= other.value
+
+    def __gt__(self, other):
+        _Counted.comparisons += 1
+        return self.value > other.value
+
+    def __ge__(self, other):
+        _Counted.comparisons += 1
+        return self.value >= other.value
+
+    def __eq__(self, other):
+        _Counted.comparisons += 1
+        return self.value == other.value
+
+    __hash__ = None
+
+
+def measure(algorithm: Algorithm, data: List, repeat: int = 3) -> Dict:
+    """
+    Измеряет время работы (минимум из repeat запусков), количество сравнений
+    и пиковый объем памяти, выделенной сортировкой. Каждый запуск получает
+    свою копию данных.
+    """
+    func = algorithm.func
+    times = []
+    for _ in range(repeat):
+        lst = data[:]
+        start = time.perf_counter()
+        func(lst)
+        times.append(time.perf_counter() - start)
+
+    comparisons = None
+    if algorithm.count_comparisons:
+        lst = [_Counted(el) for el in data]
+        _Counted.comparisons = 0
+        func(lst)
+        comparisons = _Counted.comparisons
+
+    lst = data[:]
+    tracemalloc.start()
+    try:
+        func(lst)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'time': min(times), 'comparisons': comparisons,
+            'peak_memory': peak_memory}
+
+
+def run_benchmark(sizes: List[int], algorithms: Optional[List[str]] = None,
+                  distributions: Optional[List[str]] = None, repeat: int = 3,
+                  seed: int = 0, verbose: bool = False) -> List[Dict]:
+    """
+    Запускает все выбранные сортировки на всех выбранных распределениях
+    и размерах. Данные генерируются детерминированно из seed.
+    """
+    algorithms = algorithms or list(ALGORITHMS)
+    distributions = distributions or list(DISTRIBUTIONS)
+    results = []
+    for size in sizes:
+        for dist in distributions:
+            data = DISTRIBUTIONS[dist](size, random.Random(seed))
+            for name in algorithms:
+                algorithm = ALGORITHMS[name]
+                if algorithm.max_size is not None and \
+                        size > algorithm.max_size:
+                    continue
+                res = {'algorithm': name, 'distribution': dist, 'size': size}
+                res.update(measure(algorithm, data, repeat))
+                results.append(res)
+                if verbose:
+                    print(_format_result(res), flush=True)
+    return results
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict],
+                     tolerance: float = 0.25) -> List[str]:
+    """
+    Сравнивает результаты с эталоном. Регрессией считается превышение
+    эталонного значения метрики больше чем в (1 + tolerance) раз. Слишком
+    короткие замеры времени не сравниваются. Возвращает описания найденных
+    регрессий.
+    """
+    base = {(r['algorithm'], r['distribution'], r['size']): r
+            for r in baseline}
+    regressions = []
+    for res in results:
+        old = base.get((res['algorithm'], res['distribution'], res['size']))
+        if old is None:
+            continue
+        for metric in METRICS:
+            if res.get(metric) is None or not old.get(metric):
+                continue
+            if metric == 'time' and old[metric] < MIN_REGRESSION_TIME:
+                continue
+            if res[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{res['algorithm']} on {res['distribution']} "
+                    f"n={res['size']}: {metric} {old[metric]} -> "
+                    f"{res[metric]} (+{res[metric] / old[metric] - 1:.0%})")
+    return regressions
+
+
+def _format_result(res: Dict) -> str:
+    comparisons = '-' if res['comparisons'] is None else res['comparisons']
+    return (f"{res['algorithm']:>26} {res['distribution']:>14} "
+            f"{res['size']:>9} {res['time']:>10.4f} s {comparisons:>12} cmp "
+            f"{res['peak_memory'] / 2 ** 10:>10.1f} KiB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m sorts.bench',
+                                     description='Sorting benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10 ** 3, 10 ** 4, 10 ** 5])
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS))
+    parser.add_argument('--distributions', nargs='+',
+                        choices=list(DISTRIBUTIONS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare with this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, args.algorithms, args.distributions,
+                            args.repeat, args.seed, verbose=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'results': results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for line in regressions:
+            print('REGRESSION:', line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
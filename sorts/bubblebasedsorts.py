@@ -5,10 +5,13 @@
 
 from typing import List
 
+from sorts.keys import key_and_reverse
 
+
+@key_and_reverse
 def bubble_sort(lst: List):
     """
-    Пузырьковая сортировка.
+    Пузырьковая сортировка. Устойчивая.
     """
     for i in range(len(lst) - 1):
         changed = False
@@ -21,9 +24,10 @@ def bubble_sort(lst: List):
     return lst
 
 
+@key_and_reverse
 def shaker_sort(lst: List):
     """
-    Шейкерная сортировка.
+    Шейкерная сортировка. Устойчивая.
     """
     left = 0
     right = len(lst) - 1
@@ -39,9 +43,10 @@ def shaker_sort(lst: List):
     return lst
 
 
+@key_and_reverse
 def even_odd_sort(lst: List):
     """
-    Четно-нечетная сортировка.
+    Четно-нечетная сортировка. Устойчивая.
     """
     changed = True
     while changed:
@@ -57,6 +62,7 @@ def even_odd_sort(lst: List):
     return lst
 
 
+@key_and_reverse
 def comb_sort(lst: List):
     """
     Сортировка расческой. Первоначально осуществляет сортировку, сравнивая два
@@ -0,0 +1,46 @@
+"""
+Операции над изменяемыми последовательностями, которые по-разному
+реализованы для списков и объектов с протоколом буфера (array.array,
+bytearray, memoryview, numpy.ndarray). Сортировки на месте работают
+с элементами по индексам и срезами, поэтому поддерживают любую такую
+последовательность без преобразования в список. Различия есть в двух местах:
+    1. Срез numpy.ndarray и memoryview - это представление тех же данных,
+       а не копия.
+    2. Срезу array.array и memoryview можно присвоить только объект того же
+       типа, а не произвольную последовательность.
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def copy_range(lst, a, b):
+    """
+    Возвращает копию элементов с индексами от a до b (не включительно) того
+    же типа, что и lst. Срез копии можно присваивать срезу lst.
+    """
+    part = lst[a:b]
+    if isinstance(part, memoryview):
+        return memoryview(bytearray(part)).cast(part.format)
+    if np is not None and isinstance(part, np.ndarray):
+        return part.copy()
+    return part
+
+
+def assign(lst, values, a: int = 0):
+    """
+    Записывает на место элементов lst, начиная с индекса a, элементы списка
+    values. Длина lst не меняется.
+    """
+    b = a + len(values)
+    if isinstance(lst, array):
+        lst[a:b] = array(lst.typecode, values)
+    elif isinstance(lst, memoryview):
+        for i, el in enumerate(values, a):
+            lst[i] = el
+    else:
+        lst[a:b] = values
@@ -4,25 +4,39 @@
 
 import random
 import unittest
-from typing import List
+from array import array
+from typing import List, Optional, Sequence
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_SIGN_BIT = 1 << 63
+_UINT64_MASK = (1 << 64) - 1
+# Соседние поля склеиваются в один составной ключ, пока произведение их
+# диапазонов не превышает этого значения
+MULTIKEY_FUSE_LIMIT = 1 << 16
 
 
 def countsort(lst: List, m: int, func=lambda x: x):
     """
     Стабильная сортировка подсчетом не на месте. Сортирует массив, состоящий
     из чисел в диапазоне [0, m). Принимает функцию, которая позволяет определить
-    ключ элемента.
+    ключ элемента. Ключ каждого элемента вычисляется один раз.
     """
-    c = [0 for _ in range(m)]
-    for el in lst:
-        c[func(el)] += 1
+    keys = [func(el) for el in lst]
+    c = [0] * m
+    for k in keys:
+        c[k] += 1
     for i in range(1, len(c)):
         c[i] += c[i - 1]
-    res = [None for _ in range(len(lst))]
+    res = [None] * len(lst)
     for i in range(len(lst) - 1, -1, -1):
-        el = lst[i]
-        res[c[func(el)] - 1] = el
-        c[func(el)] -= 1
+        k = keys[i]
+        c[k] -= 1
+        res[c[k]] = lst[i]
     return res
 
 
@@ -36,15 +50,297 @@ def digitsort(lst: List, d: int):
     :return: отсортированный массив
     """
 
-    def get_digit(x, n):
-        """ Возвращает n-ную цифру в числе x. """
-        return (x % (10 ** n)) // (10 ** (n - 1))
-
-    for i in range(d):
-        lst = countsort(lst, 10, func=lambda x: get_digit(x, i + 1))
+    div = 1
+    for _ in range(d):
+        lst = countsort(lst, 10, func=lambda x: x // div % 10)
+        div *= 10
     return lst
 
 
+def radix_sort(lst, base: int = None, argsort: bool = False):
+    """Поразрядная сортировка по большому основанию
+
+    Стабильная LSD-сортировка 64-битных ключей не на месте. Поддерживает
+    знаковые целые числа из диапазона [-2^63, 2^63) и числа с плавающей точкой.
+    Элементы переводятся в беззнаковые 64-битные ключи, порядок которых
+    совпадает с порядком исходных чисел: у целых инвертируется знаковый бит,
+    у отрицательных чисел IEEE 754 инвертируются все биты, у положительных -
+    только знаковый. Отрицательные NaN оказываются в начале, положительные -
+    в конце. Проходы по разрядам, в которых у всех ключей одинаковые биты,
+    пропускаются. Сложность О(n*64/log2(base)).
+
+    Если установлен NumPy, то проходы векторизованы, иначе ключи и перестановка
+    хранятся в компактных array.array.
+
+    :param lst: список, array.array или numpy.ndarray чисел
+    :param base: основание сортировки - 256 или 65536. Дефолтно 65536 при
+        наличии NumPy и 256 без него
+    :param argsort: вернуть вместо отсортированных элементов перестановку
+        индексов, упорядочивающую исходный массив
+    :return: отсортированный массив того же типа, что и исходный, или
+        перестановка индексов (numpy.ndarray или array('q'))
+    """
+    if base is None:
+        base = 65536 if np is not None else 256
+    if base not in (256, 65536):
+        raise ValueError('Radix sort base must be 256 or 65536')
+    bits = base.bit_length() - 1
+
+    if np is not None:
+        perm = _radix_argsort_numpy(_numpy_keys(lst), bits)
+        if argsort:
+            return perm
+        if isinstance(lst, np.ndarray):
+            return lst[perm]
+        perm = perm.tolist()
+    else:
+        perm = _radix_argsort_python(_python_keys(lst), bits)
+        if argsort:
+            return perm
+    if isinstance(lst, array):
+        return array(lst.typecode, [lst[i] for i in perm])
+    return [lst[i] for i in perm]
+
+
+def _numpy_keys(lst):
+    """
+    Переводит элементы в массив беззнаковых 64-битных ключей numpy.
+    """
+    arr = np.asarray(lst)
+    if arr.dtype.kind == 'f':
+        keys = arr.astype(np.float64).view(np.uint64)
+        negative = (keys >> np.uint64(63)).astype(bool)
+        return np.where(negative, ~keys, keys | np.uint64(_SIGN_BIT))
+    if arr.dtype.kind in 'ub':
+        return arr.astype(np.uint64)
+    if arr.dtype.kind == 'i':
+        return arr.astype(np.int64).view(np.uint64) ^ np.uint64(_SIGN_BIT)
+    raise TypeError(f'Radix sort does not support {arr.dtype} elements')
+
+
+def _radix_argsort_numpy(keys, bits: int):
+    """
+    Возвращает стабильную перестановку, упорядочивающую ключи. Каждый проход
+    - это устойчивая сортировка 8 или 16-битных разрядов, которую NumPy
+    выполняет подсчетом.
+    """
+    if len(keys) < 2:
+        return np.arange(len(keys))
+    digit_type = np.uint8 if bits == 8 else np.uint16
+    varying = int(np.bitwise_or.reduce(keys ^ keys[0]))
+    perm = None
+    for shift in range(0, 64, bits):
+        if not (varying >> shift) & ((1 << bits) - 1):
+            continue
+        if perm is None:
+            digits = (keys >> np.uint64(shift)).astype(digit_type)
+            perm = np.argsort(digits, kind='stable')
+        else:
+            digits = (keys[perm] >> np.uint64(shift)).astype(digit_type)
+            perm = perm[np.argsort(digits, kind='stable')]
+    return np.arange(len(keys)) if perm is None else perm
+
+
+def _python_keys(lst):
+    """
+    Переводит элементы в array('Q') беззнаковых 64-битных ключей.
+    """
+    if isinstance(lst, array):
+        is_float = lst.typecode in 'fd'
+    else:
+        is_float = any(isinstance(el, float) for el in lst)
+    if is_float:
+        keys = array('Q')
+        keys.frombytes(array('d', lst).tobytes())
+        for i, k in enumerate(keys):
+            keys[i] = k ^ _UINT64_MASK if k & _SIGN_BIT else k | _SIGN_BIT
+        return keys
+    if isinstance(lst, array) and lst.typecode.isupper():
+        return array('Q', lst)
+    return array('Q', [el + _SIGN_BIT for el in array('q', lst)])
+
+
+def _radix_argsort_python(keys, bits: int):
+    """
+    Возвращает стабильную перестановку, упорядочивающую ключи. Перестановка и
+    буфер для нее выделяются один раз и меняются ролями на каждом проходе.
+    """
+    n = len(keys)
+    perm = array('q', range(n))
+    if n < 2:
+        return perm
+    buf = array('q', perm)
+    mask = (1 << bits) - 1
+    first, varying = keys[0], 0
+    for k in keys:
+        varying |= k ^ first
+    counts = [0] * (mask + 1)
+    for shift in range(0, 64, bits):
+        if not (varying >> shift) & mask:
+            continue
+        digits = [(keys[i] >> shift) & mask for i in perm]
+        for d in range(mask + 1):
+            counts[d] = 0
+        for d in digits:
+            counts[d] += 1
+        total = 0
+        for d in range(mask + 1):
+            counts[d], total = total, total + counts[d]
+        for i, d in zip(perm, digits):
+            buf[counts[d]] = i
+            counts[d] += 1
+        perm, buf = buf, perm
+    return perm
+
+
+def multikey_argsort(columns: Sequence[Sequence],
+                     sizes: Optional[Sequence[Optional[int]]] = None):
+    """Лексикографическая поразрядная сортировка по нескольким полям
+
+    Возвращает стабильную перестановку индексов, упорядочивающую записи
+    лексикографически: сначала по первому полю, при равенстве - по второму и
+    т.д. Данные передаются по столбцам, поэтому кортежи записей не создаются,
+    а столбцы затем переупорядочиваются по перестановке (col[i] for i in perm).
+
+    Поле - это целые числа из небольшого диапазона [0, m) или категориальные
+    значения. Для категориального поля размер не указывается, значения
+    кодируются номерами в отсортированном множестве различных значений.
+
+    Это LSD-сортировка: стабильная сортировка подсчетом по полям от последнего
+    к первому. Соседние поля, произведение диапазонов которых не превышает
+    MULTIKEY_FUSE_LIMIT, склеиваются в один составной ключ и сортируются за
+    один проход. Поля, в которых у всех записей одно значение, пропускаются.
+    Сложность O(p*(n+m)), где p - количество проходов, m - наибольший диапазон
+    составного ключа.
+
+    Если установлен NumPy, то составной ключ сортируется стабильной
+    сортировкой NumPy (для малых целых - подсчетом), иначе перестановка,
+    буфер и счетчики хранятся в компактных array.array.
+
+    :param columns: столбцы одинаковой длины
+    :param sizes: диапазоны полей m. Дефолтно или для None вычисляется: max + 1
+        для неотрицательных целых, иначе поле считается категориальным
+    :return: перестановка индексов (numpy.ndarray или array('q'))
+    """
+    if sizes is None:
+        sizes = [None] * len(columns)
+    if len(sizes) != len(columns):
+        raise ValueError('Number of sizes must match number of columns')
+    n = len(columns[0]) if columns else 0
+    if any(len(col) != n for col in columns):
+        raise ValueError('All columns must have the same length')
+
+    fields = [_encode_field(col, m) for col, m in zip(columns, sizes)]
+    # Одинаковые у всех записей поля не влияют на порядок
+    fields = [(col, m) for col, m in fields if m > 1]
+    if np is not None:
+        return _multikey_argsort_numpy(fields, n)
+    return _multikey_argsort_python(fields, n)
+
+
+def multikey_radix_sort(records: Sequence[Sequence],
+                        sizes: Optional[Sequence[Optional[int]]] = None):
+    """
+    Стабильно сортирует записи (кортежи полей) лексикографически с помощью
+    multikey_argsort. Сортировка не на месте.
+
+    :param records: записи с одинаковым количеством полей
+    :param sizes: диапазоны полей, как в multikey_argsort
+    :return: отсортированный список записей
+    """
+    if not records:
+        return []
+    perm = multikey_argsort(list(zip(*records)), sizes)
+    return [records[i] for i in perm.tolist()]
+
+
+def _encode_field(col, m: Optional[int]):
+    """
+    Возвращает столбец целых чисел из [0, m) и m.
+    """
+    if m is not None:
+        return col, m
+    if np is not None and isinstance(col, np.ndarray) and \
+            col.dtype.kind in 'iub':
+        if not len(col):
+            return col, 0
+        if col.dtype.kind != 'i' or col.min() >= 0:
+            return col, int(col.max()) + 1
+    elif all(type(el) is int and el >= 0 for el in col):
+        return col, max(col, default=-1) + 1
+    values = sorted(set(col.tolist() if np is not None and
+                        isinstance(col, np.ndarray) else col))
+    codes = {el: i for i, el in enumerate(values)}
+    return [codes[el] for el in col], len(values)
+
+
+def _fuse_fields(fields):
+    """
+    Разбивает поля на группы идущих подряд полей, произведение диапазонов
+    которых не превышает MULTIKEY_FUSE_LIMIT. Возвращает для каждой группы
+    список полей и размер составного ключа.
+    """
+    groups = []
+    for col, m in fields:
+        if groups and groups[-1][1] * m <= MULTIKEY_FUSE_LIMIT:
+            groups[-1][0].append((col, m))
+            groups[-1][1] *= m
+        else:
+            groups.append([[(col, m)], m])
+    return groups
+
+
+def _multikey_argsort_numpy(fields, n: int):
+    """
+    Составной ключ всех полей помещается в int64, если произведение
+    диапазонов меньше 2^63. Тогда достаточно одной стабильной сортировки,
+    иначе поля сортируются np.lexsort.
+    """
+    if not fields:
+        return np.arange(n)
+    total = 1
+    for _, m in fields:
+        total *= m
+    cols = [np.asarray(col, dtype=np.int64) for col, _ in fields]
+    if total >= _SIGN_BIT:
+        return np.lexsort(cols[::-1])
+    key = cols[0]
+    for col, (_, m) in zip(cols[1:], fields[1:]):
+        key = key * m + col
+    if total <= 1 << 16:
+        key = key.astype(np.uint16 if total > 256 else np.uint8)
+    return np.argsort(key, kind='stable')
+
+
+def _multikey_argsort_python(fields, n: int):
+    """
+    Проходы подсчетом по группам склеенных полей от последней к первой.
+    Перестановка и буфер выделяются один раз и меняются ролями на каждом
+    проходе.
+    """
+    perm = array('q', range(n))
+    if n < 2 or not fields:
+        return perm
+    buf = array('q', perm)
+    for group, m in reversed(_fuse_fields(fields)):
+        col, _ = group[0]
+        keys = list(col)
+        for col, size in group[1:]:
+            keys = [k * size + el for k, el in zip(keys, col)]
+        counts = array('q', bytes(8 * m))
+        for k in keys:
+            counts[k] += 1
+        total = 0
+        for k in range(m):
+            counts[k], total = total, total + counts[k]
+        for i in perm:
+            k = keys[i]
+            buf[counts[k]] = i
+            counts[k] += 1
+        perm, buf = buf, perm
+    return perm
+
+
 class CountSortTest(unittest.TestCase):
 
     def test_empty(self):
@@ -84,5 +380,140 @@ class DigitSortTest(unittest.TestCase):
             self.assertEqual(digitsort(lst, m), sorted(lst))
 
 
+class RadixSortTest(unittest.TestCase):
+
+    def verify(self, lst, **kwargs):
+        self.assertEqual(list(radix_sort(lst, **kwargs)), sorted(lst))
+
+    def verify_both_modes(self, lst):
+        for base in (256, 65536):
+            self.verify(lst, base=base)
+            with mock.patch('sorts.countsorts.np', None):
+                self.verify(lst, base=base)
+
+    def test_empty(self):
+        self.verify_both_modes([])
+
+    def test_wrong_base(self):
+        with self.assertRaises(ValueError):
+            radix_sort([1], base=10)
+
+    def test_signed_ints(self):
+        lst = [3, -1, 0, -2 ** 63, 2 ** 63 - 1, 255, -256, 65536, -65537]
+        self.verify_both_modes(lst)
+
+    def test_floats(self):
+        lst = [0.5, -0.5, 1e300, -1e300, float('inf'), float('-inf'), 0.0,
+               3, -2, 1e-310, -1e-310]
+        self.verify_both_modes(lst)
+
+    def test_array(self):
+        lst = array('d', [2.5, -1.0, 0.0, 7.25])
+        res = radix_sort(lst)
+        self.assertEqual(res, array('d', sorted(lst)))
+        lst = array('i', [2, -1, 0, 7])
+        with mock.patch('sorts.countsorts.np', None):
+            self.assertEqual(radix_sort(lst), array('i', sorted(lst)))
+
+    def test_argsort(self):
+        lst = [3, 1, 2, 1, -5]
+        for np_module in (np, None):
+            with mock.patch('sorts.countsorts.np', np_module):
+                self.assertEqual(list(radix_sort(lst, argsort=True)),
+                                 [4, 1, 3, 2, 0])
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        arr = np.array([5, -3, 0, 2 ** 40, -2 ** 40], dtype=np.int64)
+        self.assertTrue(np.array_equal(radix_sort(arr), np.sort(arr)))
+        arr = np.random.standard_normal(1000).astype(np.float32)
+        self.assertTrue(np.array_equal(radix_sort(arr), np.sort(arr)))
+        arr = np.random.randint(0, 2 ** 16, 1000).astype(np.uint64)
+        self.assertTrue(np.array_equal(radix_sort(arr), np.sort(arr)))
+
+    def test_dynamic(self):
+        for _ in range(50):
+            lst = [random.randint(-2 ** 63, 2 ** 63 - 1) for _ in
+                   range(random.randint(0, 100))]
+            self.verify_both_modes(lst)
+            lst = [random.uniform(-1e9, 1e9) for _ in
+                   range(random.randint(0, 100))]
+            self.verify_both_modes(lst)
+
+
+class MultikeyRadixSortTest(unittest.TestCase):
+
+    def verify(self, records, sizes=None):
+        expected = sorted(range(len(records)), key=lambda i: records[i])
+        columns = [list(col) for col in zip(*records)]
+        for np_module in (np, None):
+            with mock.patch('sorts.countsorts.np', np_module):
+                if records:
+                    self.assertEqual(
+                        list(multikey_argsort(columns, sizes)), expected)
+                self.assertEqual(multikey_radix_sort(records, sizes),
+                                 sorted(records))
+
+    def test_empty(self):
+        self.verify([])
+        self.assertEqual(list(multikey_argsort([[], []])), [])
+
+    def test_wrong_columns(self):
+        with self.assertRaises(ValueError):
+            multikey_argsort([[1, 2], [1]])
+        with self.assertRaises(ValueError):
+            multikey_argsort([[1, 2], [1, 2]], sizes=[3])
+
+    def test_stability(self):
+        # Третье поле не участвует в сортировке, по нему проверяется порядок
+        records = [(1, 'b', 0), (0, 'a', 1), (1, 'b', 2), (1, 'a', 3),
+                   (0, 'a', 4)]
+        columns = [[r[0] for r in records], [r[1] for r in records]]
+        for np_module in (np, None):
+            with mock.patch('sorts.countsorts.np', np_module):
+                self.assertEqual(list(multikey_argsort(columns)),
+                                 [1, 4, 3, 0, 2])
+
+    def test_categorical(self):
+        records = [(-1, 'x', 2.5), (3, 'a', -1.0), (-1, 'a', 0.0),
+                   (3, 'a', -1.0), (0, 'z', 2.5)]
+        self.verify(records)
+
+    def test_sizes_and_fusing(self):
+        for fuse_limit in (1, MULTIKEY_FUSE_LIMIT):
+            with mock.patch('sorts.countsorts.MULTIKEY_FUSE_LIMIT',
+                            fuse_limit):
+                records = [(random.randrange(7), random.randrange(3),
+                            random.randrange(300)) for _ in range(500)]
+                self.verify(records, sizes=[7, 3, 300])
+                self.verify(records)
+
+    def test_constant_field(self):
+        records = [(5, random.randrange(4)) for _ in range(50)]
+        self.verify(records)
+        self.verify([(5, 5)] * 10)
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_numpy(self):
+        day = np.random.randint(0, 365, 10000)
+        region = np.random.randint(-20, 20, 10000)
+        status = np.random.randint(0, 5, 10000).astype(np.uint8)
+        perm = multikey_argsort([day, region, status])
+        self.assertTrue(np.array_equal(
+            perm, np.lexsort([status, region, day])))
+        # Составной ключ не помещается в int64
+        big = [np.random.randint(0, 2 ** 40, 1000) for _ in range(2)]
+        self.assertTrue(np.array_equal(
+            multikey_argsort(big, sizes=[2 ** 40, 2 ** 40]),
+            np.lexsort(big[::-1])))
+
+    def test_dynamic(self):
+        for _ in range(30):
+            n = random.randint(1, 100)
+            records = [tuple(random.randrange(m) for m in (4, 10, 2))
+                       for _ in range(n)]
+            self.verify(records, sizes=[4, 10, 2])
+
+
 if __name__ == '__main__':
     unittest.main()
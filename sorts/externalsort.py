@@ -0,0 +1,185 @@
+"""
+Внешняя сортировка слиянием. Сортирует файлы, которые не помещаются
+в оперативную память. Входной файл читается частями, размер которых
+ограничен бюджетом памяти, каждая часть сортируется и записывается во
+временный файл (серию). Затем серии сливаются с помощью кучи. Если серий
+больше, чем можно одновременно открыть с буфером разумного размера, слияние
+выполняется в несколько проходов. Все операции с диском последовательные.
+"""
+
+import heapq
+import os
+import sys
+import tempfile
+from typing import Callable, Iterator, List, Optional
+
+from sorts.mergesort import merge_sort_adaptive
+
+DEFAULT_MEMORY_LIMIT = 64 * 2 ** 20
+# Минимальный размер буфера чтения одной серии при слиянии
+MIN_BUFFER_SIZE = 64 * 2 ** 10
+# Максимальное количество серий, сливаемых за один проход
+MAX_FAN_IN = 128
+# Сколько записей фиксированной длины читается за один вызов read
+_RECORDS_PER_READ = 4096
+
+
+def external_sort(input_path: str, output_path: str,
+                  record_size: Optional[int] = None,
+                  key: Optional[Callable] = None,
+                  memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                  tmp_dir: Optional[str] = None) -> None:
+    """Внешняя сортировка файла
+
+    Записи - это либо строки файла (bytes, включая завершающий перевод
+    строки), либо блоки фиксированной длины record_size байт. Сортировка
+    устойчивая: записи с равными ключами сохраняют порядок из входного файла.
+    Учет памяти приблизительный: учитывается размер объектов-записей, но не
+    вычисленных для них ключей.
+
+    :param input_path: путь к входному файлу
+    :param output_path: путь к выходному файлу. Может совпадать с входным
+    :param record_size: размер записи в байтах. Если не задан, то записями
+        являются строки, разделенные b'\\n'
+    :param key: функция, вычисляющая ключ записи (строки - вместе
+        с переводом строки). Дефолтно записи сравниваются побайтово, а строки
+        - без завершающего b'\n', как в sorted и утилите sort: иначе байты
+        меньше b'\n' (например, табуляция) шли бы после конца строки
+    :param memory_limit: бюджет памяти в байтах на сортировку одной серии
+        и на буферы чтения при слиянии
+    :param tmp_dir: каталог для временных файлов
+    """
+    if record_size is not None and record_size <= 0:
+        raise ValueError('Record size must be positive')
+    if record_size is None and key is None:
+        key = _line_content
+    fan_in = max(2, min(MAX_FAN_IN, memory_limit // MIN_BUFFER_SIZE))
+    buffer_size = max(memory_limit // (fan_in + 1), 1)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        runs = _write_runs(input_path, tmp, record_size, key, memory_limit)
+        counter = len(runs)
+        while len(runs) > fan_in:
+            merged = []
+            for i in range(0, len(runs), fan_in):
+                group = runs[i:i + fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                path = os.path.join(tmp, f'run{counter}')
+                counter += 1
+                _merge_runs(group, path, record_size, key, buffer_size)
+                for run in group:
+                    os.remove(run)
+                merged.append(path)
+            runs = merged
+        _merge_runs(runs, output_path, record_size, key, buffer_size)
+
+
+def _read_records(f, record_size: Optional[int]) -> Iterator[bytes]:
+    """
+    Читает записи из бинарного файла. У последней строки текстового файла
+    при необходимости дописывается перевод строки.
+    """
+    if record_size is None:
+        for line in f:
+            yield line if line.endswith(b'\n') else line + b'\n'
+        return
+    while True:
+        block = f.read(record_size * _RECORDS_PER_READ)
+        if not block:
+            return
+        if len(block) % record_size:
+            raise ValueError(f'File size is not a multiple of record size '
+                             f'{record_size}')
+        for i in range(0, len(block), record_size):
+            yield block[i:i + record_size]
+
+
+def _write_runs(input_path: str, tmp: str, record_size: Optional[int],
+                key: Optional[Callable], memory_limit: int) -> List[str]:
+    """
+    Разбивает входной файл на отсортированные серии, каждая из которых
+    занимает в памяти не более memory_limit байт. Возвращает пути к сериям.
+    """
+    runs, chunk, used = [], [], 0
+    with open(input_path, 'rb') as f:
+        for record in _read_records(f, record_size):
+            chunk.append(record)
+            used += sys.getsizeof(record) + 8
+            if used >= memory_limit:
+                runs.append(_write_run(chunk, tmp, len(runs), key))
+                chunk, used = [], 0
+    if chunk or not runs:
+        runs.append(_write_run(chunk, tmp, len(runs), key))
+    return runs
+
+
+def _write_run(chunk: List[bytes], tmp: str, number: int,
+               key: Optional[Callable]) -> str:
+    """ Сортирует часть записей и записывает ее в файл серии. """
+    merge_sort_adaptive(chunk, key=key)
+    path = os.path.join(tmp, f'run{number}')
+    with open(path, 'wb') as f:
+        f.writelines(chunk)
+    return path
+
+
+def _merge_runs(paths: List[str], output_path: str,
+                record_size: Optional[int], key: Optional[Callable],
+                buffer_size: int) -> None:
+    """
+    Сливает отсортированные серии в один файл с помощью кучи. Элемент кучи
+    содержит номер серии, поэтому при равных ключах первой выбирается более
+    ранняя серия - это сохраняет устойчивость.
+    """
+    files = [open(path, 'rb', buffering=buffer_size) for path in paths]
+    try:
+        readers = [_read_records(f, record_size) for f in files]
+        heap = []
+        for i, reader in enumerate(readers):
+            for record in reader:
+                heap.append(_heap_item(record, i, key))
+                break
+        heapq.heapify(heap)
+        with open(output_path, 'wb', buffering=buffer_size) as out:
+            while heap:
+                item = heap[0]
+                record, i = item[-1], item[-2]
+                out.write(record)
+                for record in readers[i]:
+                    heapq.heapreplace(heap, _heap_item(record, i, key))
+                    break
+                else:
+                    heapq.heappop(heap)
+    finally:
+        for f in files:
+            f.close()
+
+
+def _line_content(line: bytes) -> bytes:
+    return line[:-1]
+
+
+def _heap_item(record: bytes, run: int, key: Optional[Callable]):
+    if key is None:
+        return record, run, record
+    return key(record), run, record
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src = os.path.join(tmp_dir, 'input.txt')
+        with open(src, 'wb') as f:
+            for _ in range(10 ** 6):
+                f.write(b'%020d\n' % random.randrange(10 ** 20))
+        size = os.path.getsize(src)
+        for limit in [2 ** 20, 16 * 2 ** 20, 256 * 2 ** 20]:
+            start = time.perf_counter()
+            external_sort(src, os.path.join(tmp_dir, 'output.txt'),
+                          memory_limit=limit)
+            elapsed = time.perf_counter() - start
+            print(f'memory_limit={limit // 2 ** 20} MiB: {elapsed:.2f} s, '
+                  f'{size / elapsed / 2 ** 20:.1f} MiB/s')
@@ -3,33 +3,100 @@
 Сортирует на месте.
 """
 
-from structures.heap import Heap
+from sorts.keys import key_and_reverse
 
 
-class SortingHeap(Heap):
+@key_and_reverse
+def heapsort(lst):
     """
-    Макс-куча, позволяющая отсортировать внутренний массив, тем самым упорядочив
-    его по возрастанию.
+    Сортировка двоичной макс-кучей, построенной прямо в сортируемом массиве.
+    Элементы сравниваются напрямую, без функции приоритета. Извлечение
+    максимума использует просеивание снизу вверх (метод Флойда): дырка в корне
+    опускается до листа по большим потомкам (одно сравнение на уровень), а
+    затем последний элемент кучи поднимается от листа на свое место. Так как
+    он обычно оказывается близко к листьям, сравнений получается почти вдвое
+    меньше, чем при обычном просеивании. Сортировка неустойчивая.
     """
+    _heapsort(lst, 0, len(lst), 2)
 
-    def __init__(self, lst=None, prior_func=lambda x: -x):
-        self.size = len(lst) - 1
-        super().__init__(lst, prior_func)
 
-    def _has_left_child(self, index):
-        left_child_index = 2 * index + 1
-        return left_child_index <= self.size
+@key_and_reverse
+def heapsort_dary(lst, d=4):
+    """
+    Сортировка d-арной кучей. Куча получается в log2(d) раз ниже двоичной,
+    а потомки узла лежат в памяти рядом, поэтому при больших n обращения
+    к памяти локальнее. На каждом уровне выбирается максимум из d потомков.
+    Сортировка неустойчивая.
+    """
+    if d < 2:
+        raise ValueError('Heap arity must be at least 2')
+    _heapsort(lst, 0, len(lst), d)
 
-    def _has_right_child(self, index):
-        right_child_index = 2 * index + 2
-        return right_child_index <= self.size
 
-    def sort(self):
-        while self.size > 0:
-            self[0], self[self.size] = self[self.size], self[0]
-            self.size -= 1
-            self._shift_down(0)
+def heapsort_range(lst, l=0, r=None):
+    """
+    Сортирует кучей на месте часть списка с индексами от l до r включительно.
+    Не использует рекурсию и не выделяет память, что позволяет использовать
+    ее как запасной вариант в быстрых сортировках.
+    """
+    r = len(lst) - 1 if r is None else r
+    _heapsort(lst, l, r - l + 1, 2)
 
 
-def heapsort(lst):
-    SortingHeap(lst).sort()
+def _heapsort(lst, base, n, d):
+    """ Сортирует n элементов, начиная с индекса base, d-арной кучей. """
+    sift = sift_down if d == 2 else sift_down_dary
+    for i in range((n - 2) // d, -1, -1):
+        sift(lst, base, i, n, lst[base + i], d)
+    for end in range(n - 1, 0, -1):
+        el = lst[base + end]
+        lst[base + end] = lst[base]
+        sift(lst, base, 0, end, el, d)
+
+
+# noinspection PyUnusedLocal
+def sift_down(lst, base, i, n, el, d=2):
+    """
+    Помещает элемент el в дырку с индексом i двоичной макс-кучи из n
+    элементов, которая начинается в списке с индекса base. Дырка опускается
+    до листа по большим потомкам, затем el поднимается от листа, но не выше i.
+    Используется и для кучи ограниченного размера в sorts.selection.
+    """
+    start = i
+    child = 2 * i + 1
+    while child < n:
+        if child + 1 < n and lst[base + child] < lst[base + child + 1]:
+            child += 1
+        lst[base + i] = lst[base + child]
+        i = child
+        child = 2 * i + 1
+    while i > start:
+        parent = (i - 1) // 2
+        if not lst[base + parent] < el:
+            break
+        lst[base + i] = lst[base + parent]
+        i = parent
+    lst[base + i] = el
+
+
+def sift_down_dary(lst, base, i, n, el, d):
+    """
+    Аналогично sift_down, но для d-арной кучи.
+    """
+    start = i
+    child = d * i + 1
+    while child < n:
+        best, best_el = child, lst[base + child]
+        for c in range(base + child + 1, base + min(child + d, n)):
+            if best_el < lst[c]:
+                best, best_el = c - base, lst[c]
+        lst[base + i] = best_el
+        i = best
+        child = d * i + 1
+    while i > start:
+        parent = (i - 1) // d
+        if not lst[base + parent] < el:
+            break
+        lst[base + i] = lst[base + parent]
+        i = parent
+    lst[base + i] = el
@@ -4,14 +4,19 @@
 
 from typing import List
 
+from sorts.keys import key_and_reverse
 
-def insertion_sort(lst: List):
+
+@key_and_reverse
+def insertion_sort(lst: List, l: int = 0, r: int = None):
     """
-    Сортировка вставками.
+    Сортировка вставками. Можно отсортировать только часть списка с индексами
+    от l до r включительно. Устойчивая.
     """
-    for i in range(1, len(lst)):
+    r = len(lst) - 1 if r is None else r
+    for i in range(l + 1, r + 1):
         j = i
-        while j > 0:
+        while j > l:
             if lst[j] < lst[j - 1]:
                 lst[j], lst[j - 1] = lst[j - 1], lst[j]
                 j -= 1
@@ -20,13 +25,14 @@ def insertion_sort(lst: List):
     return lst
 
 
+@key_and_reverse
 def insertion_sort_with_buffer(lst: List):
     """
     Сортировка вставками с помощью буффера. Хотя буфер по-идее и не нужен,
-    почему то классический алгоритм именно с буффером.
+    почему то классический алгоритм именно с буффером. Устойчивая.
     """
     for i in range(1, len(lst)):
-        buf, lst[i] = lst[i], None
+        buf = lst[i]
         j = i - 1
         while j >= 0:
             if lst[j] > buf:
@@ -40,6 +46,7 @@ def insertion_sort_with_buffer(lst: List):
     return lst
 
 
+@key_and_reverse
 def pair_insertion_sort(lst: List):
     """
     Парная сортировка простыми вставками. Экономит на обработке меньшего
@@ -48,12 +55,12 @@ def pair_insertion_sort(lst: List):
     отсортированная область, задействованная для обработки большего элемента
     из пары. Сложность алгоритма так же О(n^2), но он быстрее обычной сортировки
     вставками. Обычно используется для сортировки малых массивов или небольших
-    участков крупных массивов.
+    участков крупных массивов. Устойчивая.
     """
     for i in range(0, len(lst), 2):
         if i == len(lst) - 1:
             # Обычная сортировка вставками для последнего нечетного элемента
-            buf, lst[i] = lst[i], None
+            buf = lst[i]
             j = i - 1
             while j >= 0:
                 if lst[j] > buf:
@@ -65,9 +72,10 @@ def pair_insertion_sort(lst: List):
             else:
                 lst[0] = buf
         else:
-            small, big = min(lst[i], lst[i + 1]), max(lst[i], lst[i + 1])
-            # Для дебага. Не влияет на сортировку
-            lst[i], lst[i + 1] = None, None
+            if lst[i + 1] < lst[i]:
+                small, big = lst[i + 1], lst[i]
+            else:
+                small, big = lst[i], lst[i + 1]
             j = i - 1
             # Проходим для большого элемента
             while j >= 0:
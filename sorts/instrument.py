@@ -0,0 +1,286 @@
+"""
+Инструментирование сортировок и других алгоритмов над массивами без
+изменения их кода. Подсчитываются сравнения элементов, обмены, чтения и
+записи элементов, вызовы функций алгоритма, максимальная глубина рекурсии и
+пиковый объем выделенной памяти.
+
+Массив оборачивается в CountingSequence, а его элементы - в объекты,
+подсчитывающие сравнения. Глубина рекурсии и память измеряются внутри
+контекстного менеджера instrument. Сами алгоритмы ничего не знают об
+инструментировании, поэтому вне instrument и без CountingSequence накладных
+расходов нет.
+
+Пример:
+    report = Report()
+    seq = CountingSequence(lst, report)
+    with instrument(report):
+        pdqsort(seq)
+    print(report)
+
+или короче:
+    result, report = profile(pdqsort, lst)
+"""
+
+import sys
+import tracemalloc
+from collections.abc import MutableSequence
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Модули, функции которых считаются функциями алгоритмов
+_ALGORITHM_MODULES = ('sorts.', 'ordinalstatistics')
+# Модули пакета, которые не являются алгоритмами
+_IGNORED_MODULES = ('sorts.instrument', 'sorts.sortstests', 'sorts.bench')
+
+
+class Report:
+    """
+    Отчет инструментирования. Значения накапливаются, пока отчет
+    используется последовательностями или контекстным менеджером.
+
+    comparisons - сравнения элементов (только для обернутых элементов)
+    swaps - обмены двух элементов последовательности местами
+    reads, writes - чтения и записи элементов последовательности
+    calls - вызовы функций алгоритмов из sorts и ordinalstatistics
+    max_depth - максимальная глубина рекурсии одной функции алгоритма
+    peak_memory - пиковый объем памяти в байтах, выделенной внутри instrument
+    """
+
+    FIELDS = ['comparisons', 'swaps', 'reads', 'writes', 'calls', 'max_depth',
+              'peak_memory']
+
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return 'Report(' + ', '.join(
+            f'{field}={value}' for field, value in self.as_dict().items()) + ')'
+
+    def __str__(self):
+        return '\n'.join(f'{field:>12}: {value}'
+                         for field, value in self.as_dict().items())
+
+
+class _Tracked:
+    """
+    Обертка над элементом, подсчитывающая сравнения в отчете.
+    """
+
+    __slots__ = ['value', 'report']
+
+    def __init__(self, value, report: Report):
+        self.value = value
+        self.report = report
+
+    def __lt__(self, other):
+        self.report.comparisons += 1
+        return self.value < _unwrap(other)
+
+    def __le__(self, other):
+        self.report.comparisons += 1
+        return self.value <= _unwrap(other)
+
+    def __gt__(self, other):
+        self.report.comparisons += 1
+        return self.value > _unwrap(other)
+
+    def __ge__(self, other):
+        self.report.comparisons += 1
+        return self.value >= _unwrap(other)
+
+    def __eq__(self, other):
+        self.report.comparisons += 1
+        return self.value == _unwrap(other)
+
+    def __ne__(self, other):
+        self.report.comparisons += 1
+        return self.value != _unwrap(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def _unwrap(el):
+    return el.value if isinstance(el, _Tracked) else el
+
+
+class CountingSequence(MutableSequence):
+    """
+    Последовательность, подсчитывающая чтения и записи элементов. Обмен
+    распознается как две записи подряд, меняющие местами два элемента.
+    Срезы возвращаются обычными списками, операции над ними не учитываются.
+    Алгоритм видит обернутые элементы, поэтому функция key сортировки
+    получает обертку, а исходное значение хранится в ее атрибуте value.
+
+    :param data: исходные элементы
+    :param report: отчет, в который записываются счетчики. Дефолтно создается
+        новый
+    :param wrap: оборачивать ли элементы для подсчета сравнений. Для
+        сортировок, не основанных на сравнениях (подсчетом, поразрядной),
+        элементы нужно оставить как есть
+    """
+
+    def __init__(self, data: Iterable = (), report: Optional[Report] = None,
+                 wrap: bool = True):
+        self.report = Report() if report is None else report
+        self.wrap = wrap
+        self._data = [self._wrap(el) for el in data]
+        # Последняя запись: индекс, старое и новое значения
+        self._last_write = None
+
+    def _wrap(self, el):
+        if self.wrap and not isinstance(el, _Tracked):
+            return _Tracked(el, self.report)
+        return el
+
+    def tolist(self) -> List:
+        """ Возвращает элементы без оберток, не учитывая чтения. """
+        return [_unwrap(el) for el in self._data]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, i):
+        res = self._data[i]
+        self.report.reads += len(res) if isinstance(i, slice) else 1
+        return res
+
+    def __setitem__(self, i, value):
+        if isinstance(i, slice):
+            value = [self._wrap(el) for el in value]
+            self._data[i] = value
+            self.report.writes += len(value)
+            self._last_write = None
+            return
+        value = self._wrap(value)
+        i = i + len(self._data) if i < 0 else i
+        old = self._data[i]
+        self._data[i] = value
+        self.report.writes += 1
+        last = self._last_write
+        if last is not None and last[0] != i and last[1] is value \
+                and last[2] is old:
+            self.report.swaps += 1
+            self._last_write = None
+        else:
+            self._last_write = (i, old, value)
+
+    def __delitem__(self, i):
+        del self._data[i]
+        self._last_write = None
+
+    def insert(self, i, value):
+        self._data.insert(i, self._wrap(value))
+        self.report.writes += 1
+        self._last_write = None
+
+    def __iter__(self):
+        for el in self._data:
+            self.report.reads += 1
+            yield el
+
+    def __repr__(self):
+        return f'CountingSequence({self.tolist()!r})'
+
+
+@contextmanager
+def instrument(report: Optional[Report] = None):
+    """
+    Контекстный менеджер, подсчитывающий вызовы функций алгоритмов, глубину
+    рекурсии и пиковый объем памяти. Возвращает отчет, который заполняется
+    по мере работы. Глубина рекурсии считается для каждой функции отдельно
+    (сколько ее вызовов одновременно находится в стеке), в отчет попадает
+    максимум. Память измеряется через tracemalloc, поэтому время работы
+    внутри контекста заметно больше обычного.
+    """
+    report = Report() if report is None else report
+    depths = {}
+    is_algorithm = {}
+
+    def hook(frame, event, arg):
+        if event != 'call' and event != 'return':
+            return
+        code = frame.f_code
+        algorithm = is_algorithm.get(code)
+        if algorithm is None:
+            algorithm = is_algorithm[code] = _is_algorithm(frame)
+        if not algorithm:
+            return
+        if event == 'call':
+            depth = depths.get(code, 0) + 1
+            depths[code] = depth
+            report.calls += 1
+            if depth > report.max_depth:
+                report.max_depth = depth
+        elif depths.get(code):
+            depths[code] -= 1
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    else:
+        tracemalloc.start()
+        start_memory = 0
+    old_hook = sys.getprofile()
+    sys.setprofile(hook)
+    try:
+        yield report
+    finally:
+        sys.setprofile(old_hook)
+        peak = tracemalloc.get_traced_memory()[1] - start_memory
+        report.peak_memory = max(report.peak_memory, peak)
+        if not tracing:
+            tracemalloc.stop()
+
+
+def _is_algorithm(frame) -> bool:
+    module = frame.f_globals.get('__name__', '')
+    return module.startswith(_ALGORITHM_MODULES) and \
+        not module.startswith(_IGNORED_MODULES)
+
+
+def profile(func, data: Iterable, *args, wrap: bool = True,
+            **kwargs) -> Tuple[object, Report]:
+    """
+    Запускает func на копии data, обернутой в CountingSequence, внутри
+    instrument. Возвращает результат без оберток и отчет. Если функция
+    сортирует на месте, то результатом является отсортированный список.
+
+    :param func: функция, первым аргументом принимающая последовательность
+    :param data: исходные данные, не изменяются
+    :param wrap: подсчитывать ли сравнения (см. CountingSequence)
+    """
+    report = Report()
+    seq = CountingSequence(data, report, wrap)
+    with instrument(report):
+        res = func(seq, *args, **kwargs)
+    if res is None or res is seq:
+        return seq.tolist(), report
+    if isinstance(res, (list, tuple)):
+        return type(res)(_unwrap(el) for el in res), report
+    return _unwrap(res), report
+
+
+if __name__ == '__main__':
+    import random
+
+    from ordinalstatistics import find
+    from sorts.heapsort import heapsort
+    from sorts.introsort import optimized_introsort
+    from sorts.mergesort import merge_sort_adaptive, merge_sort_recursive
+    from sorts.quicksort import pdqsort, quick_sort_random
+
+    data = [random.randrange(5000) for _ in range(5000)]
+    for f in [quick_sort_random, pdqsort, optimized_introsort, heapsort,
+              merge_sort_recursive, merge_sort_adaptive]:
+        print(f.__name__, profile(f, data)[1].as_dict())
+    print('find', profile(find, data, len(data) // 2)[1].as_dict())
@@ -1,19 +1,35 @@
 """
-Интроспективная сортировка. К омбинированный рекурсивный алгоритм быстрой
-сортировки с выбором разделителя по медиане и сортировки слиянием. Если
-глубина рекурсии превышает c*log n, то запускается сортировка слиянием. Таким
-образом сложность алгоритма в худшем случае O(n*log n).
+Интроспективная сортировка. К омбинированный алгоритм быстрой сортировки
+с выбором разделителя по медиане и запасной сортировки с гарантированной
+сложностью О(n*log n). Если глубина рекурсии превышает c*log n, то
+запускается запасная сортировка. Таким образом сложность алгоритма в худшем
+случае O(n*log n).
 """
 
 import math
 
-from sorts.mergesort import merge_sort_iterative
+from sorts.heapsort import heapsort_range
+from sorts.keys import key_and_reverse
+from sorts.networks import network_sort
 from sorts.partitions import partition, three_way_partition, median_sep_index
 
+# Множитель c в ограничении глубины c*log n
+INTROSORT_DEPTH_FACTOR = 2
+# Отрезки не длиннее этого значения сортируются вставками там, где сеть
+# неприменима (сортировка перестановки индексов по ключам, см.
+# sorts.permutations.introsort_argsort)
+INTROSORT_INSERTION_THRESHOLD = 16
+# Отрезки не длиннее этого значения сортируются сетью (см. sorts.networks),
+# более длинные разделяются дальше. Значение не больше MAX_NETWORK_SIZE,
+# 1 отключает сортировку сетью: отрезки разделяются до конца
+INTROSORT_NETWORK_THRESHOLD = 16
 
+
+@key_and_reverse
 def introsort(lst, l=0, r=None):
     """
-    Интроспективная сортировка.
+    Интроспективная сортировка. Запасная сортировка - сортировка кучей
+    на месте. Неустойчивая.
     """
     max_depth = 3 * math.log2(len(lst) + 1)
 
@@ -23,10 +39,8 @@ def introsort(lst, l=0, r=None):
             return False
 
         r = len(lst) - 1 if r is None else r
-        if len(lst) <= 1:
-            return True
-
-        if l >= r:
+        if r - l + 1 <= INTROSORT_NETWORK_THRESHOLD:
+            network_sort(lst, l, r)
             return True
 
         m = partition(lst, l, r, index_func=median_sep_index)
@@ -38,40 +52,47 @@ def introsort(lst, l=0, r=None):
         depth -= 1
         return res1 and res2
 
-    success = _quick_sort(lst, l, r)
-    if not success:
-        sorted_lst = merge_sort_iterative(lst)
-        lst.clear()
-        lst.extend(sorted_lst)
+    r = len(lst) - 1 if r is None else r
+    if not _quick_sort(lst, l, r):
+        heapsort_range(lst, l, r)
 
 
+@key_and_reverse
 def optimized_introsort(lst, l=0, r=None):
     """Улучшенная интроспективная сортировка
 
     Алгоритм интроспективной сортировки, включающий в себя ряд оптимизаций,
     а именно:
-        1. Весь алгоритм итеративный (без рекурсии)
+        1. Весь алгоритм итеративный (без рекурсии). Отрезки хранятся в стеке,
+           первой обрабатывается меньшая часть разделения, а большая
+           откладывается. Поэтому в стеке не бывает больше log n отрезков
         2. Алгоритм быстрой сортировки использует тройное разделение
+        3. Если глубина разделений превысила c*log n, то сортировкой кучей
+           на месте досортировывается только этот отрезок. Уже выполненная
+           работа не теряется, дополнительная память не выделяется
+        4. Отрезки не длиннее INTROSORT_NETWORK_THRESHOLD сортируются сетью.
+           По бенчмарку это быстрее, чем досортировывать вставками отрезки
+           длиннее сети
+    Сортировка неустойчивая.
     """
-    max_depth = 3 * math.log2(len(lst) + 1)
-    out_of_depth = False
-
     r = len(lst) - 1 if r is None else r
-    if len(lst) <= 1:
+    if r <= l:
         return
-    q = [(l, r, 1)]
-    while q:
-        l, r, depth = q.pop(0)
-        if depth > max_depth:
-            out_of_depth = True
-            break
-        if l >= r:
-            continue
-        k1, k2 = three_way_partition(lst, l, r, index_func=median_sep_index)
-        q.append((l, k1 - 1, depth + 1))
-        q.append((k2, r, depth + 1))
-
-    if out_of_depth:
-        sorted_lst = merge_sort_iterative(lst)
-        lst.clear()
-        lst.extend(sorted_lst)
+    max_depth = INTROSORT_DEPTH_FACTOR * math.log2(r - l + 1)
+    stack = [(l, r, 0)]
+    while stack:
+        l, r, depth = stack.pop()
+        while r - l + 1 > INTROSORT_NETWORK_THRESHOLD:
+            if depth > max_depth:
+                heapsort_range(lst, l, r)
+                break
+            k1, k2 = three_way_partition(lst, l, r, index_func=median_sep_index)
+            depth += 1
+            if k1 - l < r - k2 + 1:
+                stack.append((k2, r, depth))
+                r = k1 - 1
+            else:
+                stack.append((l, k1 - 1, depth))
+                l = k2
+        else:
+            network_sort(lst, l, r)
@@ -1,5 +1,7 @@
-from typing import List
+from typing import Any, Callable, MutableSequence, Optional
 
 
-def introsort(lst: List, l: int, r: int) -> None: ...
-def optimized_introsort(lst: List, l: int, r: int) -> None: ...
+def introsort(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
+def optimized_introsort(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
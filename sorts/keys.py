@@ -0,0 +1,71 @@
+"""
+Поддержка параметров key и reverse для сортировок по схеме
+"декорировать-отсортировать-раздекорировать". Ключ каждого элемента
+вычисляется один раз и хранится в паре (ключ, индекс) рядом с номером
+элемента, после чего сортируются пары, а элементы переставляются по
+получившемуся порядку индексов.
+"""
+
+import functools
+import inspect
+
+from sorts.buffers import assign
+
+
+def key_and_reverse(sort):
+    """Добавляет сортировке параметры key и reverse
+
+    Сортировка может работать на месте (возвращать None или сам список) или
+    возвращать новый список - результат возвращается так же, как это делает
+    исходная сортировка. Дополнительные позиционные параметры (например,
+    границы l и r отрезка) передаются как есть, отрезок сортируется
+    в декорированном списке на тех же позициях.
+
+    Индекс в паре делает все ключи различными, поэтому при переданном key или
+    reverse любая сортировка становится устойчивой: элементы с равными
+    ключами сохраняют исходный порядок, в том числе при reverse=True. Если
+    сортировка принимает границы l и r, то декорируется и записывается
+    обратно только отрезок lst[l..r]. Без key и reverse сортировка
+    вызывается напрямую, поэтому рекурсивные сортировки вызывают себя через
+    недекорированную функцию, а не через обертку.
+    """
+    signature = inspect.signature(sort)
+    params = signature.parameters
+    ranged = 'l' in params and 'r' in params
+
+    @functools.wraps(sort)
+    def wrapper(lst, *args, key=None, reverse=False, **kwargs):
+        if key is None and not reverse:
+            return sort(lst, *args, **kwargs)
+        if key is None:
+            key = _identity
+        l, r = 0, len(lst) - 1
+        if ranged:
+            bound = signature.bind(lst, *args, **kwargs)
+            bound.apply_defaults()
+            l, r = bound.arguments['l'], bound.arguments['r']
+            r = len(lst) - 1 if r is None else r
+        # При reverse индексы берутся со знаком минус: после сортировки по
+        # возрастанию и разворота равные элементы идут в исходном порядке
+        sign = -1 if reverse else 1
+        decorated = [(key(lst[i]), sign * i) for i in range(l, r + 1)]
+        if ranged:
+            bound.arguments[next(iter(params))] = decorated
+            bound.arguments['l'], bound.arguments['r'] = 0, len(decorated) - 1
+            res = sort(*bound.args, **bound.kwargs)
+        else:
+            res = sort(decorated, *args, **kwargs)
+        if res is None or res is decorated:
+            if reverse:
+                decorated.reverse()
+            assign(lst, [lst[sign * i] for _, i in decorated], l)
+            return None if res is None else lst
+        if reverse:
+            res.reverse()
+        return [lst[sign * i] for _, i in res]
+
+    return wrapper
+
+
+def _identity(x):
+    return x
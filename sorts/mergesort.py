@@ -4,41 +4,550 @@
 
 from typing import List
 
+from sorts.buffers import copy_range
+from sorts.insertionsort import insertion_sort
+from sorts.keys import key_and_reverse
+from sorts.networks import network_sort
 
+# Массивы короче этой длины сортируются бинарными вставками целиком
+MIN_MERGE = 32
+# Сколько раз подряд должен "выиграть" один из отрезков, чтобы слияние
+# перешло в режим галопа
+MIN_GALLOP = 7
+# Длина блоков, которые сортировка слиянием на месте сортирует вставками
+IN_PLACE_BLOCK_SIZE = 20
+# Массивы не длиннее этого значения рекурсивная сортировка слиянием сортирует
+# вставками, а итеративная начинает с отрезков такой длины, отсортированных
+# сетью (см. sorts.networks). 1 отключает обе оптимизации
+MERGE_SORT_SMALL_THRESHOLD = 16
+
+
+@key_and_reverse
 def merge_sort_recursive(lst: List):
     """
     Сортировка слиянием, реализованная с помощью рекурсии.
-    Требует O(n) дополнительной памяти (для слияния массивов).
+    Требует O(n) дополнительной памяти (для слияния массивов). Устойчивая,
+    возвращает новый список.
     """
-    if len(lst) <= 1:
-        return lst
+    return _merge_sort_recursive(lst)
+
+
+def _merge_sort_recursive(lst: List) -> List:
+    if len(lst) <= MERGE_SORT_SMALL_THRESHOLD:
+        # Сеть неустойчива, поэтому для коротких отрезков - вставки
+        res = list(lst)
+        insertion_sort(res)
+        return res
     m = len(lst) // 2
-    return _merge(merge_sort_recursive(lst[:m]), merge_sort_recursive(lst[m:]))
+    return _merge(_merge_sort_recursive(lst[:m]),
+                  _merge_sort_recursive(lst[m:]))
 
 
+@key_and_reverse
 def merge_sort_iterative(lst: List):
     """
     Сортировка слиянием, реализованная с помощью очереди.
-    Требует O(n) дополнительной памяти (для слияния массивов).
+    Требует O(n) дополнительной памяти (для слияния массивов). Неустойчивая:
+    слитый список уходит в конец очереди и может слиться со списком, который
+    в исходном массиве стоял левее. Возвращает новый список.
     """
     if not lst:
         return lst
-    lst = [[el] for el in lst]
+    size = max(MERGE_SORT_SMALL_THRESHOLD, 1)
+    lst = [list(lst[i:i + size]) for i in range(0, len(lst), size)]
+    for part in lst:
+        network_sort(part)
     while len(lst) > 1:
         lst.append(_merge(lst.pop(0), lst.pop(0)))
     return lst.pop(0)
 
 
+@key_and_reverse
+def merge_sort_adaptive(lst: List):
+    """Адаптивная сортировка слиянием (в стиле Timsort)
+
+    Находит в массиве естественные упорядоченные отрезки (серии). Строго
+    убывающие серии разворачиваются. Короткие серии дополняются до длины
+    minrun сортировкой бинарными вставками. Серии складываются в стек, для
+    которого поддерживаются инварианты баланса длин, а сливаются они
+    с помощью галопа. Сложность в худшем случае О(n*log n), на почти
+    упорядоченных данных приближается к О(n). Сортировка устойчивая, на месте,
+    требует не более n/2 дополнительной памяти для слияния.
+    """
+    n = len(lst)
+    if n < 2:
+        return lst
+    state = _MergeState(lst)
+    min_run = _min_run_length(n)
+    lo = 0
+    while lo < n:
+        run_len = _count_run(lst, lo, n)
+        if run_len < min_run:
+            force = min(min_run, n - lo)
+            _binary_insertion_sort(lst, lo, lo + force, lo + run_len)
+            run_len = force
+        state.runs.append((lo, run_len))
+        state.merge_collapse()
+        lo += run_len
+    state.merge_force_collapse()
+    return lst
+
+
+def _min_run_length(n: int) -> int:
+    """
+    Возвращает минимальную длину серии minrun. Она выбирается так, чтобы
+    n / minrun было равно степени двойки или чуть меньше ее - тогда слияния
+    получаются сбалансированными.
+    """
+    r = 0
+    while n >= MIN_MERGE:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+def _count_run(lst: List, lo: int, hi: int) -> int:
+    """
+    Возвращает длину серии, начинающейся с индекса lo. Строго убывающая серия
+    разворачивается на месте (строгость нужна для устойчивости).
+    """
+    run_hi = lo + 1
+    if run_hi == hi:
+        return 1
+    if lst[run_hi] < lst[lo]:
+        run_hi += 1
+        while run_hi < hi and lst[run_hi] < lst[run_hi - 1]:
+            run_hi += 1
+        i, j = lo, run_hi - 1
+        while i < j:
+            lst[i], lst[j] = lst[j], lst[i]
+            i += 1
+            j -= 1
+    else:
+        while run_hi < hi and not lst[run_hi] < lst[run_hi - 1]:
+            run_hi += 1
+    return run_hi - lo
+
+
+def _binary_insertion_sort(lst: List, lo: int, hi: int, start: int):
+    """
+    Сортирует отрезок [lo, hi) бинарными вставками. Предполагается, что
+    отрезок [lo, start) уже упорядочен. Место вставки ищется правее всех
+    равных элементов, поэтому сортировка устойчивая.
+    """
+    for i in range(max(start, lo + 1), hi):
+        pivot = lst[i]
+        left, right = lo, i
+        while left < right:
+            m = (left + right) // 2
+            if pivot < lst[m]:
+                right = m
+            else:
+                left = m + 1
+        if left < i:
+            lst[left + 1:i + 1] = lst[left:i]
+            lst[left] = pivot
+
+
+def _gallop_left(key, a: List, base: int, n: int, hint: int) -> int:
+    """
+    Ищет в упорядоченном отрезке a[base:base + n] такую позицию k, что
+    a[base + k - 1] < key <= a[base + k]. Поиск начинается с позиции hint
+    (0 <= hint < n) и идет экспоненциальными шагами, после чего точная
+    позиция уточняется бинарным поиском. Сложность О(log d), где d -
+    расстояние от hint до искомой позиции.
+    """
+    last_ofs, ofs = 0, 1
+    if a[base + hint] < key:
+        # a[base + hint + last_ofs] < key <= a[base + hint + ofs]
+        max_ofs = n - hint
+        while ofs < max_ofs and a[base + hint + ofs] < key:
+            last_ofs = ofs
+            ofs = (ofs << 1) + 1
+        ofs = min(ofs, max_ofs)
+        last_ofs, ofs = last_ofs + hint, ofs + hint
+    else:
+        # a[base + hint - ofs] < key <= a[base + hint - last_ofs]
+        max_ofs = hint + 1
+        while ofs < max_ofs and not a[base + hint - ofs] < key:
+            last_ofs = ofs
+            ofs = (ofs << 1) + 1
+        ofs = min(ofs, max_ofs)
+        last_ofs, ofs = hint - ofs, hint - last_ofs
+    last_ofs += 1
+    while last_ofs < ofs:
+        m = (last_ofs + ofs) // 2
+        if a[base + m] < key:
+            last_ofs = m + 1
+        else:
+            ofs = m
+    return ofs
+
+
+def _gallop_right(key, a: List, base: int, n: int, hint: int) -> int:
+    """
+    Аналогично _gallop_left, но ищет позицию k, такую что
+    a[base + k - 1] <= key < a[base + k], то есть правее всех элементов,
+    равных key.
+    """
+    last_ofs, ofs = 0, 1
+    if key < a[base + hint]:
+        # a[base + hint - ofs] <= key < a[base + hint - last_ofs]
+        max_ofs = hint + 1
+        while ofs < max_ofs and key < a[base + hint - ofs]:
+            last_ofs = ofs
+            ofs = (ofs << 1) + 1
+        ofs = min(ofs, max_ofs)
+        last_ofs, ofs = hint - ofs, hint - last_ofs
+    else:
+        # a[base + hint + last_ofs] <= key < a[base + hint + ofs]
+        max_ofs = n - hint
+        while ofs < max_ofs and not key < a[base + hint + ofs]:
+            last_ofs = ofs
+            ofs = (ofs << 1) + 1
+        ofs = min(ofs, max_ofs)
+        last_ofs, ofs = last_ofs + hint, ofs + hint
+    last_ofs += 1
+    while last_ofs < ofs:
+        m = (last_ofs + ofs) // 2
+        if key < a[base + m]:
+            ofs = m
+        else:
+            last_ofs = m + 1
+    return ofs
+
+
+class _MergeState:
+    """
+    Стек серий адаптивной сортировки слиянием. Каждая серия хранится как пара
+    (начало, длина). Для трех верхних серий A, B, C (C на вершине) стек
+    поддерживает инварианты |A| > |B| + |C| и |B| > |C|, благодаря чему длины
+    серий растут не медленнее чисел Фибоначчи, а глубина стека - О(log n).
+    """
+
+    def __init__(self, lst: List):
+        self.lst = lst
+        self.runs = []
+        self.min_gallop = MIN_GALLOP
+
+    def merge_collapse(self):
+        """
+        Сливает серии на вершине стека, пока не будут восстановлены
+        инварианты. Проверяются четыре верхние серии, а не три - иначе
+        инвариант может нарушиться глубже в стеке.
+        """
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if (n > 0 and runs[n - 1][1] <= runs[n][1] + runs[n + 1][1]) or \
+                    (n > 1 and runs[n - 2][1] <= runs[n - 1][1] + runs[n][1]):
+                if runs[n - 1][1] < runs[n + 1][1]:
+                    n -= 1
+            elif runs[n][1] > runs[n + 1][1]:
+                break
+            self._merge_at(n)
+
+    def merge_force_collapse(self):
+        """
+        Сливает все оставшиеся в стеке серии в одну.
+        """
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if n > 0 and runs[n - 1][1] < runs[n + 1][1]:
+                n -= 1
+            self._merge_at(n)
+
+    def _merge_at(self, i: int):
+        """
+        Сливает серии с номерами i и i + 1 в стеке. Элементы в начале первой
+        серии и в конце второй, которые уже стоят на своих местах, в слиянии
+        не участвуют.
+        """
+        lst, runs = self.lst, self.runs
+        base_a, len_a = runs[i]
+        base_b, len_b = runs[i + 1]
+        runs[i] = (base_a, len_a + len_b)
+        del runs[i + 1]
+
+        k = _gallop_right(lst[base_b], lst, base_a, len_a, 0)
+        base_a += k
+        len_a -= k
+        if len_a == 0:
+            return
+        len_b = _gallop_left(lst[base_a + len_a - 1], lst, base_b, len_b,
+                             len_b - 1)
+        if len_b == 0:
+            return
+        if len_a <= len_b:
+            self._merge_lo(base_a, len_a, base_b, len_b)
+        else:
+            self._merge_hi(base_a, len_a, base_b, len_b)
+
+    def _merge_lo(self, base_a: int, len_a: int, base_b: int, len_b: int):
+        """
+        Сливает соседние серии слева направо, копируя во временный буфер
+        более короткую первую серию. Пока одна из серий не начнет
+        систематически "выигрывать", элементы сравниваются попарно, затем
+        слияние переходит в режим галопа и копирует целые блоки.
+        """
+        lst = self.lst
+        tmp = copy_range(lst, base_a, base_a + len_a)
+        i, j, k = 0, base_b, base_a
+        end_b = base_b + len_b
+        min_gallop = self.min_gallop
+        while i < len_a and j < end_b:
+            count_a = count_b = 0
+            while (count_a | count_b) < min_gallop:
+                if lst[j] < tmp[i]:
+                    lst[k] = lst[j]
+                    k += 1
+                    j += 1
+                    count_a, count_b = 0, count_b + 1
+                    if j == end_b:
+                        break
+                else:
+                    lst[k] = tmp[i]
+                    k += 1
+                    i += 1
+                    count_a, count_b = count_a + 1, 0
+                    if i == len_a:
+                        break
+            else:
+                min_gallop += 1
+                while True:
+                    min_gallop -= min_gallop > 1
+                    count_a = _gallop_right(lst[j], tmp, i, len_a - i, 0)
+                    if count_a:
+                        lst[k:k + count_a] = tmp[i:i + count_a]
+                        k += count_a
+                        i += count_a
+                        if i == len_a:
+                            break
+                    lst[k] = lst[j]
+                    k += 1
+                    j += 1
+                    if j == end_b:
+                        break
+                    count_b = _gallop_left(tmp[i], lst, j, end_b - j, 0)
+                    if count_b:
+                        lst[k:k + count_b] = lst[j:j + count_b]
+                        k += count_b
+                        j += count_b
+                        if j == end_b:
+                            break
+                    lst[k] = tmp[i]
+                    k += 1
+                    i += 1
+                    if i == len_a:
+                        break
+                    if count_a < MIN_GALLOP and count_b < MIN_GALLOP:
+                        min_gallop += 1
+                        break
+        if i < len_a:
+            # Остаток второй серии уже на своем месте
+            lst[k:end_b] = tmp[i:]
+        self.min_gallop = min_gallop
+
+    def _merge_hi(self, base_a: int, len_a: int, base_b: int, len_b: int):
+        """
+        Аналогично _merge_lo, но копирует во временный буфер вторую серию
+        и сливает серии справа налево.
+        """
+        lst = self.lst
+        tmp = copy_range(lst, base_b, base_b + len_b)
+        i, j, k = base_a + len_a - 1, len_b - 1, base_b + len_b - 1
+        min_gallop = self.min_gallop
+        while i >= base_a and j >= 0:
+            count_a = count_b = 0
+            while (count_a | count_b) < min_gallop:
+                if tmp[j] < lst[i]:
+                    lst[k] = lst[i]
+                    k -= 1
+                    i -= 1
+                    count_a, count_b = count_a + 1, 0
+                    if i < base_a:
+                        break
+                else:
+                    lst[k] = tmp[j]
+                    k -= 1
+                    j -= 1
+                    count_a, count_b = 0, count_b + 1
+                    if j < 0:
+                        break
+            else:
+                min_gallop += 1
+                while True:
+                    min_gallop -= min_gallop > 1
+                    n_a = i - base_a + 1
+                    count_a = n_a - _gallop_right(tmp[j], lst, base_a, n_a,
+                                                  n_a - 1)
+                    if count_a:
+                        k -= count_a
+                        i -= count_a
+                        lst[k + 1:k + 1 + count_a] = lst[i + 1:i + 1 + count_a]
+                        if i < base_a:
+                            break
+                    lst[k] = tmp[j]
+                    k -= 1
+                    j -= 1
+                    if j < 0:
+                        break
+                    n_b = j + 1
+                    count_b = n_b - _gallop_left(lst[i], tmp, 0, n_b, n_b - 1)
+                    if count_b:
+                        k -= count_b
+                        j -= count_b
+                        lst[k + 1:k + 1 + count_b] = tmp[j + 1:j + 1 + count_b]
+                        if j < 0:
+                            break
+                    lst[k] = lst[i]
+                    k -= 1
+                    i -= 1
+                    if i < base_a:
+                        break
+                    if count_a < MIN_GALLOP and count_b < MIN_GALLOP:
+                        min_gallop += 1
+                        break
+        if j >= 0:
+            # Остаток первой серии уже на своем месте
+            lst[base_a:k + 1] = tmp[:j + 1]
+        self.min_gallop = min_gallop
+
+
+@key_and_reverse
+def merge_sort_in_place(lst: List):
+    """Устойчивая сортировка слиянием на месте
+
+    Массив делится на блоки по IN_PLACE_BLOCK_SIZE элементов, которые
+    сортируются вставками, после чего блоки попарно сливаются снизу вверх.
+    Слияние выполняется без буфера алгоритмом SymMerge: меньшая из двух
+    частей ищется бинарным поиском симметрично относительно середины, после
+    чего средний участок циклически сдвигается, и задача распадается на два
+    слияния меньшего размера. Требует O(1) дополнительной памяти (не считая
+    стека глубины О(log n)), делает О(n*log n) сравнений и О(n*log^2 n)
+    перемещений элементов. Сортировка устойчивая.
+    """
+    n = len(lst)
+    a = 0
+    while a < n:
+        insertion_sort(lst, a, min(a + IN_PLACE_BLOCK_SIZE, n) - 1)
+        a += IN_PLACE_BLOCK_SIZE
+    block = IN_PLACE_BLOCK_SIZE
+    while block < n:
+        a = 0
+        while a + block < n:
+            _sym_merge(lst, a, a + block, min(a + 2 * block, n))
+            a += 2 * block
+        block *= 2
+    return lst
+
+
+def _sym_merge(lst: List, a: int, m: int, b: int):
+    """
+    Сливает на месте упорядоченные отрезки [a, m) и [m, b).
+    """
+    if m - a == 1:
+        # Вставляем единственный элемент левой части перед первым
+        # не меньшим элементом правой
+        i, j = m, b
+        while i < j:
+            h = (i + j) // 2
+            if lst[h] < lst[a]:
+                i = h + 1
+            else:
+                j = h
+        for k in range(a, i - 1):
+            lst[k], lst[k + 1] = lst[k + 1], lst[k]
+        return
+    if b - m == 1:
+        # Вставляем единственный элемент правой части после последнего
+        # не большего элемента левой
+        i, j = a, m
+        while i < j:
+            h = (i + j) // 2
+            if not lst[m] < lst[h]:
+                i = h + 1
+            else:
+                j = h
+        for k in range(m, i, -1):
+            lst[k], lst[k - 1] = lst[k - 1], lst[k]
+        return
+
+    mid = (a + b) // 2
+    n = mid + m
+    if m > mid:
+        start, r = n - b, mid
+    else:
+        start, r = a, m
+    p = n - 1
+    while start < r:
+        c = (start + r) // 2
+        if not lst[p - c] < lst[c]:
+            start = c + 1
+        else:
+            r = c
+    end = n - start
+    if start < m < end:
+        _rotate(lst, start, m, end)
+    if a < start < mid:
+        _sym_merge(lst, a, start, mid)
+    if mid < end < b:
+        _sym_merge(lst, mid, end, b)
+
+
+def _rotate(lst: List, a: int, m: int, b: int):
+    """
+    Циклически сдвигает отрезок [a, b) так, что [m, b) оказывается перед
+    [a, m). Использует только обмены блоков одинаковой длины.
+    """
+    i, j = m - a, b - m
+    while i != j:
+        if i > j:
+            _swap_range(lst, m - i, m, j)
+            i -= j
+        else:
+            _swap_range(lst, m - i, m + j - i, i)
+            j -= i
+    _swap_range(lst, m - i, m, i)
+
+
+def _swap_range(lst: List, a: int, b: int, n: int):
+    """ Меняет местами отрезки [a, a + n) и [b, b + n). """
+    for i in range(n):
+        lst[a + i], lst[b + i] = lst[b + i], lst[a + i]
+
+
 def _merge(a: List, b: List):
     """ Сливает два упорядоченных списка в один. """
     i, j, res = 0, 0, []
     while i < len(a) and j < len(b):
-        if a[i] < b[j]:
-            res.append(a[i])
-            i += 1
-        else:
+        if b[j] < a[i]:
             res.append(b[j])
             j += 1
+        else:
+            res.append(a[i])
+            i += 1
     res.extend(a[i:])
     res.extend(b[j:])
     return res
+
+
+if __name__ == '__main__':
+    import random
+    import timeit
+
+    size = 20000
+    nearly_sorted = sorted(random.random() for _ in range(size))
+    for _ in range(size // 500):
+        nearly_sorted[random.randrange(size)] = random.random()
+    inputs = {
+        'random': [random.random() for _ in range(size)],
+        'nearly sorted': nearly_sorted,
+        'reversed': sorted(nearly_sorted, reverse=True),
+    }
+    for name, data in inputs.items():
+        for func in [merge_sort_recursive, merge_sort_iterative,
+                     merge_sort_adaptive, merge_sort_in_place]:
+            t = min(timeit.repeat(lambda: func(data[:]), number=1, repeat=3))
+            print(f'{name:>14} {func.__name__:>21}: {t:.4f} s')
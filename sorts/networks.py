@@ -0,0 +1,220 @@
+"""
+Сортирующие сети для коротких массивов (до MAX_NETWORK_SIZE элементов).
+Сеть - это фиксированная последовательность операций "сравнить и обменять"
+пары позиций, не зависящая от данных. Для каждого размера используется сеть
+с наименьшим известным количеством компараторов (для n <= 12 доказано, что
+меньше нельзя). Корректность сетей проверена по принципу нулей и единиц.
+
+Для каждого размера при импорте генерируется функция без циклов: элементы
+читаются в локальные переменные, над ними выполняются все обмены, и
+результат записывается обратно. Так на коротких отрезках нет накладных
+расходов на рекурсию и циклы. Сортировка сетью неустойчивая.
+
+Пакетный режим сортирует сразу много групп одного размера (строки матрицы
+N x n) операциями numpy.minimum и numpy.maximum над столбцами.
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_NETWORK_SIZE = 16
+# Сколько строк пакетный режим обрабатывает за раз. Столбцы блока должны
+# помещаться в кэш процессора
+BATCH_BLOCK_SIZE = 8192
+
+# Компараторы сетей по слоям. Компараторы одного слоя не пересекаются
+NETWORKS = {
+    0: [],
+    1: [],
+    2: [[(0, 1)]],
+    3: [[(0, 2)], [(0, 1)], [(1, 2)]],
+    4: [[(0, 2), (1, 3)], [(0, 1), (2, 3)], [(1, 2)]],
+    5: [[(0, 3), (1, 4)], [(0, 2), (1, 3)], [(0, 1), (2, 4)],
+        [(1, 2), (3, 4)], [(2, 3)]],
+    6: [[(0, 5), (1, 3), (2, 4)], [(1, 2), (3, 4)], [(0, 3), (2, 5)],
+        [(0, 1), (2, 3), (4, 5)], [(1, 2), (3, 4)]],
+    7: [[(0, 6), (2, 3), (4, 5)], [(0, 2), (1, 4), (3, 6)],
+        [(0, 1), (2, 5), (3, 4)], [(1, 2), (4, 6)], [(2, 3), (4, 5)],
+        [(1, 2), (3, 4), (5, 6)]],
+    8: [[(0, 2), (1, 3), (4, 6), (5, 7)], [(0, 4), (1, 5), (2, 6), (3, 7)],
+        [(0, 1), (2, 3), (4, 5), (6, 7)], [(2, 4), (3, 5)], [(1, 4), (3, 6)],
+        [(1, 2), (3, 4), (5, 6)]],
+    9: [[(0, 3), (1, 7), (2, 5), (4, 8)], [(0, 7), (2, 4), (3, 8), (5, 6)],
+        [(0, 2), (1, 3), (4, 5), (7, 8)], [(1, 4), (3, 6), (5, 7)],
+        [(0, 1), (2, 4), (3, 5), (6, 8)], [(2, 3), (4, 5), (6, 7)],
+        [(1, 2), (3, 4), (5, 6)]],
+    10: [[(0, 8), (1, 9), (2, 7), (3, 5), (4, 6)],
+         [(0, 2), (1, 4), (5, 8), (7, 9)], [(0, 3), (2, 4), (5, 7), (6, 9)],
+         [(0, 1), (3, 6), (8, 9)], [(1, 5), (2, 3), (4, 8), (6, 7)],
+         [(1, 2), (3, 5), (4, 6), (7, 8)], [(2, 3), (4, 5), (6, 7)],
+         [(3, 4), (5, 6)]],
+    11: [[(0, 9), (1, 6), (2, 4), (3, 7), (5, 8)],
+         [(0, 1), (3, 5), (4, 10), (6, 9), (7, 8)],
+         [(1, 3), (2, 5), (4, 7), (8, 10)],
+         [(0, 4), (1, 2), (3, 7), (5, 9), (6, 8)],
+         [(0, 1), (2, 6), (4, 5), (7, 8), (9, 10)],
+         [(2, 4), (3, 6), (5, 7), (8, 9)], [(1, 2), (3, 4), (5, 6), (7, 8)],
+         [(2, 3), (4, 5), (6, 7)]],
+    12: [[(0, 8), (1, 7), (2, 6), (3, 11), (4, 10), (5, 9)],
+         [(0, 1), (2, 5), (3, 4), (6, 9), (7, 8), (10, 11)],
+         [(0, 2), (1, 6), (5, 10), (9, 11)],
+         [(0, 3), (1, 2), (4, 6), (5, 7), (8, 11), (9, 10)],
+         [(1, 4), (3, 5), (6, 8), (7, 10)], [(1, 3), (2, 5), (6, 9), (8, 10)],
+         [(2, 3), (4, 5), (6, 7), (8, 9)], [(4, 6), (5, 7)],
+         [(3, 4), (5, 6), (7, 8)]],
+    13: [[(0, 12), (1, 10), (2, 9), (3, 7), (5, 11), (6, 8)],
+         [(1, 6), (2, 3), (4, 11), (7, 9), (8, 10)],
+         [(0, 4), (1, 2), (3, 6), (7, 8), (9, 10), (11, 12)],
+         [(4, 6), (5, 9), (8, 11), (10, 12)],
+         [(0, 5), (3, 8), (4, 7), (6, 11), (9, 10)],
+         [(0, 1), (2, 5), (6, 9), (7, 8), (10, 11)],
+         [(1, 3), (2, 4), (5, 6), (9, 10)], [(1, 2), (3, 4), (5, 7), (6, 8)],
+         [(2, 3), (4, 5), (6, 7), (8, 9)], [(3, 4), (5, 6)]],
+    14: [[(0, 13), (1, 12), (4, 8), (5, 6), (7, 11), (9, 10)],
+         [(0, 5), (1, 7), (2, 9), (3, 4), (6, 13), (11, 12)],
+         [(0, 1), (2, 3), (4, 5), (6, 8), (7, 9), (10, 11), (12, 13)],
+         [(0, 2), (1, 3), (4, 10), (5, 11), (6, 7), (8, 9)],
+         [(1, 2), (3, 12), (4, 6), (5, 7), (8, 10), (9, 11)],
+         [(1, 4), (2, 6), (5, 8), (7, 10), (9, 13)],
+         [(2, 4), (3, 6), (9, 12), (11, 13)],
+         [(3, 5), (6, 8), (7, 9), (10, 12)],
+         [(3, 4), (5, 6), (7, 8), (9, 10), (11, 12)], [(6, 7), (8, 9)]],
+    15: [[(0, 13), (1, 12), (3, 14), (4, 8), (5, 6), (7, 11), (9, 10)],
+         [(0, 5), (1, 7), (2, 9), (3, 4), (6, 13), (8, 14), (11, 12)],
+         [(0, 1), (2, 3), (4, 5), (6, 8), (7, 9), (10, 11), (12, 13)],
+         [(0, 2), (1, 3), (4, 10), (5, 11), (6, 7), (8, 9), (12, 14)],
+         [(1, 2), (3, 12), (4, 6), (5, 7), (8, 10), (9, 11), (13, 14)],
+         [(1, 4), (2, 6), (5, 8), (7, 10), (9, 13), (11, 14)],
+         [(2, 4), (3, 6), (9, 12), (11, 13)],
+         [(3, 5), (6, 8), (7, 9), (10, 12)],
+         [(3, 4), (5, 6), (7, 8), (9, 10), (11, 12)], [(6, 7), (8, 9)]],
+    16: [[(0, 13), (1, 12), (2, 15), (3, 14), (4, 8), (5, 6), (7, 11),
+          (9, 10)],
+         [(0, 5), (1, 7), (2, 9), (3, 4), (6, 13), (8, 14), (10, 15),
+          (11, 12)],
+         [(0, 1), (2, 3), (4, 5), (6, 8), (7, 9), (10, 11), (12, 13),
+          (14, 15)],
+         [(0, 2), (1, 3), (4, 10), (5, 11), (6, 7), (8, 9), (12, 14),
+          (13, 15)],
+         [(1, 2), (3, 12), (4, 6), (5, 7), (8, 10), (9, 11), (13, 14)],
+         [(1, 4), (2, 6), (5, 8), (7, 10), (9, 13), (11, 14)],
+         [(2, 4), (3, 6), (9, 12), (11, 13)],
+         [(3, 5), (6, 8), (7, 9), (10, 12)],
+         [(3, 4), (5, 6), (7, 8), (9, 10), (11, 12)], [(6, 7), (8, 9)]],
+}
+
+
+def comparators(n):
+    """ Возвращает список компараторов (i, j), i < j, сети для n элементов. """
+    return [c for layer in NETWORKS[n] for c in layer]
+
+
+def _generate(n, slice_write):
+    """
+    Генерирует функцию, сортирующую n элементов последовательности начиная
+    с индекса l. Результат записывается срезом (быстрее для списков) или по
+    одному элементу (для array.array и memoryview, срезу которых можно
+    присвоить только объект того же типа).
+    """
+    if n < 2:
+        return lambda lst, l: None
+    names = ', '.join(f'e{i}' for i in range(n))
+    lines = [f'def _sort{n}(lst, l):',
+             f'    {names} = lst[l:l + {n}]']
+    for i, j in comparators(n):
+        lines.append(f'    if e{j} < e{i}:')
+        lines.append(f'        e{i}, e{j} = e{j}, e{i}')
+    if slice_write:
+        lines.append(f'    lst[l:l + {n}] = {names}')
+    else:
+        lines.extend(f'    lst[l + {i}] = e{i}' for i in range(n))
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    return namespace[f'_sort{n}']
+
+
+_SORTERS = [_generate(n, True) for n in range(MAX_NETWORK_SIZE + 1)]
+_ITEM_SORTERS = [_generate(n, False) for n in range(MAX_NETWORK_SIZE + 1)]
+
+
+def network_sort(lst, l=0, r=None):
+    """
+    Сортирует сетью часть списка с индексами от l до r включительно. Длина
+    отрезка не должна превышать MAX_NETWORK_SIZE. Неустойчивая, на месте.
+    """
+    r = len(lst) - 1 if r is None else r
+    n = r - l + 1
+    if n > MAX_NETWORK_SIZE:
+        raise ValueError(f'Sorting networks are available only for ranges '
+                         f'of at most {MAX_NETWORK_SIZE} elements')
+    if n > 1:
+        if isinstance(lst, (array, memoryview)):
+            _ITEM_SORTERS[n](lst, l)
+        else:
+            _SORTERS[n](lst, l)
+
+
+def network_sort_batch(rows):
+    """Пакетная сортировка сетью
+
+    Сортирует на месте каждую строку матрицы N x n, где n <= MAX_NETWORK_SIZE.
+    Для numpy.ndarray каждый компаратор выполняется сразу для всех строк
+    операциями numpy.minimum и numpy.maximum над столбцами. Строки
+    обрабатываются блоками по BATCH_BLOCK_SIZE, так что число вызовов Python
+    в N / BATCH_BLOCK_SIZE раз меньше, чем при сортировке строк по одной.
+    Значения NaN не поддерживаются: minimum и maximum распространяют их.
+    Для других последовательностей (например, списка списков) каждая строка
+    сортируется отдельно.
+    """
+    if np is None or not isinstance(rows, np.ndarray):
+        for row in rows:
+            network_sort(row)
+        return
+    if rows.ndim != 2:
+        raise ValueError('Expected a two-dimensional array')
+    n = rows.shape[1]
+    if n > MAX_NETWORK_SIZE:
+        raise ValueError(f'Sorting networks are available only for rows '
+                         f'of at most {MAX_NETWORK_SIZE} elements')
+    if n < 2 or not rows.shape[0]:
+        return
+    comps = comparators(n)
+    for start in range(0, rows.shape[0], BATCH_BLOCK_SIZE):
+        block = rows[start:start + BATCH_BLOCK_SIZE]
+        # Столбцы копируются в непрерывные массивы, а обмен столбцов - это
+        # обмен ссылок в списке, поэтому каждый компаратор - два прохода по
+        # памяти, которая целиком помещается в кэш
+        columns = list(np.ascontiguousarray(block.T))
+        tmp = np.empty_like(columns[0])
+        for i, j in comps:
+            np.minimum(columns[i], columns[j], out=tmp)
+            np.maximum(columns[i], columns[j], out=columns[j])
+            columns[i], tmp = tmp, columns[i]
+        block[...] = np.array(columns).T
+
+
+if __name__ == '__main__':
+    import random
+    import timeit
+
+    from sorts.insertionsort import insertion_sort
+
+    for n in [4, 8, 16]:
+        data = [[random.random() for _ in range(n)] for _ in range(10 ** 4)]
+        for func in [insertion_sort, network_sort]:
+            t = min(timeit.repeat(
+                lambda: [func(row) for row in [row[:] for row in data]],
+                number=1, repeat=5))
+            print(f'n={n:>2} {func.__name__:>14}: {t:.4f} s')
+        if np is not None:
+            matrix = np.random.random((10 ** 6, n))
+            t = min(timeit.repeat(lambda: network_sort_batch(matrix.copy()),
+                                  number=1, repeat=3))
+            t_np = min(timeit.repeat(lambda: matrix.copy().sort(axis=1),
+                                     number=1, repeat=3))
+            print(f'n={n:>2} 10^6 rows: network_sort_batch {t:.4f} s, '
+                  f'numpy.sort {t_np:.4f} s')
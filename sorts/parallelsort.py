@@ -0,0 +1,246 @@
+"""
+Параллельная сортировка выборкой (sample sort). Массив делится между
+процессами, по случайной выборке выбираются разделители, после чего каждый
+процесс сортирует свою часть, а затем сливает один из сегментов между
+разделителями. Числовые буферы (array.array, numpy.ndarray) передаются
+процессам через общую память, а не сериализацией.
+"""
+
+import bisect
+import multiprocessing
+import os
+import random
+from array import array, typecodes
+from multiprocessing import shared_memory
+
+from sorts.buffers import assign
+from sorts.mergesort import merge_sort_adaptive
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Массивы меньше этой длины сортируются в текущем процессе
+MIN_PARALLEL_SIZE = 10000
+
+
+def parallel_sort(lst, workers=None, oversampling=32,
+                  sort_func=merge_sort_adaptive):
+    """Параллельная сортировка выборкой
+
+    1. Из массива берется случайная выборка размером workers * oversampling,
+       она сортируется, и каждый oversampling-й ее элемент становится
+       разделителем.
+    2. Массив делится на workers частей, каждая сортируется в своем процессе
+       и разрезается на сегменты по разделителям. Как и при тройном
+       разделении, элементы, равные разделителю, выделяются в отдельный
+       сегмент - его уже не нужно сортировать.
+    3. Одноименные сегменты всех частей сливаются в своих процессах
+       (сортировке достаются уже упорядоченные серии) и записываются друг
+       за другом.
+
+    Сортировка устойчивая, если устойчива sort_func. Список не изменяется -
+    возвращается новый отсортированный список. Буферы с числовым форматом
+    (array.array, numpy.ndarray, memoryview) сортируются на месте. Буферы,
+    формат которых нельзя представить в array.array (bool, float16,
+    неродной порядок байтов), сортируются как список и записываются обратно.
+
+    :param lst: список или одномерный непрерывный записываемый буфер
+    :param workers: количество процессов. Дефолтно - количество ядер
+    :param oversampling: во сколько раз выборка больше числа разделителей
+    :param sort_func: сортировка, применяемая к частям и сегментам
+    :return: отсортированный массив
+    """
+    workers = workers or os.cpu_count() or 1
+    if not isinstance(lst, list) and _typecode(lst) is None:
+        return _sort_converted(lst, workers, oversampling, sort_func)
+    if workers < 2 or len(lst) < MIN_PARALLEL_SIZE:
+        return _sort_sequential(lst, sort_func)
+    splitters = _choose_splitters(lst, workers, oversampling, sort_func)
+    if isinstance(lst, list):
+        return _parallel_sort_pickled(lst, workers, splitters, sort_func)
+    _parallel_sort_shared(lst, workers, splitters, sort_func)
+    return lst
+
+
+def _sorted(values, sort_func):
+    """ Сортирует список переданной сортировкой на месте или не на месте. """
+    res = sort_func(values)
+    return values if res is None else res
+
+
+def _sort_sequential(lst, sort_func):
+    if isinstance(lst, list):
+        return _sorted(lst[:], sort_func)
+    view = memoryview(lst)
+    view[:] = array(view.format, _sorted(view.tolist(), sort_func))
+    return lst
+
+
+def _typecode(lst):
+    """
+    Код array.array элементов буфера или None, если такого кода нет.
+    """
+    fmt = memoryview(lst).format
+    if fmt.startswith('@'):
+        fmt = fmt[1:]
+    return fmt if len(fmt) == 1 and fmt in typecodes else None
+
+
+def _sort_converted(lst, workers, oversampling, sort_func):
+    """
+    Сортирует буфер, элементы которого нельзя передать через array.array:
+    его элементы сортируются списком и записываются на место. Без NumPy
+    элементы читаются через memoryview.
+    """
+    target = np.asarray(lst) if np is not None else memoryview(lst)
+    values = parallel_sort(target.tolist(), workers, oversampling, sort_func)
+    assign(target, values)
+    return lst
+
+
+def _choose_splitters(lst, workers, oversampling, sort_func):
+    """
+    Выбирает не более workers - 1 различных разделителей по случайной
+    выборке из массива.
+    """
+    n = len(lst)
+    sample = [lst[random.randrange(n)] for _ in range(workers * oversampling)]
+    sample = _sorted(sample, sort_func)
+    splitters = []
+    for el in sample[oversampling::oversampling]:
+        if not splitters or splitters[-1] < el:
+            splitters.append(el)
+    return splitters
+
+
+def _cut_points(chunk, splitters):
+    """
+    Возвращает границы сегментов упорядоченной части массива: для каждого
+    разделителя - сегмент меньших элементов и сегмент равных ему.
+    """
+    cuts = [0]
+    for s in splitters:
+        cuts.append(bisect.bisect_left(chunk, s, cuts[-1]))
+        cuts.append(bisect.bisect_right(chunk, s, cuts[-1]))
+    cuts.append(len(chunk))
+    return cuts
+
+
+def _is_equal_bucket(bucket):
+    """ Сегменты с нечетными номерами содержат элементы, равные разделителю. """
+    return bucket % 2 == 1
+
+
+def _parallel_sort_pickled(lst, workers, splitters, sort_func):
+    """
+    Сортировка списка произвольных объектов. Части и сегменты передаются
+    процессам сериализацией.
+    """
+    n = len(lst)
+    bounds = [i * n // workers for i in range(workers + 1)]
+    with multiprocessing.Pool(workers) as pool:
+        pieces = pool.starmap(_sort_chunk_pickled, [
+            (lst[bounds[i]:bounds[i + 1]], splitters, sort_func)
+            for i in range(workers)])
+        buckets = []
+        for b in range(2 * len(splitters) + 1):
+            bucket = []
+            for chunk_pieces in pieces:
+                bucket.extend(chunk_pieces[b])
+            buckets.append(bucket)
+        tasks = [(bucket, sort_func) for b, bucket in enumerate(buckets)
+                 if not _is_equal_bucket(b) and bucket]
+        sorted_buckets = iter(pool.starmap(_sorted, tasks))
+    res = []
+    for b, bucket in enumerate(buckets):
+        if not _is_equal_bucket(b) and bucket:
+            bucket = next(sorted_buckets)
+        res.extend(bucket)
+    return res
+
+
+def _sort_chunk_pickled(chunk, splitters, sort_func):
+    chunk = _sorted(chunk, sort_func)
+    cuts = _cut_points(chunk, splitters)
+    return [chunk[cuts[b]:cuts[b + 1]] for b in range(len(cuts) - 1)]
+
+
+def _parallel_sort_shared(lst, workers, splitters, sort_func):
+    """
+    Сортировка числового буфера. Исходные данные и результат лежат в общей
+    памяти, процессам передаются только ее имена и границы отрезков.
+    """
+    view = memoryview(lst)
+    fmt, n = view.format, len(view)
+    nbytes = view.nbytes
+    src = shared_memory.SharedMemory(create=True, size=nbytes)
+    dst = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        src.buf[:nbytes] = view.cast('B')
+        bounds = [i * n // workers for i in range(workers + 1)]
+        with multiprocessing.Pool(workers) as pool:
+            cuts = pool.starmap(_sort_chunk_shared, [
+                (src.name, fmt, n, bounds[i], bounds[i + 1], splitters,
+                 sort_func) for i in range(workers)])
+            tasks, offset = [], 0
+            for b in range(2 * len(splitters) + 1):
+                pieces = [(bounds[i] + cuts[i][b], bounds[i] + cuts[i][b + 1])
+                          for i in range(workers)]
+                tasks.append((src.name, dst.name, fmt, n, pieces, offset,
+                              not _is_equal_bucket(b), sort_func))
+                offset += sum(hi - lo for lo, hi in pieces)
+            pool.starmap(_merge_bucket_shared, tasks)
+        view.cast('B')[:] = dst.buf[:nbytes]
+    finally:
+        for shm in (src, dst):
+            shm.close()
+            shm.unlink()
+
+
+def _attach(name, fmt, n):
+    """ Подключается к общей памяти и возвращает ее типизированное окно. """
+    shm = shared_memory.SharedMemory(name=name)
+    itemsize = array(fmt).itemsize
+    return shm, shm.buf[:n * itemsize].cast(fmt)
+
+
+def _sort_chunk_shared(name, fmt, n, lo, hi, splitters, sort_func):
+    shm, data = _attach(name, fmt, n)
+    try:
+        chunk = _sorted(data[lo:hi].tolist(), sort_func)
+        data[lo:hi] = array(fmt, chunk)
+        return _cut_points(chunk, splitters)
+    finally:
+        data.release()
+        shm.close()
+
+
+def _merge_bucket_shared(src_name, dst_name, fmt, n, pieces, offset,
+                         need_sort, sort_func):
+    src, src_data = _attach(src_name, fmt, n)
+    dst, dst_data = _attach(dst_name, fmt, n)
+    try:
+        values = []
+        for lo, hi in pieces:
+            values.extend(src_data[lo:hi].tolist())
+        if need_sort and values:
+            values = _sorted(values, sort_func)
+        dst_data[offset:offset + len(values)] = array(fmt, values)
+    finally:
+        src_data.release()
+        dst_data.release()
+        src.close()
+        dst.close()
+
+
+if __name__ == '__main__':
+    import time
+
+    data = array('d', (random.random() for _ in range(10 ** 6)))
+    for w in [1, 2, 4, os.cpu_count()]:
+        copy = array('d', data)
+        start = time.perf_counter()
+        parallel_sort(copy, workers=w)
+        print(f'workers={w}: {time.perf_counter() - start:.3f} s')
@@ -2,11 +2,22 @@
 Вспомогательный класс, реализующий логику разбиения массива на части так,
 что все элементы левее разделителя меньше, чем справа от него. Также содержит
 стратегии выбора такого разделителя из массива. Используется в быстрой и
-интроспективной сортировках.
+интроспективной сортировках. Работает с любой изменяемой последовательностью,
+в том числе с array.array, bytearray, memoryview и numpy.ndarray. Длинные
+отрезки numpy.ndarray тройное разделение обрабатывает векторно.
 """
 
 import random
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Отрезки numpy.ndarray не короче этой длины тройное разделение выполняет
+# векторно
+NUMPY_PARTITION_THRESHOLD = 64
+
 
 # noinspection PyUnusedLocal
 def random_sep_index(lst, l, r):
@@ -20,9 +31,17 @@ def median_sep_index(lst, l, r):
     """
     Возвращает индекс (в промежутке от l до r включительно) разделителя в
     списке, являющимся средним элементом при сравнении первого, последнего и
-    срединного элемента.
+    срединного элемента. Из равных элементов меньшим считается стоящий левее.
     """
-    return sorted([(lst[i], i) for i in [l, (l + r) // 2, r]])[1][1]
+    m = (l + r) // 2
+    a, b, c = lst[l], lst[m], lst[r]
+    if not b < a:
+        if not c < b:
+            return m
+        return r if not c < a else l
+    if not c < a:
+        return l
+    return r if not c < b else m
 
 
 def partition(lst, l, r, index_func=random_sep_index):
@@ -70,7 +89,13 @@ def three_way_partition(lst, l, r, index_func=random_sep_index):
     index_func
         Функция первоначального поиска разделителя. Дефолтно выбирается
         случайный элемент
+
+    Для отрезков numpy.ndarray длиной не меньше NUMPY_PARTITION_THRESHOLD
+    используется three_way_partition_numpy.
     """
+    if np is not None and isinstance(lst, np.ndarray) and \
+            r - l + 1 >= NUMPY_PARTITION_THRESHOLD:
+        return three_way_partition_numpy(lst, l, r, index_func)
     pos = index_func(lst, l, r)
     lst[l], lst[pos] = lst[pos], lst[l]
     k1, k2 = None, l + 1
@@ -92,3 +117,24 @@ def three_way_partition(lst, l, r, index_func=random_sep_index):
         k1 = k2 - 1
     lst[k1], lst[l] = lst[l], lst[k1]
     return k1, k2
+
+
+def three_way_partition_numpy(arr, l, r, index_func=random_sep_index):
+    """
+    Векторное тройное разделение отрезка одномерного numpy.ndarray.
+    Результат такой же, как у three_way_partition. Вместо поэлементных
+    обменов строятся булевы маски блоков "меньше", "равно" и "больше"
+    разделителя, и отрезок перезаписывается их конкатенацией. Требует O(n)
+    дополнительной памяти, каждый элемент читается и записывается
+    несколько раз, но все проходы выполняются внутри numpy. Значения NaN не
+    поддерживаются.
+    """
+    seg = arr[l:r + 1]
+    pivot = arr[index_func(arr, l, r)]
+    less = seg < pivot
+    equal = seg == pivot
+    greater = seg > pivot
+    k1 = l + int(np.count_nonzero(less))
+    k2 = k1 + int(np.count_nonzero(equal))
+    seg[:] = np.concatenate((seg[less], seg[equal], seg[greater]))
+    return k1, k2
@@ -1,7 +1,8 @@
-from typing import List, Callable, Tuple
+from typing import Any, MutableSequence, Callable, Tuple
 
 
-def random_sep_index(lst: List, l: int, r: int) -> int: ...
-def median_sep_index(lst: List, l: int, r: int) -> int: ...
-def partition(lst: List, l: int, r: int, index_func: Callable[[List, int, int], int]) -> int: ...
-def three_way_partition(lst: List, l: int, r: int, index_func: Callable[[List, int, int], int]) -> Tuple[int, int]: ...
\ No newline at end of file
+def random_sep_index(lst: MutableSequence, l: int, r: int) -> int: ...
+def median_sep_index(lst: MutableSequence, l: int, r: int) -> int: ...
+def partition(lst: MutableSequence, l: int, r: int, index_func: Callable[[MutableSequence, int, int], int]) -> int: ...
+def three_way_partition(lst: MutableSequence, l: int, r: int, index_func: Callable[[MutableSequence, int, int], int]) -> Tuple[int, int]: ...
+def three_way_partition_numpy(arr: Any, l: int, r: int, index_func: Callable[[Any, int, int], int]) -> Tuple[int, int]: ...
\ No newline at end of file
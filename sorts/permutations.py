@@ -0,0 +1,313 @@
+"""
+Сортирующие перестановки (argsort), ранги и применение перестановки. Вместо
+упорядоченных элементов argsort возвращает перестановку индексов perm,
+такую что lst[perm[0]] <= lst[perm[1]] <= ... Это позволяет упорядочить
+несколько параллельных столбцов по одному из них, не собирая записи
+в кортежи. Перестановки хранятся в компактных array('q') (8 байт на индекс
+вместо указателя на объект int) или numpy.ndarray.
+"""
+
+import math
+from array import array
+from typing import Callable, Optional
+
+from sorts.countsorts import radix_sort
+from sorts.mergesort import MERGE_SORT_SMALL_THRESHOLD
+from sorts.introsort import INTROSORT_DEPTH_FACTOR, \
+    INTROSORT_INSERTION_THRESHOLD
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RANK_METHODS = ('dense', 'min', 'average')
+
+
+def merge_argsort(lst, key: Optional[Callable] = None,
+                  reverse: bool = False) -> array:
+    """
+    Устойчивая сортирующая перестановка сортировкой слиянием снизу вверх.
+    Отрезки длины MERGE_SORT_SMALL_THRESHOLD сортируются вставками, затем
+    сливаются попарно, перестановка и буфер меняются ролями на каждом
+    проходе. Уже упорядоченные соседние отрезки не сливаются. Ключи
+    вычисляются один раз. При reverse=True равные элементы сохраняют исходный
+    порядок. Сложность О(n*log n), дополнительная память - два array('q').
+    """
+    keys = _keys(lst, key)
+    n = len(keys)
+    # Для устойчивой сортировки по убыванию индексы обходятся в обратном
+    # порядке, а результат разворачивается
+    perm = array('q', range(n - 1, -1, -1) if reverse else range(n))
+    width = MERGE_SORT_SMALL_THRESHOLD
+    for lo in range(0, n, width):
+        _insertion_argsort(keys, perm, lo, min(lo + width, n) - 1)
+    buf = array('q', perm)
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid, hi = min(lo + width, n), min(lo + 2 * width, n)
+            if mid == hi or not keys[perm[mid]] < keys[perm[mid - 1]]:
+                buf[lo:hi] = perm[lo:hi]
+            else:
+                _merge_indices(keys, perm, buf, lo, mid, hi)
+        perm, buf = buf, perm
+        width *= 2
+    if reverse:
+        perm.reverse()
+    return perm
+
+
+def _merge_indices(keys, src, dst, lo, mid, hi):
+    """ Сливает упорядоченные отрезки src[lo:mid] и src[mid:hi] в dst. """
+    i, j, k = lo, mid, lo
+    a, b = src[i], src[j]
+    ka, kb = keys[a], keys[b]
+    while True:
+        if kb < ka:
+            dst[k] = b
+            k += 1
+            j += 1
+            if j == hi:
+                dst[k:hi] = src[i:mid]
+                return
+            b = src[j]
+            kb = keys[b]
+        else:
+            dst[k] = a
+            k += 1
+            i += 1
+            if i == mid:
+                dst[k:hi] = src[j:hi]
+                return
+            a = src[i]
+            ka = keys[a]
+
+
+def _insertion_argsort(keys, perm, l, r):
+    """ Устойчиво сортирует вставками индексы perm[l..r] по ключам. """
+    for i in range(l + 1, r + 1):
+        idx = perm[i]
+        k = keys[idx]
+        j = i - 1
+        while j >= l and k < keys[perm[j]]:
+            perm[j + 1] = perm[j]
+            j -= 1
+        perm[j + 1] = idx
+
+
+def introsort_argsort(lst, key: Optional[Callable] = None,
+                      reverse: bool = False) -> array:
+    """
+    Сортирующая перестановка интроспективной сортировкой массива индексов,
+    как в optimized_introsort: итеративная быстрая сортировка с выбором
+    разделителя по медиане трех, досортировка кучей при превышении глубины
+    c*log n и вставками на коротких отрезках. Тройное разделение на массиве
+    индексов требует вдвое больше записей, поэтому используется разделение
+    Хоара. Элементы не перемещаются, сравниваются их ключи. Неустойчивая,
+    дополнительная память - один array('q') и стек из O(log n) отрезков.
+    """
+    keys = _keys(lst, key)
+    n = len(keys)
+    perm = array('q', range(n))
+    if n < 2:
+        return perm
+    max_depth = INTROSORT_DEPTH_FACTOR * math.log2(n)
+    stack = [(0, n - 1, 0)]
+    while stack:
+        l, r, depth = stack.pop()
+        while r - l + 1 > INTROSORT_INSERTION_THRESHOLD:
+            if depth > max_depth:
+                _heap_argsort(keys, perm, l, r)
+                break
+            k1, k2 = _partition_indices(keys, perm, l, r)
+            depth += 1
+            if k1 - l < r - k2 + 1:
+                stack.append((k2, r, depth))
+                r = k1 - 1
+            else:
+                stack.append((l, k1 - 1, depth))
+                l = k2
+        else:
+            _insertion_argsort(keys, perm, l, r)
+    if reverse:
+        perm.reverse()
+    return perm
+
+
+def _partition_indices(keys, perm, l, r):
+    """
+    Разделение Хоара индексов perm[l..r] по медиане ключей первого,
+    среднего и последнего. Оба указателя останавливаются на ключах, равных
+    разделителю, поэтому на массивах с повторами части получаются
+    сбалансированными. Возвращает границы k1, k2 = k1 + 1 позиции
+    разделителя: слева от нее ключи не больше, справа - не меньше.
+    """
+    m = (l + r) // 2
+    a, b, c = keys[perm[l]], keys[perm[m]], keys[perm[r]]
+    if a < b:
+        p = m if b < c else (r if a < c else l)
+    else:
+        p = l if a < c else (r if b < c else m)
+    perm[l], perm[p] = perm[p], perm[l]
+    pivot = keys[perm[l]]
+    i, j = l, r + 1
+    while True:
+        i += 1
+        while i <= r and keys[perm[i]] < pivot:
+            i += 1
+        j -= 1
+        while pivot < keys[perm[j]]:
+            j -= 1
+        if i >= j:
+            break
+        perm[i], perm[j] = perm[j], perm[i]
+    perm[l], perm[j] = perm[j], perm[l]
+    return j, j + 1
+
+
+def _heap_argsort(keys, perm, l, r):
+    """ Сортирует кучей индексы perm[l..r] по ключам на месте. """
+    n = r - l + 1
+
+    def sift_down(i, end):
+        idx = perm[l + i]
+        k = keys[idx]
+        while True:
+            child = 2 * i + 1
+            if child >= end:
+                break
+            if child + 1 < end and \
+                    keys[perm[l + child]] < keys[perm[l + child + 1]]:
+                child += 1
+            if not k < keys[perm[l + child]]:
+                break
+            perm[l + i] = perm[l + child]
+            i = child
+        perm[l + i] = idx
+
+    for i in range(n // 2 - 1, -1, -1):
+        sift_down(i, n)
+    for end in range(n - 1, 0, -1):
+        perm[l], perm[l + end] = perm[l + end], perm[l]
+        sift_down(0, end)
+
+
+def radix_argsort(lst, reverse: bool = False):
+    """
+    Устойчивая сортирующая перестановка поразрядной сортировкой 64-битных
+    целых и чисел с плавающей точкой (см. radix_sort). При reverse=True
+    равные элементы сохраняют исходный порядок.
+
+    :return: numpy.ndarray при наличии NumPy, иначе array('q')
+    """
+    if not reverse:
+        return radix_sort(lst, argsort=True)
+    n = len(lst)
+    perm = radix_sort(lst[::-1], argsort=True)
+    if np is not None and isinstance(perm, np.ndarray):
+        return n - 1 - perm[::-1]
+    return array('q', [n - 1 - i for i in reversed(perm)])
+
+
+def _keys(lst, key):
+    if key is not None:
+        return [key(el) for el in lst]
+    return lst
+
+
+def rank(lst, method: str = 'average', key: Optional[Callable] = None):
+    """
+    Ранги элементов, начиная с 1. Равные элементы получают:
+        dense - одинаковый ранг, ранги идут без пропусков (1, 2, 2, 3)
+        min - наименьший из рангов группы (1, 2, 2, 4)
+        average - среднее рангов группы (1, 2.5, 2.5, 4)
+    Упорядочивание выполняется merge_argsort.
+
+    :return: array('q') рангов или array('d') для average
+    """
+    if method not in RANK_METHODS:
+        raise ValueError(f'Rank method must be one of {RANK_METHODS}')
+    keys = _keys(lst, key)
+    n = len(keys)
+    perm = merge_argsort(keys)
+    ranks = array('d' if method == 'average' else 'q', bytes(8 * n))
+    dense, start = 0, 0
+    while start < n:
+        end = start + 1
+        first = keys[perm[start]]
+        while end < n and not first < keys[perm[end]]:
+            end += 1
+        dense += 1
+        if method == 'dense':
+            value = dense
+        elif method == 'min':
+            value = start + 1
+        else:
+            value = (start + end + 1) / 2
+        for i in range(start, end):
+            ranks[perm[i]] = value
+        start = end
+    return ranks
+
+
+def apply_permutation(lst, perm):
+    """
+    Переставляет элементы lst на месте так, что новый lst[i] равен старому
+    lst[perm[i]], то есть упорядочивает lst по перестановке из argsort.
+    Перестановка раскладывается на циклы, каждый цикл проходится один раз
+    с одним временным элементом. Перед перестановкой perm проверяется, и
+    при ошибке lst не изменяется: проверка отмечает в bytearray встреченные
+    индексы, а перестановка снимает отметки с пройденных позиций. Поэтому
+    дополнительная память - n байт, а perm не изменяется.
+    Один и тот же perm можно применить к нескольким параллельным столбцам.
+
+    :param lst: список или изменяемый буфер
+    :param perm: перестановка индексов 0..n-1 той же длины
+    :return: lst
+    """
+    n = len(lst)
+    if len(perm) != n:
+        raise ValueError('Permutation length must match sequence length')
+    pending = bytearray(n)
+    for k in perm:
+        k = int(k)
+        if not 0 <= k < n or pending[k]:
+            raise ValueError('Not a permutation')
+        pending[k] = 1
+    for start in range(n):
+        if not pending[start]:
+            continue
+        tmp = lst[start]
+        j = start
+        while True:
+            pending[j] = 0
+            k = int(perm[j])
+            if k == start:
+                lst[j] = tmp
+                break
+            lst[j] = lst[k]
+            j = k
+    return lst
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    import tracemalloc
+
+    n = 10 ** 5
+    data = [random.random() for _ in range(n)]
+    funcs = [('sorted(range(n), key)',
+              lambda lst: sorted(range(len(lst)), key=lst.__getitem__)),
+             ('merge_argsort', merge_argsort),
+             ('introsort_argsort', introsort_argsort),
+             ('radix_argsort', radix_argsort)]
+    for name, func in funcs:
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        res = func(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f'{name:>22}: {elapsed:.3f} s, peak {peak / 2 ** 20:.2f} MiB')
@@ -1,37 +1,63 @@
 """
 Быстрая сортировка. Сложность в худшем случае О(n^2), обычно O(n*log n).
-Осуществляет неустойчивую сортировку на месте.
+Осуществляет неустойчивую сортировку на месте. С параметрами key или reverse
+сортировка устойчивая.
 """
 
+from sorts.heapsort import heapsort_range
+from sorts.insertionsort import insertion_sort
+from sorts.keys import key_and_reverse
+from sorts.networks import network_sort
 from sorts.partitions import partition, three_way_partition
 
+# Отрезки не длиннее этой длины сортируются сетью (см. sorts.networks).
+# Значение не больше MAX_NETWORK_SIZE, 1 отключает сортировку сетью
+NETWORK_SORT_THRESHOLD = 16
+# Отрезки короче этой длины pdqsort сортирует вставками
+PDQ_INSERTION_SORT_THRESHOLD = 24
+# Начиная с этой длины pdqsort выбирает разделитель как псевдомедиану девяти
+PDQ_NINTHER_THRESHOLD = 128
+# Сколько перемещений элементов допускает оптимистичная сортировка вставками
+PDQ_PARTIAL_INSERTION_SORT_LIMIT = 8
 
+
+@key_and_reverse
 def quick_sort_random(lst, l=0, r=None):
     """
     Рекурсивный алгоритм быстрой сортировки с случайным выбором разделителя.
     """
     r = len(lst) - 1 if r is None else r
-    if len(lst) <= 1 or l >= r:
+    _quick_sort_random(lst, l, r)
+
+
+def _quick_sort_random(lst, l, r):
+    if r - l + 1 <= NETWORK_SORT_THRESHOLD:
+        network_sort(lst, l, r)
         return
     m = partition(lst, l, r)
-    quick_sort_random(lst, l, m - 1)
-    quick_sort_random(lst, m + 1, r)
+    _quick_sort_random(lst, l, m - 1)
+    _quick_sort_random(lst, m + 1, r)
 
 
+@key_and_reverse
 def quick_sort_no_tail_recursion(lst, l=0, r=None):
     """
     Рекурсивный алгоритм быстрой сортировки без хвостовой рекурсии. Разделитель
     определяется случайным образом.
     """
     r = len(lst) - 1 if r is None else r
-    if len(lst) <= 1:
-        return
-    while l < r:
+    _quick_sort_no_tail_recursion(lst, l, r)
+
+
+def _quick_sort_no_tail_recursion(lst, l, r):
+    while r - l + 1 > NETWORK_SORT_THRESHOLD:
         m = partition(lst, l, r)
-        quick_sort_no_tail_recursion(lst, l, m - 1)
+        _quick_sort_no_tail_recursion(lst, l, m - 1)
         l = m + 1
+    network_sort(lst, l, r)
 
 
+@key_and_reverse
 def quick_sort_no_recursion(lst, l=0, r=None):
     """
     Алгоритм быстрой сортировки без рекурсии. Разделитель определяется случайным
@@ -43,13 +69,15 @@ def quick_sort_no_recursion(lst, l=0, r=None):
     q = [(l, r)]
     while q:
         l, r = q.pop(0)
-        if l >= r:
+        if r - l + 1 <= NETWORK_SORT_THRESHOLD:
+            network_sort(lst, l, r)
             continue
         m = partition(lst, l, r)
         q.append((l, m - 1))
         q.append((m + 1, r))
 
 
+@key_and_reverse
 def quick_sort_3_way_partition(lst, l=0, r=None):
     """
     Рекурсивный алгоритм быстрой сортировки с тройным разделением и случайным
@@ -57,8 +85,214 @@ def quick_sort_3_way_partition(lst, l=0, r=None):
     в списке много одинаковых элементов.
     """
     r = len(lst) - 1 if r is None else r
-    if len(lst) <= 1 or l >= r:
+    _quick_sort_3_way_partition(lst, l, r)
+
+
+def _quick_sort_3_way_partition(lst, l, r):
+    if r - l + 1 <= NETWORK_SORT_THRESHOLD:
+        network_sort(lst, l, r)
         return
     k1, k2 = three_way_partition(lst, l, r)
-    quick_sort_3_way_partition(lst, l, k1 - 1)
-    quick_sort_3_way_partition(lst, k2, r)
+    _quick_sort_3_way_partition(lst, l, k1 - 1)
+    _quick_sort_3_way_partition(lst, k2, r)
+
+
+@key_and_reverse
+def pdqsort(lst, l=0, r=None):
+    """Быстрая сортировка, побеждающая паттерны (pattern-defeating quicksort)
+
+    Гибрид быстрой сортировки, сортировки вставками и сортировки кучей:
+        1. Разделитель - медиана трех элементов, а на длинных отрезках -
+           псевдомедиана девяти (ninther).
+        2. Если отрезок после разделения уже был разделен (не понадобилось ни
+           одного обмена), то обе части пробуем досортировать вставками,
+           ограничив число перемещений. Поэтому упорядоченные и почти
+           упорядоченные массивы сортируются за линейное время.
+        3. Если разделитель равен элементу перед отрезком, то отрезок состоит
+           из равных ему элементов и больших, поэтому равные отделяются одним
+           проходом и больше не сортируются. Так много одинаковых элементов
+           обрабатываются за линейное время.
+        4. Сильно несбалансированное разделение перемешивает несколько
+           элементов, ломая паттерны, которые дают плохие разделители. После
+           log n таких разделений отрезок сортируется кучей, поэтому сложность
+           в худшем случае О(n*log n).
+        5. Короткие отрезки сортируются сетью или вставками.
+    Сортировка неустойчивая, на месте.
+    """
+    r = len(lst) - 1 if r is None else r
+    if l >= r:
+        return
+    _pdqsort_loop(lst, l, r + 1, (r - l + 1).bit_length() - 1, True)
+
+
+def _pdqsort_loop(lst, begin, end, bad_allowed, leftmost):
+    """
+    Сортирует отрезок [begin, end). Левая часть каждого разделения сортируется
+    рекурсивно, а правая - в цикле. bad_allowed - сколько еще сильно
+    несбалансированных разделений допускается до перехода к сортировке кучей.
+    leftmost - является ли отрезок самым левым, то есть нет ли перед ним
+    элемента не больше любого из элементов отрезка.
+    """
+    while True:
+        size = end - begin
+        if size <= NETWORK_SORT_THRESHOLD:
+            network_sort(lst, begin, end - 1)
+            return
+        if size < PDQ_INSERTION_SORT_THRESHOLD:
+            insertion_sort(lst, begin, end - 1)
+            return
+
+        # Выбираем разделитель и ставим его в начало отрезка
+        s2 = size // 2
+        if size > PDQ_NINTHER_THRESHOLD:
+            _sort3(lst, begin, begin + s2, end - 1)
+            _sort3(lst, begin + 1, begin + s2 - 1, end - 2)
+            _sort3(lst, begin + 2, begin + s2 + 1, end - 3)
+            _sort3(lst, begin + s2 - 1, begin + s2, begin + s2 + 1)
+            lst[begin], lst[begin + s2] = lst[begin + s2], lst[begin]
+        else:
+            _sort3(lst, begin + s2, begin, end - 1)
+
+        if not leftmost and not lst[begin - 1] < lst[begin]:
+            begin = _partition_left(lst, begin, end) + 1
+            continue
+
+        pivot_pos, already_partitioned = _partition_right(lst, begin, end)
+        l_size, r_size = pivot_pos - begin, end - pivot_pos - 1
+        if l_size < size // 8 or r_size < size // 8:
+            bad_allowed -= 1
+            if bad_allowed == 0:
+                heapsort_range(lst, begin, end - 1)
+                return
+            if l_size >= PDQ_INSERTION_SORT_THRESHOLD:
+                _break_patterns(lst, begin, pivot_pos - 1, l_size)
+            if r_size >= PDQ_INSERTION_SORT_THRESHOLD:
+                _break_patterns(lst, pivot_pos + 1, end - 1, r_size)
+        elif already_partitioned and \
+                _partial_insertion_sort(lst, begin, pivot_pos) and \
+                _partial_insertion_sort(lst, pivot_pos + 1, end):
+            return
+
+        _pdqsort_loop(lst, begin, pivot_pos, bad_allowed, leftmost)
+        begin, leftmost = pivot_pos + 1, False
+
+
+def _sort2(lst, a, b):
+    if lst[b] < lst[a]:
+        lst[a], lst[b] = lst[b], lst[a]
+
+
+def _sort3(lst, a, b, c):
+    """ Упорядочивает элементы с индексами a, b, c. """
+    _sort2(lst, a, b)
+    _sort2(lst, b, c)
+    _sort2(lst, a, b)
+
+
+def _break_patterns(lst, first, last, size):
+    """
+    Меняет местами элементы у краев отрезка [first, last] с элементами на
+    расстоянии четверти длины от них.
+    """
+    q = size // 4
+    lst[first], lst[first + q] = lst[first + q], lst[first]
+    lst[last], lst[last - q] = lst[last - q], lst[last]
+    if size > PDQ_NINTHER_THRESHOLD:
+        lst[first + 1], lst[first + q + 1] = lst[first + q + 1], lst[first + 1]
+        lst[first + 2], lst[first + q + 2] = lst[first + q + 2], lst[first + 2]
+        lst[last - 1], lst[last - q - 1] = lst[last - q - 1], lst[last - 1]
+        lst[last - 2], lst[last - q - 2] = lst[last - q - 2], lst[last - 2]
+
+
+def _partition_right(lst, begin, end):
+    """
+    Разделяет отрезок [begin, end) по разделителю lst[begin]: левее остаются
+    меньшие элементы, правее - большие или равные. Возвращает позицию
+    разделителя и признак того, что отрезок уже был разделен. Требует, чтобы
+    в отрезке был элемент не меньше разделителя, кроме него самого (это
+    гарантирует выбор медианы).
+    """
+    pivot = lst[begin]
+    first = begin + 1
+    while lst[first] < pivot:
+        first += 1
+    last = end
+    if first - 1 == begin:
+        while first < last:
+            last -= 1
+            if lst[last] < pivot:
+                break
+    else:
+        last -= 1
+        while not lst[last] < pivot:
+            last -= 1
+
+    already_partitioned = first >= last
+    while first < last:
+        lst[first], lst[last] = lst[last], lst[first]
+        first += 1
+        while lst[first] < pivot:
+            first += 1
+        last -= 1
+        while not lst[last] < pivot:
+            last -= 1
+
+    pivot_pos = first - 1
+    lst[begin], lst[pivot_pos] = lst[pivot_pos], pivot
+    return pivot_pos, already_partitioned
+
+
+def _partition_left(lst, begin, end):
+    """
+    Аналогично _partition_right, но равные разделителю элементы остаются
+    левее него. Используется, когда перед отрезком стоит элемент, равный
+    разделителю, - тогда все равные ему элементы уже на своих местах.
+    """
+    pivot = lst[begin]
+    last = end - 1
+    while pivot < lst[last]:
+        last -= 1
+    first = begin
+    if last + 1 == end:
+        while first < last:
+            first += 1
+            if pivot < lst[first]:
+                break
+    else:
+        first += 1
+        while not pivot < lst[first]:
+            first += 1
+
+    while first < last:
+        lst[first], lst[last] = lst[last], lst[first]
+        last -= 1
+        while pivot < lst[last]:
+            last -= 1
+        first += 1
+        while not pivot < lst[first]:
+            first += 1
+
+    lst[begin], lst[last] = lst[last], pivot
+    return last
+
+
+def _partial_insertion_sort(lst, begin, end):
+    """
+    Пробует отсортировать вставками отрезок [begin, end). Прекращает работу,
+    если пришлось переместить больше PDQ_PARTIAL_INSERTION_SORT_LIMIT
+    элементов. Возвращает True, если отрезок отсортирован.
+    """
+    moved = 0
+    for cur in range(begin + 1, end):
+        if lst[cur] < lst[cur - 1]:
+            el, sift = lst[cur], cur
+            while True:
+                lst[sift] = lst[sift - 1]
+                sift -= 1
+                if sift == begin or not el < lst[sift - 1]:
+                    break
+            lst[sift] = el
+            moved += cur - sift
+            if moved > PDQ_PARTIAL_INSERTION_SORT_LIMIT:
+                return False
+    return True
@@ -1,7 +1,13 @@
-from typing import List
+from typing import Any, Callable, MutableSequence, Optional
 
 
-def quick_sort_random(lst: List, l: int, r: int) -> None: ...
-def quick_sort_no_tail_recursion(lst: List, l: int, r: int) -> None: ...
-def quick_sort_no_recursion(lst: List, l: int, r: int) -> None: ...
-def quick_sort_3_way_partition(lst: List, l: int, r: int) -> None: ...
+def quick_sort_random(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
+def quick_sort_no_tail_recursion(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
+def quick_sort_no_recursion(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
+def quick_sort_3_way_partition(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
+def pdqsort(lst: MutableSequence, l: int = ..., r: Optional[int] = ..., *,
+            key: Optional[Callable[[Any], Any]] = ..., reverse: bool = ...) -> None: ...
@@ -0,0 +1,146 @@
+"""
+Частичная сортировка и выбор k наименьших или наибольших элементов без
+полной сортировки массива. Выбор основан на быстром поиске порядковой
+статистики (quickselect) с тройным разделением, сложность в среднем
+О(n + k*log k). Если k очень мало по сравнению с n, то используется куча
+ограниченного размера: О(n*log k) в худшем случае и О(n) сравнений в среднем,
+при этом нужно всего О(k) дополнительной памяти.
+"""
+
+import heapq
+
+from sorts.buffers import assign
+from sorts.heapsort import heapsort_range, sift_down
+from sorts.partitions import three_way_partition
+from sorts.quicksort import pdqsort
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Куча используется, если k меньше n хотя бы в это количество раз
+HEAP_SELECT_RATIO = 64
+
+
+def partial_sort(lst, k, key=None):
+    """
+    Переставляет элементы на месте так, что первые k из них - это k
+    наименьших элементов в отсортированном порядке. Порядок остальных
+    элементов не определен. Без key сортировка неустойчивая, с key -
+    устойчивая (равные по ключу элементы сохраняют исходный порядок).
+
+    :param lst: список или numpy.ndarray
+    :param k: количество наименьших элементов
+    :param key: функция, вычисляющая ключ элемента. Ключи вычисляются один
+        раз для каждого элемента
+    """
+    n = len(lst)
+    k = min(k, n)
+    if k <= 0:
+        return
+    if key is None:
+        if np is not None and isinstance(lst, np.ndarray):
+            lst.partition(k - 1)
+            lst[:k].sort()
+        else:
+            _partial_sort(lst, k)
+        return
+    decorated = [(key(el), i) for i, el in enumerate(lst)]
+    _partial_sort(decorated, k)
+    assign(lst, [lst[i] for _, i in decorated])
+
+
+def nsmallest(lst, k, key=None):
+    """
+    Возвращает k наименьших элементов в порядке возрастания. Результат
+    совпадает с sorted(lst, key=key)[:k], исходный массив не изменяется.
+    Для numpy.ndarray без key возвращается numpy.ndarray.
+    """
+    n = len(lst)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    if key is None and np is not None and isinstance(lst, np.ndarray):
+        res = np.partition(lst, k - 1)[:k]
+        res.sort()
+        return res
+    key = key or _identity
+
+    if k * HEAP_SELECT_RATIO <= n:
+        # Макс-куча из k наименьших пар (ключ, индекс)
+        heap = [(key(lst[i]), i) for i in range(k)]
+        for i in range((k - 2) // 2, -1, -1):
+            sift_down(heap, 0, i, k, heap[i])
+        for i in range(k, n):
+            item = (key(lst[i]), i)
+            if item < heap[0]:
+                sift_down(heap, 0, 0, k, item)
+        heapsort_range(heap, 0, k - 1)
+        return [lst[i] for _, i in heap]
+
+    decorated = [(key(el), i) for i, el in enumerate(lst)]
+    _partial_sort(decorated, k)
+    return [lst[i] for _, i in decorated[:k]]
+
+
+def nlargest(lst, k, key=None):
+    """
+    Возвращает k наибольших элементов в порядке убывания. Результат
+    совпадает с sorted(lst, key=key, reverse=True)[:k], исходный массив не
+    изменяется. Для numpy.ndarray без key возвращается numpy.ndarray.
+    """
+    n = len(lst)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    if key is None and np is not None and isinstance(lst, np.ndarray):
+        res = np.partition(lst, n - k)[n - k:]
+        res.sort()
+        return res[::-1].copy()
+    key = key or _identity
+
+    # Индексы берутся со знаком минус, чтобы из равных элементов
+    # наибольшими считались более ранние
+    if k * HEAP_SELECT_RATIO <= n:
+        heap = [(key(lst[i]), -i) for i in range(k)]
+        heapq.heapify(heap)
+        for i in range(k, n):
+            item = (key(lst[i]), -i)
+            if heap[0] < item:
+                heapq.heapreplace(heap, item)
+        heapsort_range(heap, 0, k - 1)
+        return [lst[-neg_i] for _, neg_i in reversed(heap)]
+
+    decorated = [(key(el), -i) for i, el in enumerate(lst)]
+    _select(decorated, 0, n - 1, n - k)
+    pdqsort(decorated, n - k, n - 1)
+    return [lst[-neg_i] for _, neg_i in reversed(decorated[n - k:])]
+
+
+def _identity(x):
+    return x
+
+
+def _partial_sort(lst, k):
+    """
+    Ставит k наименьших элементов в начало списка и сортирует только их.
+    """
+    _select(lst, 0, len(lst) - 1, k - 1)
+    pdqsort(lst, 0, k - 2)
+
+
+def _select(lst, l, r, k):
+    """
+    Быстрый поиск порядковой статистики. Переставляет элементы отрезка [l, r]
+    так, что на позиции k стоит элемент, который стоял бы там после
+    сортировки, левее - не большие, правее - не меньшие.
+    """
+    while l < r:
+        k1, k2 = three_way_partition(lst, l, r)
+        if k < k1:
+            r = k1 - 1
+        elif k >= k2:
+            l = k2
+        else:
+            return
@@ -2,20 +2,43 @@
 Тестирование сортировок.
 """
 
+import heapq
+import inspect
+import os
 import random
+import struct
+import tempfile
 import unittest
 from abc import ABC
+from array import array
+from unittest import mock
 
+from ordinalstatistics import find
+from sorts import auto_sort, networks
+from sorts.autosort import choose_sort, profile_input
+from sorts.bench import run_benchmark, find_regressions, DISTRIBUTIONS
 from sorts.bubblebasedsorts import bubble_sort, comb_sort, even_odd_sort, \
     shaker_sort
-from sorts.heapsort import heapsort
+from sorts.countsorts import radix_sort
+from sorts.externalsort import external_sort
+from sorts.heapsort import heapsort, heapsort_range, heapsort_dary
+from sorts.instrument import CountingSequence, Report, instrument, profile
 from sorts.insertionsort import insertion_sort, insertion_sort_with_buffer, \
     pair_insertion_sort
 from sorts.introsort import optimized_introsort, introsort
-from sorts.mergesort import merge_sort_recursive, merge_sort_iterative
-from sorts.partitions import partition, three_way_partition, median_sep_index
+from sorts.mergesort import merge_sort_recursive, merge_sort_iterative, \
+    merge_sort_adaptive, merge_sort_in_place
+from sorts.networks import MAX_NETWORK_SIZE, comparators, network_sort, \
+    network_sort_batch
+from sorts.parallelsort import parallel_sort, MIN_PARALLEL_SIZE
+from sorts.permutations import merge_argsort, introsort_argsort, \
+    radix_argsort, rank, apply_permutation
+from sorts.partitions import partition, three_way_partition, \
+    median_sep_index, three_way_partition_numpy, NUMPY_PARTITION_THRESHOLD
+from sorts.selection import partial_sort, nsmallest, nlargest
+from sorts.stringsorts import msd_radix_sort, quick_sort_3_way_string
 from sorts.quicksort import quick_sort_random, quick_sort_no_tail_recursion, \
-    quick_sort_3_way_partition, quick_sort_no_recursion
+    quick_sort_3_way_partition, quick_sort_no_recursion, pdqsort
 
 
 class PartitionTests(unittest.TestCase):
@@ -61,6 +84,68 @@ class MedianSepIndexTests(unittest.TestCase):
         self.assertEqual(median_sep_index([2, 2, 1], 0, 2), 0)
         self.assertEqual(median_sep_index([1, 2, 2], 0, 2), 1)
 
+    def test_matches_sorting(self):
+        for a in range(3):
+            for b in range(3):
+                for c in range(3):
+                    lst = [a, 9, b, 9, c]
+                    expected = sorted([(a, 0), (b, 2), (c, 4)])[1][1]
+                    self.assertEqual(median_sep_index(lst, 0, 4), expected)
+
+
+@unittest.skipIf(networks.np is None, 'numpy is not installed')
+class NumpyPartitionTests(Partition3WaysTests):
+
+    def test_partition(self):
+        np = networks.np
+        for size in [1, 2, 10, 1000]:
+            for high in [1, 3, 1000]:
+                arr = np.random.randint(0, high, size)
+                l, r = 0, size - 1
+                if size > 2:
+                    l, r = 1, size - 2
+                before = arr.copy()
+                k1, k2 = three_way_partition_numpy(arr, l, r)
+                self.assertTrue((arr[:l] == before[:l]).all())
+                self.assertTrue((arr[r + 1:] == before[r + 1:]).all())
+                self.assertTrue((np.sort(arr) == np.sort(before)).all())
+                self.verify_list(list(arr[l:r + 1]), k1 - l, k2 - l)
+
+    def test_dispatch(self):
+        np = networks.np
+        arr = np.random.randint(0, 3, NUMPY_PARTITION_THRESHOLD)
+        with mock.patch('sorts.partitions.three_way_partition_numpy',
+                        return_value=(0, 0)) as vectorized:
+            three_way_partition(arr, 0, len(arr) - 2)
+            vectorized.assert_not_called()
+            three_way_partition(arr, 0, len(arr) - 1)
+            vectorized.assert_called_once()
+
+    def test_sorts_and_select(self):
+        np = networks.np
+        arr = np.random.randint(0, 10, 10 ** 4)
+        expected = np.sort(arr)
+        for func in [quick_sort_3_way_partition, optimized_introsort]:
+            res = arr.copy()
+            func(res)
+            self.assertTrue((res == expected).all())
+
+
+class _FirstKey(tuple):
+    """ Кортеж, который сравнивается только по первому элементу. """
+
+    def __lt__(self, other):
+        return self[0] < other[0]
+
+    def __gt__(self, other):
+        return self[0] > other[0]
+
+    def __le__(self, other):
+        return self[0] <= other[0]
+
+    def __ge__(self, other):
+        return self[0] >= other[0]
+
 
 class SortTests(ABC):
 
@@ -91,85 +176,793 @@ class SortTests(ABC):
             self.verify(lst)
 
 
-class BubbleSortTests(SortTests, unittest.TestCase):
+class StableSortTests(SortTests):
+
+    def test_stability(self):
+        for _ in range(50):
+            lst = [_FirstKey((random.randint(0, 10), i)) for i in range(300)]
+            expected = sorted(lst, key=lambda x: x[0])
+            res = self.func(lst)
+            if res is None:
+                res = lst
+            self.assertEqual([tuple(el) for el in res],
+                             [tuple(el) for el in expected])
+
+
+class KeySortTests(SortTests):
+
+    def verify_key(self, lst, key, reverse):
+        expected = sorted(lst, key=key, reverse=reverse)
+        res = self.func(lst, key=key, reverse=reverse)
+        if res is None:
+            res = lst
+        self.assertEqual(res, expected)
+
+    def test_key_and_reverse(self):
+        for _ in range(20):
+            lst = [(random.randint(0, 10), i) for i in range(100)]
+            random.shuffle(lst)
+            self.verify_key(lst[:], lambda x: x[0], False)
+            self.verify_key(lst[:], lambda x: x[0], True)
+            self.verify_key(lst[:], None, True)
+        self.verify_key([], len, True)
+
+    def test_key_computed_once(self):
+        calls = []
+
+        def key(x):
+            calls.append(x)
+            return -x
+
+        lst = [random.randint(0, 25) for _ in range(100)]
+        self.verify_key(lst, key, False)
+        self.assertEqual(len(calls), 200)
+
+    def test_key_on_range(self):
+        if 'l' not in inspect.signature(self.func).parameters:
+            return
+        calls = []
+
+        def key(x):
+            calls.append(x)
+            return -x
+
+        lst = [random.randint(0, 25) for _ in range(100)]
+        expected = lst[:10] + sorted(lst[10:60], reverse=True) + lst[60:]
+        self.func(lst, 10, 59, key=key)
+        self.assertEqual(lst, expected)
+        self.assertEqual(len(calls), 50)
+        expected = lst[:30] + sorted(lst[30:90], reverse=True) + lst[90:]
+        self.func(lst, 30, 89, reverse=True)
+        self.assertEqual(lst, expected)
+
+
+class BubbleSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = bubble_sort
 
 
-class ShakerSortTests(SortTests, unittest.TestCase):
+class ShakerSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = shaker_sort
 
 
-class EvenOddSortTests(SortTests, unittest.TestCase):
+class EvenOddSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = even_odd_sort
 
 
-class CombSortTests(SortTests, unittest.TestCase):
+class CombSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = comb_sort
 
 
-class MergeSortRecursiveTests(SortTests, unittest.TestCase):
+class MergeSortRecursiveTests(StableSortTests, KeySortTests,
+                              unittest.TestCase):
     def setUp(self):
         self.func = merge_sort_recursive
 
 
-class MergeSortIterativeTests(SortTests, unittest.TestCase):
+class MergeSortIterativeTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = merge_sort_iterative
 
 
-class InsertionSortTests(SortTests, unittest.TestCase):
+class MergeSortAdaptiveTests(StableSortTests, KeySortTests,
+                             unittest.TestCase):
+    def setUp(self):
+        self.func = merge_sort_adaptive
+
+    def test_on_partially_sorted_lists(self):
+        for _ in range(50):
+            lst = []
+            for _ in range(random.randint(1, 10)):
+                run = sorted(random.randint(0, 50)
+                             for _ in range(random.randint(0, 100)))
+                if random.random() < 0.5:
+                    run.reverse()
+                lst.extend(run)
+            self.verify(lst)
+
+
+class MergeSortInPlaceTests(StableSortTests, KeySortTests,
+                            unittest.TestCase):
+    def setUp(self):
+        self.func = merge_sort_in_place
+
+    def test_block_boundaries(self):
+        for size in [19, 20, 21, 40, 41, 61, 333]:
+            self.verify([random.randint(0, 5) for _ in range(size)])
+
+
+class InsertionSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = insertion_sort
 
 
-class InsertionSortWithBufferTests(SortTests, unittest.TestCase):
+class InsertionSortWithBufferTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = insertion_sort_with_buffer
 
 
-class PairInsertionSortTests(SortTests, unittest.TestCase):
+class PairInsertionSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = pair_insertion_sort
 
 
-class RandomQuickSortTests(SortTests, unittest.TestCase):
+class RandomQuickSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = quick_sort_random
 
 
-class NoTailQuickSortTests(SortTests, unittest.TestCase):
+class NoTailQuickSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = quick_sort_no_tail_recursion
 
 
-class ThreeWayPartitionQuickSortTests(SortTests, unittest.TestCase):
+class ThreeWayPartitionQuickSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = quick_sort_3_way_partition
 
 
-class NoRecursionQuickSortTests(SortTests, unittest.TestCase):
+class NoRecursionQuickSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = quick_sort_no_recursion
 
 
-class IntrosortTests(SortTests, unittest.TestCase):
+class PdqSortTests(KeySortTests, unittest.TestCase):
+    def setUp(self):
+        self.func = pdqsort
+
+    def test_patterns(self):
+        for size in [23, 24, 25, 128, 129, 1000]:
+            self.verify(list(range(size)))
+            self.verify(list(range(size, 0, -1)))
+            self.verify([0] * size)
+            self.verify([i % 7 for i in range(size)])
+            self.verify(list(range(size // 2)) + list(range(size // 2, 0, -1)))
+            self.verify([random.randint(0, 2) for _ in range(size)])
+
+    def test_subrange(self):
+        for _ in range(50):
+            lst = [random.randint(0, 100) for _ in range(300)]
+            l, r = sorted(random.sample(range(len(lst)), 2))
+            expected = lst[:l] + sorted(lst[l:r + 1]) + lst[r + 1:]
+            pdqsort(lst, l, r)
+            self.assertEqual(lst, expected)
+
+    def test_subrange_reverse(self):
+        lst = [(1, 'a'), (3, 'b'), (1, 'c'), (2, 'd'), (0, 'e')]
+        pdqsort(lst, 1, 3, key=lambda x: x[0], reverse=True)
+        self.assertEqual(lst, [(1, 'a'), (3, 'b'), (2, 'd'), (1, 'c'),
+                               (0, 'e')])
+
+
+class IntrosortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = introsort
 
 
-class OptimizedIntrosortTests(SortTests, unittest.TestCase):
+class OptimizedIntrosortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = optimized_introsort
 
+    def test_heapsort_fallback(self):
+        with mock.patch('sorts.introsort.INTROSORT_DEPTH_FACTOR', 0):
+            self.test_on_random_lists()
+
+    def test_subrange(self):
+        lst = [random.randint(0, 100) for _ in range(300)]
+        expected = lst[:10] + sorted(lst[10:290]) + lst[290:]
+        optimized_introsort(lst, 10, 289)
+        self.assertEqual(lst, expected)
+
 
-class HeapSortTests(SortTests, unittest.TestCase):
+class HeapSortTests(KeySortTests, unittest.TestCase):
     def setUp(self):
         self.func = heapsort
 
+    def test_key_and_reverse(self):
+        lst = [('b', 2), ('a', 3), ('c', 1)]
+        heapsort(lst, key=lambda x: x[1])
+        self.assertEqual(lst, [('c', 1), ('b', 2), ('a', 3)])
+        heapsort(lst, reverse=True)
+        self.assertEqual(lst, [('c', 1), ('b', 2), ('a', 3)])
+
+
+class DaryHeapSortTests(KeySortTests, unittest.TestCase):
+    def setUp(self):
+        self.func = heapsort_dary
+
+    def test_arities(self):
+        for d in [2, 3, 4, 8]:
+            lst = [random.randint(0, 25) for _ in range(100)]
+            heapsort_dary(lst, d=d)
+            self.assertEqual(lst, sorted(lst))
+
+    def test_wrong_arity(self):
+        with self.assertRaises(ValueError):
+            heapsort_dary([2, 1], d=1)
+
+
+class HeapSortRangeTests(SortTests, unittest.TestCase):
+    def setUp(self):
+        self.func = heapsort_range
+
+    def test_subrange(self):
+        lst = [5, 4, 3, 2, 1, 0]
+        heapsort_range(lst, 1, 4)
+        self.assertEqual(lst, [5, 1, 2, 3, 4, 0])
+
+
+class NetworkSortTests(unittest.TestCase):
+
+    def test_zero_one_principle(self):
+        for n in range(11):
+            for bits in range(1 << n):
+                lst = [(bits >> i) & 1 for i in range(n)]
+                network_sort(lst)
+                self.assertEqual(lst, sorted(lst), n)
+
+    def test_all_sizes(self):
+        for n in range(MAX_NETWORK_SIZE + 1):
+            self.assertTrue(all(i < j < n for i, j in comparators(n)))
+            for _ in range(200):
+                lst = [random.randint(0, 10) for _ in range(n)]
+                expected = sorted(lst)
+                network_sort(lst)
+                self.assertEqual(lst, expected, n)
+
+    def test_subrange(self):
+        lst = [9, 5, 4, 3, 2, 1, 0]
+        network_sort(lst, 1, 4)
+        self.assertEqual(lst, [9, 2, 3, 4, 5, 1, 0])
+
+    def test_too_long(self):
+        with self.assertRaises(ValueError):
+            network_sort(list(range(MAX_NETWORK_SIZE + 1)))
+
+    def test_batch_lists(self):
+        rows = [[random.randint(0, 10) for _ in range(5)] for _ in range(20)]
+        expected = [sorted(row) for row in rows]
+        network_sort_batch(rows)
+        self.assertEqual(rows, expected)
+
+    @unittest.skipIf(networks.np is None, 'numpy is not installed')
+    def test_batch_numpy(self):
+        np = networks.np
+        for n in [0, 1, 2, 7, 8, 16]:
+            rows = np.random.randint(0, 10, (3 * networks.BATCH_BLOCK_SIZE // 2,
+                                             n))
+            expected = np.sort(rows, axis=1)
+            network_sort_batch(rows)
+            self.assertTrue((rows == expected).all(), n)
+        with self.assertRaises(ValueError):
+            network_sort_batch(np.zeros((2, MAX_NETWORK_SIZE + 1)))
+
+    def test_thresholds(self):
+        funcs = [quick_sort_random, quick_sort_no_recursion, pdqsort,
+                 introsort, optimized_introsort, merge_sort_iterative]
+        for threshold in [1, 2, 5]:
+            with mock.patch('sorts.quicksort.NETWORK_SORT_THRESHOLD',
+                            threshold), \
+                    mock.patch('sorts.introsort.INTROSORT_NETWORK_THRESHOLD',
+                               threshold), \
+                    mock.patch('sorts.mergesort.MERGE_SORT_SMALL_THRESHOLD',
+                               threshold):
+                for func in funcs:
+                    lst = [random.randint(0, 50) for _ in range(100)]
+                    expected = sorted(lst)
+                    res = func(lst)
+                    self.assertEqual(lst if res is None else res, expected)
+
+
+class BufferSortTests(unittest.TestCase):
+    """ Сортировки на месте для объектов с протоколом буфера. """
+
+    funcs = [bubble_sort, shaker_sort, even_odd_sort, comb_sort,
+             insertion_sort, insertion_sort_with_buffer, pair_insertion_sort,
+             quick_sort_random, quick_sort_no_tail_recursion,
+             quick_sort_no_recursion, quick_sort_3_way_partition, pdqsort,
+             introsort, optimized_introsort, heapsort, heapsort_dary,
+             merge_sort_adaptive, merge_sort_in_place]
+
+    def containers(self):
+        yield lambda data: array('d', data)
+        yield lambda data: array('q', data)
+        yield bytearray
+        yield lambda data: memoryview(array('d', data))
+        yield lambda data: memoryview(bytearray(data))
+        if networks.np is not None:
+            yield networks.np.array
+
+    def verify(self, func, **kwargs):
+        for make in self.containers():
+            data = [random.randint(0, 255) for _ in range(100)]
+            lst = make(data)
+            res = func(lst, **kwargs)
+            self.assertTrue(res is None or res is lst)
+            self.assertEqual(list(lst), sorted(data, **kwargs),
+                             (func.__name__, type(lst)))
+
+    def test_sorts(self):
+        for func in self.funcs:
+            self.verify(func)
+
+    def test_key_and_reverse(self):
+        for func in self.funcs:
+            self.verify(func, reverse=True)
+            self.verify(func, key=lambda x: -x)
+
+    def test_subrange(self):
+        for func in [heapsort_range, network_sort, insertion_sort]:
+            for make in self.containers():
+                lst = make([5, 4, 3, 2, 1, 0])
+                func(lst, 1, 4)
+                self.assertEqual(list(lst), [5, 1, 2, 3, 4, 0])
+
+    def test_introsort_fallback(self):
+        with mock.patch('sorts.introsort.math.log2', return_value=0):
+            self.verify(introsort)
+
+    def test_partitions(self):
+        for make in self.containers():
+            data = [random.randint(0, 40) for _ in range(100)]
+            lst = make(data)
+            pos = partition(lst, 0, len(lst) - 1)
+            self.assertTrue(all(el <= lst[pos] for el in lst[:pos]))
+            self.assertTrue(all(el > lst[pos] for el in lst[pos + 1:]))
+            lst = make(data)
+            k1, k2 = three_way_partition(lst, 0, len(lst) - 1)
+            self.assertTrue(all(el < lst[k1] for el in lst[:k1]))
+            self.assertTrue(all(el == lst[k1] for el in lst[k1:k2]))
+            self.assertTrue(all(el > lst[k1] for el in lst[k2:]))
+
+
+class ParallelSortTests(StableSortTests, unittest.TestCase):
+    def setUp(self):
+        self.func = parallel_sort
+
+    def test_big_list(self):
+        lst = [random.randint(0, 10 ** 6) for _ in range(2 * MIN_PARALLEL_SIZE)]
+        self.assertEqual(parallel_sort(lst, workers=3), sorted(lst))
+
+    def test_big_list_with_few_unique(self):
+        lst = [_FirstKey((random.randint(0, 3), i))
+               for i in range(2 * MIN_PARALLEL_SIZE)]
+        res = parallel_sort(lst, workers=4)
+        self.assertEqual([tuple(el) for el in res],
+                         [tuple(el) for el in sorted(lst, key=lambda x: x[0])])
+
+    def test_big_array(self):
+        lst = array('d', (random.uniform(-1, 1)
+                          for _ in range(2 * MIN_PARALLEL_SIZE)))
+        expected = sorted(lst)
+        self.assertIs(parallel_sort(lst, workers=3), lst)
+        self.assertEqual(lst.tolist(), expected)
+
+    def test_small_array(self):
+        lst = array('q', [3, -1, 2])
+        parallel_sort(lst, workers=2)
+        self.assertEqual(lst, array('q', [-1, 2, 3]))
+
+    def test_formats_without_typecode(self):
+        np = networks.np
+        view = memoryview(bytes([1, 0, 1, 0]) * 10).cast('?')
+        lst = memoryview(bytearray(view)).cast('?')
+        parallel_sort(lst, workers=2)
+        self.assertEqual(lst.tolist(), [False] * 20 + [True] * 20)
+        if np is None:
+            return
+        for dtype in ('?', 'e', '>i8', '<f4'):
+            for n in (100, 2 * MIN_PARALLEL_SIZE):
+                arr = np.random.randint(-50, 50, n).astype(dtype)
+                expected = np.sort(arr)
+                self.assertIs(parallel_sort(arr, workers=2), arr)
+                self.assertTrue((arr == expected).all(), dtype)
+
+
+class StringSortTests(unittest.TestCase):
+
+    @staticmethod
+    def random_strings(n, alphabet='ab', max_len=6, prefix=''):
+        return [prefix + ''.join(random.choice(alphabet) for _ in
+                                 range(random.randint(0, max_len)))
+                for _ in range(n)]
+
+    def verify(self, lst):
+        expected = sorted(lst)
+        self.assertEqual(msd_radix_sort(lst), expected)
+        self.assertEqual(quick_sort_3_way_string(lst[:]), expected)
+
+    def test_static_combinations(self):
+        self.verify([])
+        self.verify(['b'])
+        self.verify(['', 'a', ''])
+        self.verify(['ab', 'a', 'abc', 'b', 'a'])
+        self.verify(['x'] * 100)
+        self.verify(['ф', 'я', 'а', 'ab', 'a\U0001f600', 'a\x00'])
+
+    def test_bytes(self):
+        lst = [bytes(random.randrange(256) for _ in range(random.randint(0, 4)))
+               for _ in range(500)]
+        self.verify(lst)
+
+    def test_shared_prefixes(self):
+        for _ in range(20):
+            self.verify(self.random_strings(300, prefix='https://example.com/'))
+            self.verify(self.random_strings(300, alphabet='abcdef',
+                                            max_len=3))
+
+    def test_subrange(self):
+        lst = self.random_strings(100)
+        expected = lst[:10] + sorted(lst[10:90]) + lst[90:]
+        self.assertEqual(quick_sort_3_way_string(lst, 10, 89), expected)
+
+    def test_parallel(self):
+        lst = self.random_strings(2 * MIN_PARALLEL_SIZE, alphabet='abcd',
+                                  max_len=8, prefix='/x/')
+        self.assertEqual(msd_radix_sort(lst, workers=3), sorted(lst))
+        lst = ['same'] * MIN_PARALLEL_SIZE
+        self.assertEqual(msd_radix_sort(lst, workers=2), lst)
+
+
+class AutoSortTests(SortTests, unittest.TestCase):
+    def setUp(self):
+        self.func = auto_sort
+
+    def verify_choice(self, lst, algorithm):
+        res, decision = auto_sort(lst[:], explain=True)
+        self.assertEqual(decision.algorithm, algorithm, str(decision))
+        self.assertTrue(decision.reasons)
+        self.assertEqual(res, sorted(lst))
+
+    def test_profile(self):
+        stats = profile_input(list(range(1000)))
+        self.assertEqual((stats.kind, stats.runs, stats.inversion_ratio),
+                         ('int', 1, 0))
+        self.assertEqual(stats.key_range, 1000)
+        stats = profile_input(list(range(1000, 0, -1)))
+        self.assertEqual((stats.runs, stats.inversion_ratio), (1, 1))
+        stats = profile_input([random.random() for _ in range(1000)])
+        self.assertEqual(stats.kind, 'float')
+        self.assertGreater(stats.runs, 100)
+        self.assertLess(stats.duplicate_ratio, 0.1)
+        stats = profile_input([[1]] * 100)
+        self.assertEqual(stats.kind, 'other')
+        self.assertIsNone(stats.duplicate_ratio)
+
+    def test_choices(self):
+        np = networks.np
+        n = 1000
+        self.verify_choice([3, 1, 2], 'network_sort')
+        self.verify_choice(list(range(30, 0, -1)), 'insertion_sort')
+        with mock.patch('sorts.autosort.np', None):
+            self.verify_choice(list(range(n)) + [-1], 'merge_sort_adaptive')
+            self.verify_choice(list(range(n, 0, -1)), 'merge_sort_adaptive')
+            self.verify_choice([random.randrange(n) for _ in range(n)],
+                               'countsort')
+            self.verify_choice([random.random() for _ in range(n)], 'pdqsort')
+            self.verify_choice([(random.randrange(3), 'x') for _ in range(n)],
+                               'optimized_introsort')
+            with mock.patch('sorts.autosort.AUTO_STRING_RADIX_MIN_SIZE', n):
+                self.verify_choice([str(random.random()) for _ in range(n)],
+                                   'msd_radix_sort')
+        if np is not None:
+            self.verify_choice([random.random() for _ in range(n)],
+                               'radix_sort')
+            self.verify_choice([2 ** 70 + random.randrange(n * n)
+                                for _ in range(n)], 'pdqsort')
+
+    def test_buffers(self):
+        np = networks.np
+        lst = array('q', (random.randrange(-100, 100) for _ in range(500)))
+        expected = sorted(lst)
+        self.assertIs(auto_sort(lst), lst)
+        self.assertEqual(lst.tolist(), expected)
+        lst = array('u', (random.choice('abcdef') for _ in range(500)))
+        expected = sorted(lst)
+        self.assertEqual(profile_input(lst).kind, 'other')
+        self.assertIs(auto_sort(lst), lst)
+        self.assertEqual(lst.tolist(), expected)
+        view = memoryview(array('d', [2.5, -1.0] * 50))
+        self.assertEqual(profile_input(view).kind, 'float')
+        self.assertEqual(profile_input(view.cast('B')).kind, 'int')
+        self.assertEqual(profile_input(memoryview(b'ab').cast('c')).kind,
+                         'other')
+        if np is not None:
+            arr = np.random.standard_normal(500)
+            expected = np.sort(arr)
+            self.assertIs(auto_sort(arr), arr)
+            self.assertTrue((arr == expected).all())
+
+    def test_decision_str(self):
+        decision = choose_sort([random.random() for _ in range(100)])
+        self.assertTrue(str(decision).startswith(decision.algorithm + ': '))
+
+
+class PermutationTests(unittest.TestCase):
+
+    def verify_argsort(self, lst, perm, stable, reverse=False, key=None):
+        key = key or (lambda x: x)
+        self.assertEqual(sorted(perm), list(range(len(lst))))
+        expected = sorted(range(len(lst)), key=lambda i: key(lst[i]),
+                          reverse=reverse)
+        if stable:
+            self.assertEqual(list(perm), expected)
+        else:
+            self.assertEqual([key(lst[i]) for i in perm],
+                             [key(lst[i]) for i in expected])
+
+    def test_argsort(self):
+        for _ in range(50):
+            lst = [random.randint(-20, 20)
+                   for _ in range(random.randint(0, 300))]
+            for reverse in (False, True):
+                self.verify_argsort(lst, merge_argsort(lst, reverse=reverse),
+                                    True, reverse)
+                self.verify_argsort(lst, radix_argsort(lst, reverse=reverse),
+                                    True, reverse)
+                self.verify_argsort(
+                    lst, introsort_argsort(lst, reverse=reverse), False,
+                    reverse)
+        lst = [str(random.random()) for _ in range(100)]
+        self.verify_argsort(lst, merge_argsort(lst, key=len), True, key=len)
+        self.verify_argsort(lst, introsort_argsort(lst, key=len), False,
+                            key=len)
+
+    def test_introsort_argsort_patterns(self):
+        n = 2000
+        for lst in [list(range(n)), list(range(n, 0, -1)), [7] * n,
+                    [i % 3 for i in range(n)]]:
+            self.verify_argsort(lst, introsort_argsort(lst), False)
+        with mock.patch('sorts.permutations.INTROSORT_DEPTH_FACTOR', 0):
+            lst = [random.random() for _ in range(n)]
+            self.verify_argsort(lst, introsort_argsort(lst), False)
+
+    def test_compact_result(self):
+        perm = merge_argsort([3, 1, 2])
+        self.assertIsInstance(perm, array)
+        self.assertEqual(perm.typecode, 'q')
+        self.assertIsInstance(introsort_argsort([3, 1, 2]), array)
+
+    def test_rank(self):
+        lst = [10, 20, 20, 5, 30, 20]
+        self.assertEqual(list(rank(lst, 'dense')), [2, 3, 3, 1, 4, 3])
+        self.assertEqual(list(rank(lst, 'min')), [2, 3, 3, 1, 6, 3])
+        self.assertEqual(list(rank(lst)), [2, 4, 4, 1, 6, 4])
+        self.assertEqual(list(rank(lst, 'min', key=lambda x: -x)),
+                         [5, 2, 2, 6, 1, 2])
+        self.assertEqual(list(rank([])), [])
+        with self.assertRaises(ValueError):
+            rank(lst, 'max')
+
+    def test_apply_permutation(self):
+        for _ in range(50):
+            lst = [random.random() for _ in range(random.randint(0, 100))]
+            other = [str(el) for el in lst]
+            perm = merge_argsort(lst)
+            before = array('q', perm)
+            self.assertIs(apply_permutation(lst, perm), lst)
+            apply_permutation(other, perm)
+            self.assertEqual(lst, sorted(lst))
+            self.assertEqual(other, [str(el) for el in lst])
+            self.assertEqual(perm, before)
+
+    def test_apply_permutation_buffer(self):
+        lst = array('d', [3.0, 1.0, 2.0])
+        apply_permutation(lst, radix_argsort(lst))
+        self.assertEqual(lst, array('d', [1.0, 2.0, 3.0]))
+
+    def test_wrong_permutation(self):
+        with self.assertRaises(ValueError):
+            apply_permutation([1, 2], [0])
+        for perm in ([1, 1, 0], [1, 2, 3], [2, 0, -1]):
+            lst = ['a', 'b', 'c']
+            with self.assertRaises(ValueError):
+                apply_permutation(lst, perm)
+            self.assertEqual(lst, ['a', 'b', 'c'])
+
+
+class SelectionTests(unittest.TestCase):
+
+    def random_records(self, n):
+        return [(random.randint(0, 10), i) for i in range(n)]
+
+    def test_partial_sort(self):
+        for n, k in [(0, 1), (1, 1), (10, 0), (10, 15), (100, 7), (500, 3)]:
+            lst = [random.randint(0, 50) for _ in range(n)]
+            res = lst[:]
+            partial_sort(res, k)
+            self.assertEqual(res[:k], sorted(lst)[:k])
+            self.assertEqual(sorted(res), sorted(lst))
+
+    def test_partial_sort_with_key_is_stable(self):
+        lst = self.random_records(300)
+        res = lst[:]
+        partial_sort(res, 50, key=lambda x: x[0])
+        self.assertEqual(res[:50], sorted(lst, key=lambda x: x[0])[:50])
+
+    def test_nsmallest_and_nlargest(self):
+        def key(x):
+            return x[0]
+
+        # Размеры подобраны так, чтобы проверить и кучу, и quickselect
+        for n, k in [(0, 3), (5, 10), (100, 50), (1000, 3), (1000, 0)]:
+            lst = self.random_records(n)
+            self.assertEqual(nsmallest(lst, k, key=key),
+                             heapq.nsmallest(k, lst, key=key))
+            self.assertEqual(nlargest(lst, k, key=key),
+                             heapq.nlargest(k, lst, key=key))
+            self.assertEqual(nsmallest(lst, k), heapq.nsmallest(k, lst))
+            self.assertEqual(nlargest(lst, k), heapq.nlargest(k, lst))
+
+
+class ExternalSortTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, 'input')
+        self.dst = os.path.join(self.tmp.name, 'output')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_input(self, data):
+        with open(self.src, 'wb') as f:
+            f.write(data)
+
+    def read_output(self):
+        with open(self.dst, 'rb') as f:
+            return f.read()
+
+    def test_empty_file(self):
+        self.write_input(b'')
+        external_sort(self.src, self.dst)
+        self.assertEqual(self.read_output(), b'')
+
+    def test_lines(self):
+        self.write_input(b'b\nc\na\nb')
+        external_sort(self.src, self.dst)
+        self.assertEqual(self.read_output(), b'a\nb\nb\nc\n')
+
+    def test_line_terminator_not_compared(self):
+        self.write_input(b'a\tb\na\nab\na')
+        external_sort(self.src, self.dst)
+        self.assertEqual(self.read_output(), b'a\na\na\tb\nab\n')
+
+    def test_lines_with_many_runs(self):
+        lines = [b'%d\n' % random.randint(0, 1000) for _ in range(3000)]
+        self.write_input(b''.join(lines))
+        external_sort(self.src, self.dst, key=int, memory_limit=2000)
+        self.assertEqual(self.read_output(), b''.join(sorted(lines, key=int)))
+
+    def test_fixed_records_stability(self):
+        records = [struct.pack('<ii', random.randint(-5, 5), i)
+                   for i in range(3000)]
+        self.write_input(b''.join(records))
+
+        def key(record):
+            return struct.unpack_from('<i', record)[0]
+
+        external_sort(self.src, self.dst, record_size=8, key=key,
+                      memory_limit=4000)
+        self.assertEqual(self.read_output(),
+                         b''.join(sorted(records, key=key)))
+
+    def test_truncated_record(self):
+        self.write_input(b'12345')
+        with self.assertRaises(ValueError):
+            external_sort(self.src, self.dst, record_size=2)
+
+
+class InstrumentTests(unittest.TestCase):
+
+    def test_counting_sequence(self):
+        seq = CountingSequence([2, 1, 3])
+        seq[0], seq[1] = seq[1], seq[0]
+        self.assertTrue(seq[1] < seq[2])
+        self.assertEqual(seq.tolist(), [1, 2, 3])
+        self.assertEqual(seq.report.as_dict(),
+                         {'comparisons': 1, 'swaps': 1, 'reads': 4,
+                          'writes': 2, 'calls': 0, 'max_depth': 0,
+                          'peak_memory': 0})
+
+    def test_profile_sorts(self):
+        data = [random.randint(0, 100) for _ in range(200)]
+        for func in [insertion_sort, quick_sort_random, pdqsort,
+                     optimized_introsort, heapsort, merge_sort_recursive,
+                     merge_sort_adaptive, merge_sort_in_place]:
+            res, report = profile(func, data)
+            self.assertEqual(res, sorted(data), func.__name__)
+            self.assertGreater(report.comparisons, 0, func.__name__)
+            self.assertGreater(report.calls, 0, func.__name__)
+            self.assertGreater(report.max_depth, 0, func.__name__)
+
+    def test_reverse(self):
+        data = [random.randint(0, 100) for _ in range(50)]
+        res, report = profile(pdqsort, data, reverse=True)
+        self.assertEqual(res, sorted(data, reverse=True))
+        self.assertGreater(report.comparisons, 0)
+        self.assertEqual(report.writes, len(data))
+
+    def test_recursion_depth(self):
+        _, report = profile(quick_sort_random, list(range(1000)))
+        self.assertGreater(report.max_depth, 5)
+        _, report = profile(optimized_introsort, list(range(1000)))
+        self.assertLessEqual(report.max_depth, 2)
+
+    def test_not_comparison_sort(self):
+        data = [random.randint(0, 100) for _ in range(50)]
+        res, report = profile(radix_sort, data, wrap=False)
+        self.assertEqual(res, sorted(data))
+        self.assertEqual(report.comparisons, 0)
+        self.assertGreater(report.reads, 0)
+
+    def test_find(self):
+        data = [random.randint(0, 100) for _ in range(200)]
+        res, report = profile(find, data, 50)
+        self.assertEqual(res, sorted(data)[49])
+        self.assertGreater(report.comparisons, 0)
+        self.assertGreater(report.swaps, 0)
+        self.assertGreater(report.max_depth, 1)
+
+    def test_instrument_memory(self):
+        with instrument() as report:
+            merge_sort_recursive([random.random() for _ in range(1000)])
+        self.assertGreater(report.peak_memory, 0)
+        self.assertGreater(report.calls, 100)
+        self.assertIsInstance(report, Report)
+
+
+class BenchTests(unittest.TestCase):
+
+    def test_distributions(self):
+        for name, generator in DISTRIBUTIONS.items():
+            lst = generator(100, random.Random(0))
+            self.assertEqual(len(lst), 100, name)
+            self.assertTrue(all(0 <= el < 100 for el in lst), name)
+
+    def test_run_benchmark(self):
+        results = run_benchmark([50], ['pdqsort', 'countsort'],
+                                ['random', 'sorted'], repeat=1)
+        self.assertEqual(len(results), 4)
+        for res in results:
+            self.assertGreater(res['time'], 0)
+            if res['algorithm'] == 'countsort':
+                self.assertIsNone(res['comparisons'])
+            else:
+                self.assertGreater(res['comparisons'], 0)
+
+    def test_find_regressions(self):
+        baseline = [{'algorithm': 'a', 'distribution': 'd', 'size': 10,
+                     'time': 1.0, 'comparisons': 100, 'peak_memory': 0}]
+        results = [{'algorithm': 'a', 'distribution': 'd', 'size': 10,
+                    'time': 1.1, 'comparisons': 200, 'peak_memory': 10}]
+        regressions = find_regressions(results, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('comparisons', regressions[0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,196 @@
+"""
+Сортировки строк (str и bytes), которые не сравнивают строки целиком, а
+распределяют их по символам. Сравнение двух строк с длинным общим префиксом
+(например, URL одного сайта) каждый раз заново проходит этот префикс, а
+поразрядные сортировки смотрят на каждый символ префикса не более одного раза
+для группы строк.
+"""
+
+import multiprocessing
+import os
+import random
+from typing import List
+
+from sorts.parallelsort import MIN_PARALLEL_SIZE
+
+# Группы строк не длиннее этой сортируются вставками
+STRING_INSERTION_THRESHOLD = 32
+
+
+def msd_radix_sort(lst, workers: int = 1) -> List:
+    """Поразрядная сортировка строк, начиная со старшего разряда (MSD)
+
+    Строки группы распределяются по корзинам по символу на позиции d, после
+    чего каждая корзина сортируется по позиции d + 1. Строки длины d (конец
+    строки) идут перед всеми корзинами. Перед распределением позиция d
+    сдвигается на длину общего префикса группы: он равен общему префиксу
+    наименьшей и наибольшей строк, которые находятся за O(n) сравнений без
+    повторного прохода по префиксу в Python. Группы не длиннее
+    STRING_INSERTION_THRESHOLD сортируются вставками. Рекурсия заменена
+    стеком, поэтому длина строк не ограничена глубиной рекурсии.
+
+    Сложность O(n + D), где D - суммарная длина различающих префиксов строк.
+
+    Если workers > 1, то массив распределяется по корзинам первого
+    различающегося символа, корзины делятся на workers идущих подряд частей
+    примерно одинакового размера, и каждая часть сортируется в своем процессе.
+    Если почти все строки попали в одну корзину, то параллелизма нет.
+
+    :param lst: список строк str или bytes, не изменяется
+    :param workers: количество процессов. None - количество ядер
+    :return: новый отсортированный список
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(lst) < MIN_PARALLEL_SIZE:
+        return _msd_sort(list(lst), 0)
+    return _parallel_msd_sort(lst, workers)
+
+
+def _msd_sort(strings: List, depth: int) -> List:
+    """
+    Сортирует строки, у которых совпадают первые depth символов.
+    """
+    res = []
+    stack = [(strings, depth)]
+    while stack:
+        group, d = stack.pop()
+        if len(group) <= STRING_INSERTION_THRESHOLD:
+            res.extend(_insertion_sort(group))
+            continue
+        done, buckets, d = _distribute(group, d)
+        if buckets is None:
+            # Все строки равны
+            res.extend(group)
+            continue
+        res.extend(done)
+        for c in sorted(buckets, reverse=True):
+            stack.append((buckets[c], d + 1))
+    return res
+
+
+def _distribute(group: List, d: int):
+    """
+    Сдвигает позицию d на длину общего префикса группы и распределяет по
+    корзинам символов на этой позиции. Возвращает строки, закончившиеся на
+    позиции d, словарь корзин (None, если все строки равны) и позицию.
+    """
+    lo, hi = min(group), max(group)
+    if lo == hi:
+        return group, None, d
+    # lo - префикс hi или отличается от него в позиции d или дальше
+    while d < len(lo) and lo[d] == hi[d]:
+        d += 1
+    done, buckets = [], {}
+    for s in group:
+        if len(s) == d:
+            done.append(s)
+            continue
+        bucket = buckets.get(s[d])
+        if bucket is None:
+            buckets[s[d]] = [s]
+        else:
+            bucket.append(s)
+    return done, buckets, d
+
+
+def _insertion_sort(group: List) -> List:
+    """
+    Сортировка вставками. Общий префикс группы сравнивается внутри сравнения
+    строк, это дешевле, чем срезать суффиксы.
+    """
+    for i in range(1, len(group)):
+        el = group[i]
+        j = i - 1
+        while j >= 0 and el < group[j]:
+            group[j + 1] = group[j]
+            j -= 1
+        group[j + 1] = el
+    return group
+
+
+def _parallel_msd_sort(lst, workers: int) -> List:
+    group = list(lst)
+    done, buckets, d = _distribute(group, 0)
+    if buckets is None:
+        return group
+    parts, part = [], []
+    target = len(group) / workers
+    for c in sorted(buckets):
+        part.extend(buckets[c])
+        if len(part) >= target:
+            parts.append(part)
+            part = []
+    if part:
+        parts.append(part)
+    # Строки разных корзин одной части по-прежнему имеют общий префикс
+    # длины d, поэтому каждая часть сортируется с позиции d
+    with multiprocessing.Pool(min(workers, len(parts))) as pool:
+        sorted_parts = pool.starmap(_msd_sort, [(p, d) for p in parts])
+    for p in sorted_parts:
+        done.extend(p)
+    return done
+
+
+def quick_sort_3_way_string(lst: List, l: int = 0, r: int = None) -> List:
+    """Быстрая сортировка строк с тройным разделением (Бентли - Седжвик)
+
+    Отрезок делится на три части по символу опорной строки на позиции d:
+    строки с меньшим символом, с равным и с большим. Меньшая и большая части
+    сортируются по той же позиции, равная - по позиции d + 1. Конец строки
+    считается символом меньше всех остальных. Короткие отрезки сортируются
+    вставками. Сортировка на месте, неустойчивая, дополнительная память -
+    только стек отрезков. Можно отсортировать часть списка с индексами от l
+    до r включительно.
+    """
+    r = len(lst) - 1 if r is None else r
+    stack = [(l, r, 0)]
+    while stack:
+        l, r, d = stack.pop()
+        if r - l < STRING_INSERTION_THRESHOLD:
+            if r > l:
+                lst[l:r + 1] = _insertion_sort(lst[l:r + 1])
+            continue
+        pivot = _char_at(lst[random.randint(l, r)], d)
+        lt, i, gt = l, l, r
+        while i <= gt:
+            c = _char_at(lst[i], d)
+            if c < pivot:
+                lst[lt], lst[i] = lst[i], lst[lt]
+                lt += 1
+                i += 1
+            elif c > pivot:
+                lst[gt], lst[i] = lst[i], lst[gt]
+                gt -= 1
+            else:
+                i += 1
+        stack.append((l, lt - 1, d))
+        stack.append((gt + 1, r, d))
+        if pivot >= 0:
+            stack.append((lt, gt, d + 1))
+    return lst
+
+
+def _char_at(s, d: int) -> int:
+    """ Код символа str или байт bytes на позиции d, -1 за концом строки. """
+    if d >= len(s):
+        return -1
+    c = s[d]
+    return c if isinstance(c, int) else ord(c)
+
+
+if __name__ == '__main__':
+    import time
+
+    from sorts.mergesort import merge_sort_adaptive
+    from sorts.quicksort import pdqsort
+
+    hosts = [f'https://www.{random.choice(["example", "python", "docs"])}'
+             f'.{random.choice(["com", "org"])}' for _ in range(50)]
+    data = [f'{random.choice(hosts)}/{random.randrange(1000)}/'
+            f'page-{random.randrange(10 ** 6)}' for _ in range(10 ** 5)]
+    for f in [sorted, msd_radix_sort, quick_sort_3_way_string, pdqsort,
+              merge_sort_adaptive]:
+        copy = data[:]
+        start = time.perf_counter()
+        f(copy)
+        print(f'{f.__name__}: {time.perf_counter() - start:.3f} s')
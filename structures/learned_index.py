@@ -0,0 +1,254 @@
+"""
+Обученный индекс (learned index) над упорядоченным массивом чисел. Если
+ключи (метки времени, идентификаторы) почти линейно зависят от своей
+позиции, то позицию можно предсказать формулой, а не искать по дереву.
+
+Массив приближается кусочно-линейной функцией с ограниченной ошибкой: для
+каждого различного ключа предсказанная позиция его первого вхождения
+отличается от настоящей не больше чем на error. Отрезки строятся за один
+проход жадным алгоритмом "сужающегося конуса": для текущего отрезка
+поддерживается диапазон наклонов прямой из первой точки, при которых все
+точки отрезка попадают в коридор ±error. Очередная точка сужает диапазон,
+и если он стал пустым, то начинается новый отрезок.
+
+Поиск ключа: двоичный поиск отрезка по первым ключам отрезков, предсказание
+позиции и двоичный поиск в окне ±max_error вокруг нее. Если ключа в массиве
+нет и он попал между отрезками или после длинной серии повторов, то ответ
+может оказаться за окном - тогда окно расширяется экспоненциальным поиском.
+Модель хранит по три числа на отрезок, а сам массив не копируется. Первые
+ключи отрезков хранятся точно (целые - в array('q')), а разность ключа
+и первого ключа отрезка вычисляется до перевода в float, поэтому граница
+ошибки сохраняется и для целых больше 2^53 (метки времени в наносекундах,
+идентификаторы).
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+DEFAULT_ERROR = 32
+
+
+class LearnedIndex:
+    """
+    Индекс над упорядоченной по неубыванию последовательностью чисел. После
+    построения индекса последовательность нельзя изменять.
+    """
+
+    def __init__(self, lst: Sequence, error: int = DEFAULT_ERROR) -> None:
+        """
+        Обучить модель.
+
+        :param lst: упорядоченные числа (list, array.array, numpy.ndarray)
+        :param error: допустимая ошибка предсказания позиции
+        """
+        if error < 1:
+            raise ValueError('Error bound must be at least 1')
+        self._lst = lst
+        self._n = len(lst)
+        # Первый ключ, позиция его первого вхождения и наклон каждого отрезка
+        self._keys = []
+        self._positions = array('q')
+        self._slopes = array('d')
+        self._fit(error)
+        self._keys = _compact(self._keys)
+        self.max_error = self._measure_error()
+
+    def _fit(self, error: int) -> None:
+        lst = self._lst
+        start_key = start_pos = None
+        lo, hi = 0.0, float('inf')
+        prev = None
+        for pos in range(self._n):
+            key = lst[pos]
+            if prev is not None and key == prev:
+                continue
+            prev = key
+            if start_key is None:
+                start_key, start_pos = key, pos
+                continue
+            dk = float(key - start_key)
+            new_lo = max(lo, (pos - error - start_pos) / dk)
+            new_hi = min(hi, (pos + error - start_pos) / dk)
+            if new_lo <= new_hi:
+                lo, hi = new_lo, new_hi
+                continue
+            self._add_segment(start_key, start_pos, lo, hi)
+            start_key, start_pos = key, pos
+            lo, hi = 0.0, float('inf')
+        if start_key is not None:
+            self._add_segment(start_key, start_pos, lo, hi)
+
+    def _add_segment(self, key, pos: int, lo: float, hi: float) -> None:
+        self._keys.append(key)
+        self._positions.append(pos)
+        self._slopes.append(lo if hi == float('inf') else (lo + hi) / 2)
+
+    def _predict(self, key) -> int:
+        """
+        Предсказанная позиция первого элемента, не меньшего key. Ограничена
+        началами своего и следующего отрезков.
+        """
+        s = bisect_right(self._keys, key) - 1
+        if s < 0:
+            return 0
+        start = self._positions[s]
+        end = self._positions[s + 1] if s + 1 < len(self._positions) \
+            else self._n
+        pos = start + int(self._slopes[s] * float(key - self._keys[s]))
+        return min(max(pos, start), end)
+
+    def _measure_error(self) -> int:
+        """ Наибольшая ошибка предсказания по всем различным ключам. """
+        lst, res, prev = self._lst, 0, None
+        for pos in range(self._n):
+            key = lst[pos]
+            if prev is None or key != prev:
+                res = max(res, abs(self._predict(key) - pos))
+                prev = key
+        return res
+
+    def lower_bound(self, key) -> int:
+        """ Индекс первого элемента, не меньшего key (или len). """
+        lst, n = self._lst, self._n
+        pos = self._predict(key)
+        lo, hi = max(pos - self.max_error, 0), min(pos + self.max_error + 1, n)
+        i = bisect_left(lst, key, lo, hi)
+        if i == lo and lo > 0 and not lst[lo - 1] < key:
+            return _gallop_left(lst, key, lo)
+        if i == hi and hi < n and lst[hi] < key:
+            return _gallop_right(lst, key, hi, n)
+        return i
+
+    def upper_bound(self, key) -> int:
+        """
+        Индекс первого элемента, большего key (или len). Серия равных key
+        пропускается экспоненциальным поиском от lower_bound.
+        """
+        lst, n = self._lst, self._n
+        lo = self.lower_bound(key)
+        if lo == n or key < lst[lo]:
+            return lo
+        step, hi = 1, lo + 1
+        while hi < n and not key < lst[hi]:
+            lo = hi
+            hi = min(hi + step, n)
+            step *= 2
+        return bisect_right(lst, key, lo, hi)
+
+    def rank(self, key) -> int:
+        """ Количество элементов, меньших key. """
+        return self.lower_bound(key)
+
+    def search(self, key) -> int:
+        """ Индекс первого вхождения key или -1, если его нет. """
+        i = self.lower_bound(key)
+        return i if i < self._n and self._lst[i] == key else -1
+
+    def __contains__(self, key):
+        return self.search(key) != -1
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def segments(self) -> int:
+        """ Количество линейных отрезков модели. """
+        return len(self._slopes)
+
+    @property
+    def model_size(self) -> int:
+        """
+        Объем модели в байтах (без самого массива). Ключи, которые не
+        удалось упаковать в array, считаются по 8 байт.
+        """
+        return sum(getattr(a, 'itemsize', 8) * len(a)
+                   for a in (self._keys, self._positions, self._slopes))
+
+
+def _compact(keys):
+    """
+    Упаковывает первые ключи отрезков без потери точности: целые из
+    диапазона int64 - в array('q'), числа с плавающей точкой - в array('d').
+    Остальные ключи остаются списком.
+    """
+    try:
+        if all(float(k).is_integer() and int(k) == k for k in keys):
+            return array('q', map(int, keys))
+        return array('d', keys)
+    except (OverflowError, TypeError):
+        return keys
+
+
+def _gallop_left(lst, key, hi: int) -> int:
+    """
+    Первый элемент, не меньший key, левее hi, если lst[hi - 1] >= key.
+    Шаг поиска удваивается, пока не найдена левая граница.
+    """
+    step = 1
+    lo = hi - 1
+    while lo > 0 and not lst[lo - 1] < key:
+        hi = lo
+        lo = max(lo - step, 0)
+        step *= 2
+    return bisect_left(lst, key, lo, hi)
+
+
+def _gallop_right(lst, key, lo: int, n: int) -> int:
+    """
+    Первый элемент, не меньший key, правее lo, если lst[lo] < key.
+    """
+    step = 1
+    hi = lo + 1
+    while hi < n and lst[hi] < key:
+        lo = hi
+        hi = min(hi + step, n)
+        step *= 2
+    return bisect_left(lst, key, lo, hi)
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+
+    from binarysearch import index
+    from sorts.instrument import CountingSequence
+    from structures.static_index import StaticSortedIndex
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    # Метки времени событий: примерно равномерный поток с шумом
+    t, timestamps = 1_700_000_000_000, []
+    for _ in range(n):
+        t += random.randint(0, 20)
+        timestamps.append(t)
+    data = array('q', timestamps)
+    queries = [random.choice(timestamps) + random.randint(-1, 1)
+               for _ in range(10 ** 5)]
+
+    for error in (8, 32, 128):
+        start = time.perf_counter()
+        idx = LearnedIndex(data, error)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for q in queries:
+            idx.lower_bound(q)
+        elapsed = time.perf_counter() - start
+        print(f'LearnedIndex(error={error}): build {build:.2f} s, '
+              f'{idx.segments} segments, {idx.model_size} bytes, '
+              f'max error {idx.max_error}, '
+              f'{elapsed / len(queries) * 1e6:.2f} us/query')
+
+    tree = StaticSortedIndex(data, presorted=True)
+    tree_size = sum(level.itemsize * len(level) for level in tree._levels[:-1])
+    print(f'StaticSortedIndex inner levels: {tree_size} bytes')
+
+    # Количество чтений элементов массива на один поиск
+    seq = CountingSequence(data, wrap=False)
+    idx = LearnedIndex(seq)
+    for name, func in [('binarysearch.index', lambda q: index(seq, q)),
+                       ('LearnedIndex.lower_bound', idx.lower_bound)]:
+        seq.report.reads = 0
+        for q in queries[:10000]:
+            func(q)
+        print(f'{name}: {seq.report.reads / 10000:.1f} reads/query')
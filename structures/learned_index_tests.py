@@ -0,0 +1,80 @@
+import bisect
+import random
+import unittest
+from array import array
+
+from structures.learned_index import LearnedIndex
+
+
+class LearnedIndexTests(unittest.TestCase):
+
+    def verify(self, values, queries, error=4):
+        idx = LearnedIndex(values, error)
+        self.assertEqual(len(idx), len(values))
+        self.assertLessEqual(idx.max_error, error + 1)
+        for q in queries:
+            left = bisect.bisect_left(values, q)
+            right = bisect.bisect_right(values, q)
+            self.assertEqual(idx.lower_bound(q), left)
+            self.assertEqual(idx.rank(q), left)
+            self.assertEqual(idx.upper_bound(q), right)
+            self.assertEqual(idx.search(q), left if right > left else -1)
+            self.assertEqual(q in idx, right > left)
+
+    def test_empty(self):
+        self.verify([], [0, 1])
+        self.assertEqual(LearnedIndex([]).segments, 0)
+
+    def test_wrong_error(self):
+        self.assertRaises(ValueError, LearnedIndex, [1, 2], 0)
+
+    def test_linear_keys_one_segment(self):
+        values = array('q', range(0, 3000, 3))
+        idx = LearnedIndex(values)
+        self.assertEqual(idx.segments, 1)
+        self.assertEqual(idx.max_error, 0)
+        self.assertEqual(idx.model_size, 24)
+        self.verify(values, range(-2, 3003))
+
+    def test_random_ints(self):
+        rng = random.Random(0)
+        values = sorted(rng.randrange(10 ** 6) for _ in range(5000))
+        self.verify(values, [rng.randrange(-10, 10 ** 6 + 10)
+                             for _ in range(2000)] + values[::7])
+
+    def test_duplicates_and_gaps(self):
+        values = [1] * 100 + list(range(2, 50)) + [60] * 300 + \
+            list(range(1000, 1100, 10)) + [10 ** 6] * 50
+        self.verify(values, range(-1, 1200), error=2)
+        self.verify(values, [10 ** 6 - 1, 10 ** 6, 10 ** 6 + 1], error=2)
+
+    def test_large_int_keys(self):
+        rng = random.Random(3)
+        for start in (2 ** 60, 1_700_000_000_000_000_000):
+            values, key = [], start
+            for _ in range(3000):
+                key += rng.randint(0, 3)
+                values.append(key)
+            for data in (values, array('q', values)):
+                for error in (4, 32):
+                    idx = LearnedIndex(data, error)
+                    self.assertLessEqual(idx.max_error, error + 1)
+            self.verify(values, [rng.randint(start - 5, key + 5)
+                                 for _ in range(1000)] + values[::7])
+
+    def test_floats(self):
+        rng = random.Random(1)
+        values = sorted(rng.expovariate(1) for _ in range(3000))
+        self.verify(values, [rng.uniform(-1, 10) for _ in range(1000)]
+                    + values[::5], error=8)
+
+    def test_fewer_segments_with_larger_error(self):
+        rng = random.Random(2)
+        values = sorted(rng.randrange(10 ** 9) for _ in range(10000))
+        small, large = LearnedIndex(values, 4), LearnedIndex(values, 64)
+        self.assertLess(large.segments, small.segments)
+        self.assertLess(large.model_size, small.model_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
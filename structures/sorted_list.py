@@ -0,0 +1,406 @@
+"""
+Отсортированный список. Элементы хранятся в списке упорядоченных подсписков,
+длина каждого из которых ограничена коэффициентом загрузки load (от load/2
+до 2*load элементов). Вставка и удаление выполняются бинарным поиском по
+максимумам подсписков и сдвигом элементов внутри одного короткого
+подсписка. Это О(log n + load), но сдвиг выполняется одним вызовом memmove,
+поэтому на практике такая структура быстрее сбалансированных деревьев.
+
+Для доступа по индексу поддерживается дерево позиций: полное двоичное
+дерево, листья которого - длины подсписков, а внутренние узлы - суммы
+потомков. Дерево строится лениво при первом обращении по индексу. Вставка
+и удаление без разделения и слияния подсписков обновляют его за О(log n),
+а разделение или слияние подсписков просто сбрасывают его.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_LOAD = 1000
+
+
+class SortedList:
+    """
+    Отсортированный список, допускающий повторяющиеся элементы. Элементы
+    должны быть сравнимы между собой.
+    """
+
+    def __init__(self, iterable: Optional[Iterable] = None,
+                 load: int = DEFAULT_LOAD) -> None:
+        """
+        Создать отсортированный список.
+
+        :param iterable: начальные элементы
+        :param load: коэффициент загрузки, то есть желаемая длина подсписка
+        """
+        if load < 2:
+            raise ValueError('Load factor must be at least 2')
+        self._load = load
+        self._len = 0
+        self._lists: List[List] = []
+        self._maxes: List = []
+        self._index: List[int] = []
+        self._offset = 0
+        if iterable is not None:
+            self.update(iterable)
+
+    def add(self, value: Any) -> None:
+        """ Добавить элемент. Равные элементы добавляются правее. """
+        maxes = self._maxes
+        if not maxes:
+            self._lists.append([value])
+            maxes.append(value)
+            self._len = 1
+            self._index.clear()
+            return
+        pos = bisect_right(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            self._lists[pos].append(value)
+            maxes[pos] = value
+        else:
+            insort(self._lists[pos], value)
+        self._len += 1
+        self._expand(pos)
+
+    def update(self, iterable: Iterable) -> None:
+        """
+        Добавить все элементы последовательности. Если новых элементов много
+        по сравнению с текущими, то все элементы сортируются заново одним
+        вызовом сортировки, иначе добавляются по одному.
+        """
+        values = sorted(iterable)
+        if not values:
+            return
+        if self._lists and len(values) * 4 >= self._len:
+            values.extend(chain.from_iterable(self._lists))
+            values.sort()
+            self.clear()
+        if not self._lists:
+            load = self._load
+            self._lists = [values[i:i + load]
+                           for i in range(0, len(values), load)]
+            self._maxes = [lst[-1] for lst in self._lists]
+            self._len = len(values)
+            self._index.clear()
+            return
+        for value in values:
+            self.add(value)
+
+    def remove(self, value: Any) -> None:
+        """ Удалить элемент. Если его нет, то бросается ValueError. """
+        pos, idx = self._find(value)
+        if pos is None:
+            raise ValueError(f'{value!r} not in list')
+        self._delete(pos, idx)
+
+    def discard(self, value: Any) -> None:
+        """ Удалить элемент, если он есть. """
+        pos, idx = self._find(value)
+        if pos is not None:
+            self._delete(pos, idx)
+
+    def pop(self, index: int = -1) -> Any:
+        """ Удалить и вернуть элемент с индексом index. """
+        pos, idx = self._pos(index)
+        value = self._lists[pos][idx]
+        self._delete(pos, idx)
+        return value
+
+    def clear(self) -> None:
+        self._len = 0
+        self._lists.clear()
+        self._maxes.clear()
+        self._index.clear()
+
+    def bisect_left(self, value: Any) -> int:
+        """
+        Индекс, по которому value встал бы левее всех равных ему элементов.
+        """
+        maxes = self._maxes
+        pos = bisect_left(maxes, value)
+        if pos == len(maxes):
+            return self._len
+        return self._loc(pos, bisect_left(self._lists[pos], value))
+
+    def bisect_right(self, value: Any) -> int:
+        """
+        Индекс, по которому value встал бы правее всех равных ему элементов.
+        """
+        maxes = self._maxes
+        pos = bisect_right(maxes, value)
+        if pos == len(maxes):
+            return self._len
+        return self._loc(pos, bisect_right(self._lists[pos], value))
+
+    bisect = bisect_right
+
+    def index(self, value: Any) -> int:
+        """ Индекс первого элемента, равного value. """
+        pos, idx = self._find(value)
+        if pos is None:
+            raise ValueError(f'{value!r} not in list')
+        return self._loc(pos, idx)
+
+    def count(self, value: Any) -> int:
+        """ Количество элементов, равных value. """
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def irange(self, minimum: Any = None, maximum: Any = None,
+               inclusive: Tuple[bool, bool] = (True, True),
+               reverse: bool = False) -> Iterator:
+        """
+        Итератор по элементам от minimum до maximum. Если граница равна None,
+        то диапазон с этой стороны не ограничен. inclusive указывает,
+        включаются ли в диапазон сами границы. Список нельзя изменять, пока
+        итератор не исчерпан.
+        """
+        lists, maxes = self._lists, self._maxes
+        if not maxes:
+            return iter(())
+        if minimum is None:
+            min_pos, min_idx = 0, 0
+        else:
+            search = bisect_left if inclusive[0] else bisect_right
+            min_pos = search(maxes, minimum)
+            if min_pos == len(maxes):
+                return iter(())
+            min_idx = search(lists[min_pos], minimum)
+        if maximum is None:
+            max_pos = len(maxes) - 1
+            max_idx = len(lists[max_pos])
+        else:
+            search = bisect_right if inclusive[1] else bisect_left
+            max_pos = search(maxes, maximum)
+            if max_pos == len(maxes):
+                max_pos -= 1
+                max_idx = len(lists[max_pos])
+            else:
+                max_idx = search(lists[max_pos], maximum)
+        return self._iter_range(min_pos, min_idx, max_pos, max_idx, reverse)
+
+    def _iter_range(self, min_pos: int, min_idx: int, max_pos: int,
+                    max_idx: int, reverse: bool) -> Iterator:
+        """
+        Итератор по элементам от позиции (min_pos, min_idx) включительно
+        до позиции (max_pos, max_idx) не включительно.
+        """
+        lists = self._lists
+        if min_pos > max_pos or min_pos == max_pos and min_idx >= max_idx:
+            return iter(())
+        if min_pos == max_pos:
+            parts = [lists[min_pos][min_idx:max_idx]]
+        else:
+            parts = [lists[min_pos][min_idx:]]
+            parts.extend(lists[min_pos + 1:max_pos])
+            parts.append(lists[max_pos][:max_idx])
+        if reverse:
+            return chain.from_iterable(map(reversed, reversed(parts)))
+        return chain.from_iterable(parts)
+
+    def _find(self, value: Any) -> Tuple[Optional[int], int]:
+        """
+        Позиция (номер подсписка, индекс в нем) первого элемента, равного
+        value, или (None, 0), если такого нет.
+        """
+        maxes = self._maxes
+        pos = bisect_left(maxes, value)
+        if pos == len(maxes):
+            return None, 0
+        lst = self._lists[pos]
+        idx = bisect_left(lst, value)
+        if lst[idx] != value:
+            return None, 0
+        return pos, idx
+
+    def _expand(self, pos: int) -> None:
+        """
+        Разделяет подсписок pos пополам, если он стал длиннее 2*load, иначе
+        увеличивает его длину в дереве позиций.
+        """
+        lists, load = self._lists, self._load
+        lst = lists[pos]
+        if len(lst) > 2 * load:
+            half = lst[load:]
+            del lst[load:]
+            self._maxes[pos] = lst[-1]
+            lists.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+            self._index.clear()
+        elif self._index:
+            self._update_index(pos, 1)
+
+    def _delete(self, pos: int, idx: int) -> None:
+        """
+        Удаляет элемент idx подсписка pos. Слишком короткий подсписок
+        сливается с соседним.
+        """
+        lists, maxes = self._lists, self._maxes
+        lst = lists[pos]
+        del lst[idx]
+        self._len -= 1
+        if len(lst) > self._load // 2:
+            maxes[pos] = lst[-1]
+            if self._index:
+                self._update_index(pos, -1)
+        elif len(lists) > 1:
+            if not pos:
+                pos += 1
+            prev = lists[pos - 1]
+            prev.extend(lists[pos])
+            maxes[pos - 1] = prev[-1]
+            del lists[pos]
+            del maxes[pos]
+            self._index.clear()
+            self._expand(pos - 1)
+        elif lst:
+            maxes[pos] = lst[-1]
+            if self._index:
+                self._update_index(pos, -1)
+        else:
+            del lists[pos]
+            del maxes[pos]
+            self._index.clear()
+
+    def _build_index(self) -> None:
+        """
+        Строит дерево позиций в массиве: потомки узла i - узлы 2i+1 и 2i+2,
+        листья начинаются с индекса offset.
+        """
+        size = 1
+        while size < len(self._lists):
+            size *= 2
+        index = [0] * (size - 1)
+        index.extend(map(len, self._lists))
+        index.extend([0] * (size - len(self._lists)))
+        for i in range(size - 2, -1, -1):
+            index[i] = index[2 * i + 1] + index[2 * i + 2]
+        self._index = index
+        self._offset = size - 1
+
+    def _update_index(self, pos: int, delta: int) -> None:
+        """ Изменяет длину подсписка pos в дереве позиций на delta. """
+        index = self._index
+        node = self._offset + pos
+        while node:
+            index[node] += delta
+            node = (node - 1) // 2
+        index[0] += delta
+
+    def _pos(self, i: int) -> Tuple[int, int]:
+        """ Переводит индекс элемента в пару (номер подсписка, индекс). """
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('list index out of range')
+        if i < len(self._lists[0]):
+            return 0, i
+        if not self._index:
+            self._build_index()
+        index, offset = self._index, self._offset
+        node = 0
+        while node < offset:
+            left = 2 * node + 1
+            if i < index[left]:
+                node = left
+            else:
+                i -= index[left]
+                node = left + 1
+        return node - offset, i
+
+    def _loc(self, pos: int, idx: int) -> int:
+        """ Переводит пару (номер подсписка, индекс) в индекс элемента. """
+        if not pos:
+            return idx
+        if not self._index:
+            self._build_index()
+        index = self._index
+        node = self._offset + pos
+        while node:
+            # У правого потомка слева есть брат, его элементы идут раньше
+            if not node & 1:
+                idx += index[node - 1]
+            node = (node - 1) // 2
+        return idx
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._len)
+            if step == 1:
+                if start >= stop:
+                    return []
+                min_pos, min_idx = self._pos(start)
+                if stop == self._len:
+                    max_pos = len(self._lists) - 1
+                    max_idx = len(self._lists[max_pos])
+                else:
+                    max_pos, max_idx = self._pos(stop)
+                return list(self._iter_range(min_pos, min_idx, max_pos,
+                                             max_idx, False))
+            return list(self)[i]
+        pos, idx = self._pos(i)
+        return self._lists[pos][idx]
+
+    def __delitem__(self, i: int) -> None:
+        pos, idx = self._pos(i)
+        self._delete(pos, idx)
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __contains__(self, value):
+        return self._find(value)[0] is not None
+
+    def __iter__(self):
+        return chain.from_iterable(self._lists)
+
+    def __reversed__(self):
+        return chain.from_iterable(map(reversed, reversed(self._lists)))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+
+    from structures.avl_tree import TreeSet
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    keys = random.sample(range(10 ** 9), n)
+    ranges = sorted(random.sample(range(10 ** 9), 2 * 1000))
+    ranges = list(zip(ranges[::2], ranges[1::2]))
+
+    start = time.perf_counter()
+    sl = SortedList()
+    for key in keys:
+        sl.add(key)
+    print(f'SortedList: {n} inserts {time.perf_counter() - start:.2f} s')
+    start = time.perf_counter()
+    total = sum(sum(1 for _ in sl.irange(a, b)) for a, b in ranges)
+    print(f'SortedList: {len(ranges)} range scans ({total} keys) '
+          f'{time.perf_counter() - start:.2f} s')
+
+    start = time.perf_counter()
+    ts = TreeSet()
+    for key in keys:
+        ts.put(key)
+    print(f'TreeSet: {n} inserts {time.perf_counter() - start:.2f} s')
+    # TreeSet не умеет искать границу диапазона, поэтому первый ключ
+    # ищется по позиции, найденной в SortedList
+    start = time.perf_counter()
+    total = 0
+    for a, b in ranges:
+        i = sl.bisect_left(a)
+        key = ts.get(i) if i < len(ts) else None
+        while key is not None and key <= b:
+            total += 1
+            key = ts.next(key)
+    print(f'TreeSet: {len(ranges)} range scans ({total} keys) '
+          f'{time.perf_counter() - start:.2f} s')
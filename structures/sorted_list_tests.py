@@ -0,0 +1,143 @@
+import random
+import unittest
+
+from structures.sorted_list import SortedList
+
+
+class SortedListTests(unittest.TestCase):
+
+    def setUp(self):
+        self.sl = SortedList(load=4)
+
+    def validate(self, sl, expected):
+        self.assertEqual(list(sl), expected)
+        self.assertEqual(len(sl), len(expected))
+        self.assertEqual(sl._maxes, [lst[-1] for lst in sl._lists])
+        for lst in sl._lists:
+            self.assertTrue(lst)
+            self.assertLessEqual(len(lst), 2 * sl._load)
+        if sl._index:
+            lengths = sl._index[sl._offset:sl._offset + len(sl._lists)]
+            self.assertEqual(lengths, [len(lst) for lst in sl._lists])
+            self.assertEqual(sl._index[0], len(sl))
+
+    def test_empty(self):
+        self.assertFalse(self.sl)
+        self.assertEqual(list(self.sl), [])
+        self.assertEqual(self.sl.bisect_left(1), 0)
+        self.assertEqual(list(self.sl.irange(1, 2)), [])
+        self.assertNotIn(1, self.sl)
+        with self.assertRaises(IndexError):
+            self.sl[0]
+        with self.assertRaises(ValueError):
+            self.sl.remove(1)
+
+    def test_wrong_load(self):
+        with self.assertRaises(ValueError):
+            SortedList(load=1)
+
+    def test_add_and_remove(self):
+        expected = []
+        for _ in range(1000):
+            value = random.randint(0, 100)
+            if random.random() < 0.6 or not expected:
+                self.sl.add(value)
+                expected.append(value)
+                expected.sort()
+            elif value in expected:
+                self.sl.remove(value)
+                expected.remove(value)
+            else:
+                with self.assertRaises(ValueError):
+                    self.sl.remove(value)
+            if expected:
+                i = random.randrange(len(expected))
+                self.assertEqual(self.sl[i], expected[i])
+            self.validate(self.sl, expected)
+
+    def test_indexing(self):
+        expected = sorted(random.randint(0, 1000) for _ in range(500))
+        for value in expected:
+            self.sl.add(value)
+        for i in range(-len(expected), len(expected)):
+            self.assertEqual(self.sl[i], expected[i])
+        self.assertEqual(self.sl[10:100], expected[10:100])
+        self.assertEqual(self.sl[-50:], expected[-50:])
+        self.assertEqual(self.sl[::7], expected[::7])
+        self.assertEqual(self.sl[100:10], [])
+        with self.assertRaises(IndexError):
+            self.sl[len(expected)]
+
+    def test_pop_and_del(self):
+        expected = list(range(100))
+        self.sl.update(expected)
+        while expected:
+            i = random.randrange(-len(expected), len(expected))
+            if random.random() < 0.5:
+                self.assertEqual(self.sl.pop(i), expected.pop(i))
+            else:
+                del self.sl[i]
+                del expected[i]
+            self.validate(self.sl, expected)
+
+    def test_bisect_index_count(self):
+        values = [random.randint(0, 50) for _ in range(300)]
+        self.sl.update(values)
+        values.sort()
+        for value in range(-1, 52):
+            left = sum(1 for el in values if el < value)
+            right = sum(1 for el in values if el <= value)
+            self.assertEqual(self.sl.bisect_left(value), left)
+            self.assertEqual(self.sl.bisect_right(value), right)
+            self.assertEqual(self.sl.bisect(value), right)
+            self.assertEqual(self.sl.count(value), right - left)
+            if right > left:
+                self.assertIn(value, self.sl)
+                self.assertEqual(self.sl.index(value), left)
+            else:
+                self.assertNotIn(value, self.sl)
+                with self.assertRaises(ValueError):
+                    self.sl.index(value)
+
+    def test_irange(self):
+        values = sorted(random.randint(0, 100) for _ in range(300))
+        self.sl.update(values)
+        for _ in range(200):
+            a, b = random.randint(-5, 105), random.randint(-5, 105)
+            for inclusive in [(True, True), (True, False), (False, True),
+                              (False, False)]:
+                expected = [el for el in values
+                            if (a <= el if inclusive[0] else a < el) and
+                            (el <= b if inclusive[1] else el < b)]
+                self.assertEqual(list(self.sl.irange(a, b, inclusive)),
+                                 expected)
+                self.assertEqual(
+                    list(self.sl.irange(a, b, inclusive, reverse=True)),
+                    expected[::-1])
+        self.assertEqual(list(self.sl.irange()), values)
+        self.assertEqual(list(self.sl.irange(maximum=50)),
+                         [el for el in values if el <= 50])
+        self.assertEqual(list(self.sl.irange(minimum=50)),
+                         [el for el in values if el >= 50])
+
+    def test_update(self):
+        expected = []
+        for size in [0, 1, 3, 50, 2, 500]:
+            values = [random.randint(0, 1000) for _ in range(size)]
+            self.sl.update(values)
+            expected = sorted(expected + values)
+            self.validate(self.sl, expected)
+        self.assertEqual(list(reversed(self.sl)), expected[::-1])
+
+    def test_init_and_repr(self):
+        sl = SortedList([3, 1, 2])
+        self.assertEqual(repr(sl), 'SortedList([1, 2, 3])')
+        sl.discard(5)
+        sl.discard(2)
+        self.assertEqual(list(sl), [1, 3])
+        sl.clear()
+        self.assertEqual(len(sl), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
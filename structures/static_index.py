@@ -0,0 +1,233 @@
+"""
+Статический упорядоченный индекс для многократного поиска по неизменяемому
+массиву. Двоичный поиск по большому массиву на каждом шаге обращается
+к далекому участку памяти, и нижние шаги почти всегда промахиваются мимо
+кэша и TLB. Здесь массив один раз перестраивается в неявное B-дерево
+с ветвлением fanout (по умолчанию 16): уровни хранятся отдельными плотными
+массивами, узел - это fanout подряд идущих ключей, а ключ узла верхнего
+уровня - максимум соответствующего блока нижнего. Указателей нет: потомки
+узла j на следующем уровне - это узел с номером j * fanout + i. Поиск
+проходит log_fanout(n) уровней и на каждом читает один короткий
+непрерывный узел.
+
+Числовые ключи хранятся в array.array (8 байт на ключ), остальные - в
+списках. Одиночный поиск внутри узла выполняет встроенный bisect. Пакетный
+поиск (*_many) при наличии NumPy спускается по дереву сразу для всех ключей:
+на каждом уровне узлы собираются в матрицу, и позиция в узле находится
+векторным сравнением с ключами.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_FANOUT = 16
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class StaticSortedIndex:
+    """
+    Неизменяемый упорядоченный набор элементов, допускающий повторы.
+    Элементы должны быть сравнимы между собой.
+    """
+
+    def __init__(self, values: Iterable, fanout: int = DEFAULT_FANOUT,
+                 presorted: bool = False) -> None:
+        """
+        Построить индекс.
+
+        :param values: элементы
+        :param fanout: ветвление дерева, то есть длина узла
+        :param presorted: элементы уже упорядочены, сортировать не нужно
+        """
+        if fanout < 2:
+            raise ValueError('Fanout must be at least 2')
+        self._fanout = fanout
+        if not presorted:
+            values = sorted(values)
+        elif not isinstance(values, (list, array)):
+            values = list(values)
+        self._len = len(values)
+        # Уровни от корня к листьям, листья - сами элементы. Последний узел
+        # каждого уровня дополнен повторами последнего ключа, поэтому все
+        # узлы полные
+        level = _compact(values)
+        self._levels: List = []
+        while True:
+            if len(level) % fanout:
+                level.extend([level[-1]] * (fanout - len(level) % fanout))
+            self._levels.insert(0, level)
+            if len(level) <= fanout:
+                break
+            level = level[fanout - 1::fanout]
+
+    def lower_bound(self, value: Any) -> int:
+        """ Индекс первого элемента, не меньшего value (или len). """
+        return self._descend(value, bisect_left)
+
+    def upper_bound(self, value: Any) -> int:
+        """ Индекс первого элемента, большего value (или len). """
+        return self._descend(value, bisect_right)
+
+    def rank(self, value: Any) -> int:
+        """ Количество элементов, меньших value. """
+        return self._descend(value, bisect_left)
+
+    def contains(self, value: Any) -> bool:
+        i = self._descend(value, bisect_left)
+        return i < self._len and self._levels[-1][i] == value
+
+    def _descend(self, value: Any, search) -> int:
+        """
+        Спуск от корня к листу. В каждом узле ищется первый ключ, не меньший
+        (bisect_left) или больший (bisect_right) value, - это номер узла
+        на следующем уровне.
+        """
+        levels, fanout = self._levels, self._fanout
+        j = search(levels[0], value)
+        if j == len(levels[0]):
+            return self._len
+        for level in levels[1:]:
+            lo = j * fanout
+            j = search(level, value, lo, lo + fanout)
+        return min(j, self._len)
+
+    def lower_bound_many(self, values: Iterable):
+        """
+        lower_bound для каждого значения.
+
+        :return: numpy.ndarray при векторном поиске, иначе array('q')
+        """
+        return self._descend_many(values, False)
+
+    def upper_bound_many(self, values: Iterable):
+        """
+        upper_bound для каждого значения.
+
+        :return: numpy.ndarray при векторном поиске, иначе array('q')
+        """
+        return self._descend_many(values, True)
+
+    def contains_many(self, values: Iterable):
+        """
+        contains для каждого значения.
+
+        :return: булев numpy.ndarray при векторном поиске, иначе список
+        """
+        values = values if np is not None and isinstance(values, np.ndarray) \
+            else list(values)
+        first = self._descend_many(values, False)
+        last = self._descend_many(values, True)
+        if isinstance(first, array):
+            return [a < b for a, b in zip(first, last)]
+        return first < last
+
+    def _descend_many(self, values: Iterable, right: bool):
+        """
+        Пакетный спуск. Если ключи хранятся в array.array и установлен
+        NumPy, то уровни оборачиваются в матрицы узлов numpy.ndarray без
+        копирования. На каждом уровне для всех значений собираются их узлы,
+        и номер потомка - это количество ключей узла, меньших значения (не
+        больших для upper_bound).
+        """
+        leaves = self._levels[-1]
+        if np is None or not isinstance(leaves, array) or not self._len:
+            search = bisect_right if right else bisect_left
+            return array('q', [self._descend(v, search) for v in values])
+        fanout = self._fanout
+        values = np.asarray(values)[:, None]
+        j = np.zeros(len(values), dtype=np.int64)
+        for level in self._levels:
+            nodes = np.frombuffer(level, dtype=level.typecode).reshape(
+                -1, fanout)
+            # Значения больше всех ключей уходят правее последнего узла
+            node = nodes[np.minimum(j, len(nodes) - 1)]
+            below = node <= values if right else node < values
+            j = j * fanout + np.count_nonzero(below, axis=1)
+        return np.minimum(j, self._len)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, value):
+        return self.contains(value)
+
+    def __iter__(self):
+        return islice(self._levels[-1], self._len)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+def _compact(keys):
+    """
+    Возвращает копию упорядоченных ключей: целые из диапазона int64
+    упаковываются в array('q'), числа с плавающей точкой - в array('d'),
+    остальные элементы остаются списком.
+    """
+    if isinstance(keys, array):
+        if keys.typecode in 'fd':
+            return array('d', keys)
+        if keys.typecode not in 'QL' or not keys or keys[-1] <= _INT64_MAX:
+            return array('q', keys)
+        return keys.tolist()
+    if not keys:
+        return []
+    types = set(map(type, keys))
+    if types == {int} and _INT64_MIN <= keys[0] and keys[-1] <= _INT64_MAX:
+        return array('q', keys)
+    if types == {float}:
+        return array('d', keys)
+    return list(keys)
+
+
+if __name__ == '__main__':
+    import bisect
+    import random
+    import sys
+    import time
+
+    from binarysearch import index, search
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    keys = array('q', range(0, 2 * n, 2))
+    plain = keys.tolist()
+    queries = [random.randrange(2 * n) for _ in range(10 ** 5)]
+
+    start = time.perf_counter()
+    idx = StaticSortedIndex(keys, presorted=True)
+    print(f'build: {time.perf_counter() - start:.2f} s')
+
+    for name, func in [
+            ('binarysearch.search', lambda x: search(plain, x)),
+            ('binarysearch.index', lambda x: index(plain, x)),
+            ('bisect.bisect_left (list)', lambda x: bisect.bisect_left(
+                plain, x)),
+            ('bisect.bisect_left (array)', lambda x: bisect.bisect_left(
+                keys, x)),
+            ('StaticSortedIndex.lower_bound', idx.lower_bound)]:
+        start = time.perf_counter()
+        for q in queries:
+            func(q)
+        elapsed = time.perf_counter() - start
+        print(f'{name:>30}: {elapsed / len(queries) * 1e6:.2f} us/query')
+
+    if np is not None:
+        batch = np.random.randint(0, 2 * n, 10 ** 6)
+        arr = np.frombuffer(keys, dtype=np.int64)
+        start = time.perf_counter()
+        expected = np.searchsorted(arr, batch)
+        print(f'numpy.searchsorted, {len(batch)} queries: '
+              f'{time.perf_counter() - start:.3f} s')
+        start = time.perf_counter()
+        res = idx.lower_bound_many(batch)
+        print(f'lower_bound_many, {len(batch)} queries: '
+              f'{time.perf_counter() - start:.3f} s')
+        assert (res == expected).all()
@@ -0,0 +1,74 @@
+import bisect
+import random
+import unittest
+from array import array
+from unittest import mock
+
+from structures.static_index import StaticSortedIndex
+
+
+class StaticSortedIndexTests(unittest.TestCase):
+
+    def verify(self, values, queries, fanout=4):
+        idx = StaticSortedIndex(values, fanout=fanout)
+        expected = sorted(values)
+        self.assertEqual(list(idx), expected)
+        self.assertEqual(len(idx), len(expected))
+        for q in queries:
+            left = bisect.bisect_left(expected, q)
+            right = bisect.bisect_right(expected, q)
+            self.assertEqual(idx.lower_bound(q), left)
+            self.assertEqual(idx.rank(q), left)
+            self.assertEqual(idx.upper_bound(q), right)
+            self.assertEqual(idx.contains(q), right > left)
+            self.assertEqual(q in idx, right > left)
+        self.assertEqual(list(idx.lower_bound_many(queries)),
+                         [bisect.bisect_left(expected, q) for q in queries])
+        self.assertEqual(list(idx.upper_bound_many(queries)),
+                         [bisect.bisect_right(expected, q) for q in queries])
+        self.assertEqual(list(idx.contains_many(queries)),
+                         [q in expected for q in queries])
+
+    def verify_both_modes(self, values, queries, fanout=4):
+        self.verify(values, queries, fanout)
+        with mock.patch('structures.static_index.np', None):
+            self.verify(values, queries, fanout)
+
+    def test_empty(self):
+        self.verify_both_modes([], [0, 1])
+
+    def test_wrong_fanout(self):
+        with self.assertRaises(ValueError):
+            StaticSortedIndex([1], fanout=1)
+
+    def test_sizes(self):
+        for fanout in (2, 3, 16):
+            for n in range(0, 70):
+                values = [random.randint(0, 30) for _ in range(n)]
+                self.verify_both_modes(values, range(-1, 32), fanout)
+
+    def test_floats_and_strings(self):
+        values = [random.uniform(-1, 1) for _ in range(300)]
+        queries = values[:50] + [random.uniform(-2, 2) for _ in range(50)]
+        self.verify_both_modes(values, queries)
+        words = [str(random.random()) for _ in range(300)]
+        self.verify_both_modes(words, words[:20] + ['0', '1', 'x'])
+
+    def test_big_ints(self):
+        values = [2 ** 70, -2 ** 70, 0, 5]
+        self.verify_both_modes(values, [2 ** 70, 1, -2 ** 71])
+
+    def test_presorted_array(self):
+        values = array('Q', [1, 3, 3, 7, 2 ** 64 - 1])
+        idx = StaticSortedIndex(values, presorted=True)
+        self.assertEqual(idx.upper_bound(3), 3)
+        self.assertEqual(idx.lower_bound(2 ** 64 - 1), 4)
+        values = array('i', range(0, 1000, 3))
+        idx = StaticSortedIndex(values, presorted=True)
+        self.assertEqual(list(idx), list(values))
+        self.assertEqual(list(idx.lower_bound_many([0, 4, 999, 1000])),
+                         [0, 2, 333, 334])
+
+
+if __name__ == '__main__':
+    unittest.main()